@@ -4,3 +4,6 @@ from . import monitoring  # noqa: F401
 
 api_token: str = ""
 url: str = ""
+
+log_cache_dir: str = ""
+"""Directory to cache logs of completed runs in. Defaults to `~/.cache/nannyml_cloud_sdk/run_logs`."""
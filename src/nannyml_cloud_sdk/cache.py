@@ -0,0 +1,146 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple, TypeVar
+
+from ._typing import TypedDict
+
+_V = TypeVar('_V')
+
+
+class CacheStatistics(TypedDict):
+    """Statistics of a metadata cache.
+
+    Attributes:
+        hits: Number of lookups answered from the cache.
+        misses: Number of lookups that had to load the value.
+        evictions: Number of entries removed to stay within the maximum size.
+        expirations: Number of entries removed because they outlived the time-to-live.
+        invalidations: Number of entries removed by invalidation.
+        size: Current number of entries.
+    """
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    invalidations: int
+    size: int
+
+
+class MetadataCache:
+    """Cache for metadata that rarely changes, e.g. the data sources of a model.
+
+    Entries are keyed by a tuple that starts with the product type and the ID of the model (or experiment) the entry
+    belongs to. This allows invalidating all entries for a model at once, which happens automatically when a model is
+    created or deleted through the SDK. Entries expire after `ttl` seconds, so changes made outside the SDK are picked
+    up eventually. When the cache holds `maxsize` entries, the least recently used entry is evicted.
+
+    The cache is safe to use from multiple threads.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = 300, timer: Callable[[], float] = time.monotonic):
+        """Create a new metadata cache.
+
+        Args:
+            maxsize: Maximum number of entries.
+            ttl: Number of seconds after which an entry expires. Use ``None`` to never expire entries.
+            timer: Function returning the current time in seconds.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._entries: 'OrderedDict[Tuple[Hashable, ...], Tuple[float, Any]]' = OrderedDict()
+        self._keys_by_owner: Dict[Tuple[str, str], Set[Tuple[Hashable, ...]]] = {}
+        self._lock = threading.Lock()
+        self._statistics: CacheStatistics = {
+            'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0, 'size': 0
+        }
+
+    def get(self, key: Tuple[Hashable, ...], loader: Callable[[], _V]) -> _V:
+        """Get a value from the cache, loading and storing it if it is missing or expired.
+
+        Args:
+            key: Key of the entry, starting with the product type and the ID of the model it belongs to.
+            loader: Function to load the value when it is not cached.
+
+        Returns:
+            The cached or loaded value.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self._is_expired(entry):
+                self._entries.move_to_end(key)
+                self._statistics['hits'] += 1
+                return entry[1]
+            if entry is not None:
+                self._remove(key)
+                self._statistics['expirations'] += 1
+            self._statistics['misses'] += 1
+
+        # Load outside the lock so slow requests don't block other threads
+        value = loader()
+        self.set(key, value)
+        return value
+
+    def set(self, key: Tuple[Hashable, ...], value: Any) -> None:
+        """Store a value in the cache.
+
+        Args:
+            key: Key of the entry, starting with the product type and the ID of the model it belongs to.
+            value: Value to store.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (self._timer(), value)
+            self._keys_by_owner.setdefault(self._owner(key), set()).add(key)
+
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+                self._statistics['evictions'] += 1
+
+    def invalidate(self, product_type: str, model_id: str) -> None:
+        """Remove all entries that belong to a model.
+
+        Args:
+            product_type: Product type of the model, e.g. `MONITORING`.
+            model_id: ID of the model.
+        """
+        with self._lock:
+            for key in list(self._keys_by_owner.get((product_type, str(model_id)), ())):
+                self._remove(key)
+                self._statistics['invalidations'] += 1
+
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+        with self._lock:
+            self._statistics['invalidations'] += len(self._entries)
+            self._entries.clear()
+            self._keys_by_owner.clear()
+
+    def statistics(self) -> CacheStatistics:
+        """Get hit/miss statistics of the cache."""
+        with self._lock:
+            return {**self._statistics, 'size': len(self._entries)}
+
+    def _is_expired(self, entry: Tuple[float, Any]) -> bool:
+        return self.ttl is not None and self._timer() - entry[0] > self.ttl
+
+    def _remove(self, key: Tuple[Hashable, ...]) -> None:
+        del self._entries[key]
+        owner = self._owner(key)
+        keys = self._keys_by_owner[owner]
+        keys.discard(key)
+        if not keys:
+            del self._keys_by_owner[owner]
+
+    @staticmethod
+    def _owner(key: Tuple[Hashable, ...]) -> Tuple[str, str]:
+        return str(key[0]), str(key[1])
+
+
+metadata_cache = MetadataCache()
+"""Cache for model metadata shared by all product modules of the SDK."""
+
+inspection_cache = MetadataCache(maxsize=256, ttl=None)
+"""Cache for the columns inspected by the NannyML Cloud API, keyed by a fingerprint of the column layout."""
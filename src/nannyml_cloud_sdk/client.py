@@ -1,10 +1,14 @@
 import datetime
 import functools
-from typing import Any, Callable, Optional, TypeVar
-
-from graphql import GraphQLScalarType
-from gql import Client
-from gql.transport.exceptions import TransportQueryError, TransportServerError
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+import requests
+from graphql import DocumentNode, GraphQLScalarType
+from gql import Client, gql
+from gql.transport.exceptions import TransportError, TransportQueryError, TransportServerError
 from gql.transport.requests import RequestsHTTPTransport
 from gql.utilities import update_schema_scalars
 
@@ -18,21 +22,20 @@ _P = ParamSpec('_P')
 
 _active_client: Optional[Client] = None
 
+# Clients owned by worker threads created through `executor`
+_worker_state = threading.local()
+
 
 def get_client() -> Client:
     """Get the active GraphQL client or create a new one if none exists"""
     global _active_client
+    worker_client: Optional[Client] = getattr(_worker_state, 'client', None)
+    if worker_client is not None:
+        return worker_client
     if _active_client is not None:
         return _active_client
 
-    if not nannyml_cloud_sdk.url:
-        raise RuntimeError("nannyml_cloud_sdk.url is not set")
-
-    headers = {}
-    if nannyml_cloud_sdk.api_token:
-        headers['Authorization'] = f"ApiToken {nannyml_cloud_sdk.api_token}"
-
-    transport = RequestsHTTPTransport(url=f"{nannyml_cloud_sdk.url}/api/graphql", headers=headers)
+    transport = _create_transport()
     _active_client = Client(
         transport=transport, fetch_schema_from_transport=True, parse_results=True, serialize_variables=True
     )
@@ -45,6 +48,41 @@ def get_client() -> Client:
     return _active_client
 
 
+def _create_transport() -> RequestsHTTPTransport:
+    """Create a transport for the configured NannyML Cloud API"""
+    if not nannyml_cloud_sdk.url:
+        raise RuntimeError("nannyml_cloud_sdk.url is not set")
+
+    headers = {}
+    if nannyml_cloud_sdk.api_token:
+        headers['Authorization'] = f"ApiToken {nannyml_cloud_sdk.api_token}"
+
+    return RequestsHTTPTransport(url=f"{nannyml_cloud_sdk.url}/api/graphql", headers=headers)
+
+
+def _init_worker_client(client: Client) -> None:
+    """Give a worker thread a client of its own, reusing the schema already fetched by `client`"""
+    if not isinstance(client.transport, RequestsHTTPTransport):
+        # Clients that don't connect to the API (e.g. to validate queries) can be shared as is
+        _worker_state.client = client
+        return
+
+    _worker_state.client = Client(
+        transport=_create_transport(), schema=client.schema, parse_results=True, serialize_variables=True
+    )
+
+
+def executor(max_workers: int) -> ThreadPoolExecutor:
+    """Create a thread pool to send requests to the NannyML Cloud API concurrently.
+
+    A client can only handle one request at a time, so every worker thread gets its own client. The API schema is
+    fetched once by the active client and shared with the workers.
+    """
+    return ThreadPoolExecutor(
+        max_workers=max_workers, initializer=_init_worker_client, initargs=(get_client(),)
+    )
+
+
 def _translate_gql_errors(fn: Callable[Concatenate[Client, _P], _T]) -> Callable[_P, _T]:
     """Decorator to translate GraphQL errors into Python exceptions"""
     @functools.wraps(fn)
@@ -74,6 +112,87 @@ Raises:
     ApiError: If the GraphQL query fails.
 """
 
+# Errors that sending a request to the NannyML Cloud API can raise, e.g. to report failures per item of a bulk operation
+_REQUEST_ERRORS = (ApiError, LicenseError, TransportError, requests.RequestException)
+
+
+_VARIABLE_PATTERN = re.compile(r'\$(\w+)')
+
+
+@functools.lru_cache(maxsize=64)
+def _batched_document(
+    operation: str, selection: str, variable_types: Tuple[Tuple[str, str], ...], size: int, fragments: str = ''
+) -> DocumentNode:
+    """Build a document repeating `selection` `size` times, aliased as `_0`, `_1`, ...
+
+    Variables used in the selection are renamed for every alias, e.g. `$id` becomes `$id_0`, `$id_1`, ...
+    """
+    types = dict(variable_types)
+    definitions = ', '.join(f'${name}_{i}: {type_}' for i in range(size) for name, type_ in variable_types)
+    fields = '\n'.join(
+        f'_{i}: ' + _VARIABLE_PATTERN.sub(
+            lambda match: f'${match[1]}_{i}' if match[1] in types else match[0], selection
+        )
+        for i in range(size)
+    )
+    return gql(f'{operation} batch({definitions}) {{\n{fields}\n}}' + fragments)
+
+
+def execute_batched(
+    operation: str,
+    selection: str,
+    variable_types: Dict[str, str],
+    items: Sequence[Dict[str, Any]],
+    fragments: str = '',
+    batch_size: int = 50,
+    return_errors: bool = False,
+) -> List[Any]:
+    """Execute the same selection for many items, combining up to `batch_size` items into a single request.
+
+    Args:
+        operation: The type of operation, either `query` or `mutation`.
+        selection: A single root field, e.g. `monitoring_model(id: $id) { name }`.
+        variable_types: GraphQL types of the variables used in `selection`, e.g. `{'id': 'Int!'}`.
+        items: Variable values for every item.
+        fragments: Definitions of fragments used in `selection`.
+        batch_size: Maximum number of items per request.
+        return_errors: Whether to return an `ApiError` for items that failed instead of raising it. Other items in the
+            same request are not affected by the failure. This is required for mutations, since retrying a request
+            would repeat the mutations that did succeed.
+
+    Returns:
+        The result of the selection for every item, in the same order as `items`.
+
+    Raises:
+        ApiError: If the GraphQL query fails.
+    """
+    results: List[Any] = []
+    for start in range(0, len(items), batch_size):
+        batch = items[start:start + batch_size]
+        document = _batched_document(operation, selection, tuple(variable_types.items()), len(batch), fragments)
+        values = {f'{name}_{i}': value for i, item in enumerate(batch) for name, value in item.items()}
+        try:
+            data, errors = execute(document, values), {}
+        except ApiError as ex:
+            cause = ex.__cause__
+            if not return_errors or not isinstance(cause, TransportQueryError) or cause.data is None:
+                raise
+            data = cause.data
+            errors = {
+                error['path'][0]: ApiError(error['message']) for error in cause.errors or [] if error.get('path')
+            }
+
+        for i in range(len(batch)):
+            alias = f'_{i}'
+            if alias in errors:
+                results.append(errors[alias])
+            elif data.get(alias) is None and return_errors:
+                results.append(ApiError(f"No result returned for item {start + i}"))
+            else:
+                results.append(data[alias])
+
+    return results
+
 
 # Extension of the native GraphQL scalar types
 DateTimeScalar = GraphQLScalarType(
@@ -1,13 +1,21 @@
 import datetime
+import hashlib
 import io
-from typing import Any, Optional, Dict, List
+import itertools
+import json
+import os
+import warnings
+from typing import Any, Callable, Iterable, Iterator, Mapping, Optional, Dict, List, Sequence, Tuple, Union
 from typing_extensions import TypedDict
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from gql import gql
 
-from .client import execute
+from .client import _REQUEST_ERRORS, execute, execute_batched, executor
 from .enums import ColumnType, DataSourceEventType, S3AuthenticationMode
+from .errors import ApiError, InvalidOperationError
 
 
 class StorageInfoRaw(TypedDict):
@@ -131,6 +139,22 @@ class DataSourceEventFilter(TypedDict, total=False):
     event_type: DataSourceEventType
 
 
+_DATA_HISTORY_COLUMNS = ['dataSource', 'id', 'eventType', 'timestamp', 'nrRows']
+
+
+class DataIngestionResult(TypedDict):
+    """Outcome of adding data to a single model in a bulk operation.
+
+    Attributes:
+        modelId: ID of the model. ``None`` for rows without a model ID, which are never added.
+        nrRows: Number of rows that were added.
+        error: Description of the error if adding data failed, ``None`` if it succeeded.
+    """
+    modelId: Optional[str]
+    nrRows: int
+    error: Optional[str]
+
+
 COLUMN_DETAILS_FRAGMENT = f"""
     fragment ColumnDetails on Column {{
         {' '.join(ColumnDetails.__required_keys__)}
@@ -185,6 +209,12 @@ _UPSERT_DATA_IN_DATA_SOURCE = gql("""
     }
 """)
 
+_ADD_DATA_TO_DATA_SOURCE_SELECTION = """
+    add_data_to_data_source(input: $input) {
+        id
+    }
+"""
+
 _REMOVE_DATA_FROM_DATA_SOURCE = gql("""
     mutation removeDataFromDataSource($input: DataSourceDeleteInput!) {
         delete_data_from_data_source(input: $input) {
@@ -220,3 +250,288 @@ class Data:
             })['upload_dataset']
 
             return {'cache': upload}
+
+
+def _split_by_model(
+    data: Union[Mapping[str, pd.DataFrame], pd.DataFrame], model_id_column: Optional[str] = None
+) -> Dict[Optional[str], pd.DataFrame]:
+    """Split data for many models into a frame per model ID. Rows with a missing model ID are kept under ``None``"""
+    if not isinstance(data, pd.DataFrame):
+        return {str(model_id): df for model_id, df in data.items()}
+    if model_id_column is None:
+        raise ValueError("`model_id_column` must be provided when passing a single dataframe")
+
+    return {
+        None if pd.isna(model_id) else str(model_id): df.drop(columns=model_id_column)
+        for model_id, df in data.groupby(model_id_column, sort=False, observed=True, dropna=False)
+    }
+
+
+def _add_data_in_bulk(
+    data_source_ids: Mapping[str, Optional[str]],
+    frames: Mapping[Optional[str], pd.DataFrame],
+    max_workers: int,
+    batch_size: int,
+) -> List[DataIngestionResult]:
+    """Upload frames concurrently, then add them to their data sources using batched mutations.
+
+    Args:
+        data_source_ids: ID of the data source to add data to per model. ``None`` if the model has no such data source.
+        frames: Data to add per model. Rows without a model ID are kept under ``None`` and reported as failed.
+        max_workers: Maximum number of concurrent uploads.
+        batch_size: Maximum number of mutations per request.
+    """
+    results: Dict[Optional[str], DataIngestionResult] = {
+        model_id: {'modelId': model_id, 'nrRows': len(df), 'error': None} for model_id, df in frames.items()
+    }
+    for model_id in frames:
+        if model_id is None:
+            results[model_id]['error'] = "Rows without a model ID can't be added"
+        elif data_source_ids.get(model_id) is None:
+            results[model_id]['error'] = f"Model '{model_id}' has no data source to add data to"
+
+    pending = [model_id for model_id in frames if results[model_id]['error'] is None]
+    uploads: Dict[str, StorageInfo] = {}
+    with executor(max_workers) as pool:
+        futures = {model_id: pool.submit(Data.upload, frames[model_id]) for model_id in pending}
+        for model_id, future in futures.items():
+            try:
+                uploads[model_id] = future.result()
+            except _REQUEST_ERRORS + (pa.ArrowException, ValueError) as ex:
+                # Data that can't be converted to parquet only fails the upload of its own model
+                results[model_id]['error'] = f"Upload failed: {ex}"
+
+    uploaded = [model_id for model_id in pending if model_id in uploads]
+    outcomes = execute_batched(
+        'mutation', _ADD_DATA_TO_DATA_SOURCE_SELECTION, {'input': 'DataSourceDataInput!'},
+        [
+            {'input': {'id': int(str(data_source_ids[model_id])), 'storageInfo': uploads[model_id]}}
+            for model_id in uploaded
+        ],
+        batch_size=batch_size, return_errors=True,
+    )
+    for model_id, outcome in zip(uploaded, outcomes):
+        if isinstance(outcome, ApiError):
+            results[model_id]['error'] = str(outcome)
+
+    return [results[model_id] for model_id in frames]
+
+
+def _delete_data_in_chunks(
+    data_source_id: str,
+    data_ids: Union[pd.DataFrame, Iterable[Any], str, 'os.PathLike[str]'],
+    id_column: Optional[Callable[[], str]],
+    chunk_size: int,
+    progress: Optional[Callable[[int], None]],
+    checkpoint: Optional[Union[str, 'os.PathLike[str]']],
+) -> None:
+    """Delete data from a data source, streaming the identifiers in bounded chunks.
+
+    Duplicate identifiers are dropped within every chunk, and every chunk is sorted before it is uploaded. Only a
+    single chunk is held in memory, so identifiers repeated across chunks are sent again. Deleting them again has no
+    effect. When a checkpoint file is provided, the number of processed identifiers and a fingerprint of them are
+    stored in it after every chunk. Running the same deletion again reads the processed identifiers without uploading
+    them, checks that they match the fingerprint and continues after the last completed chunk. The checkpoint file is
+    removed once all chunks are deleted.
+
+    Args:
+        data_source_id: ID of the data source to delete data from.
+        data_ids: Identifiers of the rows to delete. Either a dataframe, a path to a parquet file or an iterable of
+            identifier values.
+        id_column: Function returning the name of the identifier column. Only used for parquet files and iterables
+            of identifier values.
+        chunk_size: Maximum number of identifiers per chunk.
+        progress: Optional callback that is called with the number of processed identifiers after every chunk.
+        checkpoint: Optional path to a file used to resume an interrupted deletion.
+
+    Raises:
+        InvalidOperationError: If the checkpoint belongs to another data source or to other identifiers.
+    """
+    nr_resumed, fingerprint = _read_deletion_checkpoint(checkpoint, data_source_id)
+    digest = hashlib.sha256()
+    nr_processed = 0
+    for chunk in _rechunk(_iter_data_id_frames(data_ids, id_column, chunk_size), chunk_size):
+        if nr_processed < nr_resumed:
+            processed = chunk.iloc[:nr_resumed - nr_processed]
+            chunk = chunk.iloc[len(processed):]
+            digest.update(pd.util.hash_pandas_object(processed, index=False).to_numpy().tobytes())
+            nr_processed += len(processed)
+            if nr_processed == nr_resumed:
+                _check_deletion_fingerprint(checkpoint, digest, fingerprint)
+            if not len(chunk):
+                continue
+
+        if len(chunk):
+            data = chunk.drop_duplicates().sort_values(list(chunk.columns), ignore_index=True)
+            execute(_REMOVE_DATA_FROM_DATA_SOURCE, {
+                'input': {
+                    'id': int(data_source_id),
+                    'dataIds': Data.upload(data),
+                },
+            })
+        digest.update(pd.util.hash_pandas_object(chunk, index=False).to_numpy().tobytes())
+        nr_processed += len(chunk)
+        if checkpoint is not None:
+            _write_deletion_checkpoint(checkpoint, data_source_id, nr_processed, digest.hexdigest())
+        if progress is not None:
+            progress(nr_processed)
+
+    if nr_processed < nr_resumed:
+        raise InvalidOperationError(
+            f"Checkpoint '{checkpoint}' belongs to a deletion of {nr_resumed} or more identifiers, but only "
+            f"{nr_processed} were provided"
+        )
+    if checkpoint is not None and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+
+def _iter_data_id_frames(
+    data_ids: Union[pd.DataFrame, Iterable[Any], str, 'os.PathLike[str]'],
+    id_column: Optional[Callable[[], str]],
+    batch_size: int,
+) -> Iterator[pd.DataFrame]:
+    """Read identifiers as a stream of dataframes"""
+    if isinstance(data_ids, pd.DataFrame):
+        yield data_ids
+    elif isinstance(data_ids, (str, os.PathLike)):
+        parquet_file = pq.ParquetFile(data_ids)
+        columns = parquet_file.schema_arrow.names
+        name = id_column() if id_column is not None else columns[0]
+        if name in columns:
+            columns = [name]
+        elif len(columns) > 1:
+            raise ValueError(f"Parquet file '{data_ids}' has no identifier column '{name}'")
+
+        for batch in parquet_file.iter_batches(batch_size, columns=columns):
+            yield batch.to_pandas().set_axis([name], axis=1)
+    else:
+        if id_column is None:
+            raise ValueError("`id_column` must be provided when deleting identifier values")
+        name = id_column()
+        ids = iter(data_ids)
+        while True:
+            batch = list(itertools.islice(ids, batch_size))
+            if not batch:
+                return
+            yield pd.DataFrame({name: batch})
+
+
+def _rechunk(frames: Iterable[pd.DataFrame], chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Combine and split a stream of dataframes into chunks of exactly `chunk_size` rows (except the last one)"""
+    buffer: List[pd.DataFrame] = []
+    buffered = 0
+    for frame in frames:
+        while len(frame):
+            part = frame.iloc[:chunk_size - buffered]
+            frame = frame.iloc[len(part):]
+            buffer.append(part)
+            buffered += len(part)
+            if buffered == chunk_size:
+                yield pd.concat(buffer, ignore_index=True)
+                buffer, buffered = [], 0
+
+    if buffer:
+        yield pd.concat(buffer, ignore_index=True)
+
+
+def _read_deletion_checkpoint(
+    checkpoint: Optional[Union[str, 'os.PathLike[str]']], data_source_id: str
+) -> Tuple[int, Optional[str]]:
+    """Get the number and fingerprint of the identifiers processed by an earlier run of the same deletion"""
+    if checkpoint is None or not os.path.exists(checkpoint):
+        return 0, None
+    with open(checkpoint) as f:
+        state = json.load(f)
+    if state['dataSourceId'] != str(data_source_id):
+        raise InvalidOperationError(
+            f"Checkpoint '{checkpoint}' belongs to a deletion from data source '{state['dataSourceId']}'"
+        )
+    return state['nrProcessed'], state.get('fingerprint')
+
+
+def _check_deletion_fingerprint(
+    checkpoint: Optional[Union[str, 'os.PathLike[str]']], digest: 'hashlib._Hash', fingerprint: Optional[str]
+) -> None:
+    """Refuse to resume a deletion with other identifiers than the ones processed before"""
+    if digest.hexdigest() != fingerprint:
+        raise InvalidOperationError(
+            f"Checkpoint '{checkpoint}' belongs to a deletion of other identifiers. Remove the checkpoint file to "
+            "start a new deletion."
+        )
+
+
+def _write_deletion_checkpoint(
+    checkpoint: Union[str, 'os.PathLike[str]'], data_source_id: str, nr_processed: int, fingerprint: str
+) -> None:
+    # Write to a temporary file first, so an interruption never leaves a partial checkpoint behind
+    tmp_path = f'{os.fspath(checkpoint)}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'dataSourceId': str(data_source_id), 'nrProcessed': nr_processed, 'fingerprint': fingerprint}, f)
+    os.replace(tmp_path, checkpoint)
+
+
+def _head_to_frame(head: Any, columns: Sequence[ColumnDetails]) -> pd.DataFrame:
+    """Convert the JSON returned by `DataSource.head` into a dataframe with the data types of the data source"""
+    if isinstance(head, str):
+        head = json.loads(head)
+    df = pd.DataFrame(head)
+    for column in columns:
+        if column['name'] in df.columns:
+            df[column['name']] = _as_data_type(df[column['name']], column['dataType'])
+
+    return df
+
+
+def _as_data_type(series: pd.Series, data_type: str) -> pd.Series:
+    """Convert a series to a data type, keeping the original series with a warning if it can't be converted"""
+    try:
+        if 'datetime' in data_type:
+            series = pd.to_datetime(series)
+        return series.astype(data_type)
+    except (TypeError, ValueError) as ex:
+        warnings.warn(f"Column '{series.name}' can't be converted to '{data_type}', keeping its values as is: {ex}")
+        return series
+
+
+def _events_filter(
+    event_type: Optional[DataSourceEventType], caused_by_user_id: Optional[str]
+) -> Optional[Dict[str, Any]]:
+    """Build a `DataSourceEventsFilter` input, or ``None`` if no filter is required"""
+    if event_type is None and caused_by_user_id is None:
+        return None
+    return {'eventType': event_type, 'causedByUserId': caused_by_user_id}
+
+
+def _filter_events_by_time(
+    events: List[DataSourceEvent], start: Optional[datetime.datetime], end: Optional[datetime.datetime]
+) -> List[DataSourceEvent]:
+    """Keep events with `start <= timestamp < end`. Naive datetimes are assumed to be in UTC.
+
+    The API doesn't support filtering events by time, so the time window is applied locally.
+    """
+    if start is None and end is None:
+        return events
+
+    start_utc = _to_utc(start) if start is not None else None
+    end_utc = _to_utc(end) if end is not None else None
+    return [
+        event for event in events
+        if (start_utc is None or _to_utc(event['timestamp']) >= start_utc)
+        and (end_utc is None or _to_utc(event['timestamp']) < end_utc)
+    ]
+
+
+def _to_utc(value: Union[datetime.datetime, str]) -> pd.Timestamp:
+    timestamp = pd.Timestamp(value)
+    return timestamp.tz_localize('UTC') if timestamp.tzinfo is None else timestamp.tz_convert('UTC')
+
+
+def _history_to_frame(events_by_data_source: Mapping[str, List[DataSourceEvent]]) -> pd.DataFrame:
+    """Combine the events of several data sources into a single dataframe sorted by timestamp"""
+    df = pd.DataFrame(
+        [{'dataSource': name, **event} for name, events in events_by_data_source.items() for event in events],
+        columns=_DATA_HISTORY_COLUMNS,
+    )
+    df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
+    df['nrRows'] = df['nrRows'].astype('Int64')
+    return df.sort_values('timestamp', kind='stable', ignore_index=True)
@@ -81,8 +81,50 @@ RunState = Literal['SCHEDULED', 'RUNNING', 'CANCELLING', 'COMPLETED']
 - `COMPLETED`: The run has completed (successfully or unsuccessfully).
 """
 
+RunEventType = Literal[
+    'SCHEDULED',
+    'STARTED',
+    'COMPLETED',
+    'CANCELLED',
+    'PROGRESS',
+    'WARNING',
+    'ERROR',
+    'TIMEOUT',
+    'INFRASTRUCTURE_INFO',
+    'INFRASTRUCTURE_WARNING',
+    'INFRASTRUCTURE_ERROR',
+]
+"""Events recorded while a NannyML run is scheduled or active."""
+
 DataSourceEventType = Literal['CREATED', 'DATA_ADDED', 'DATA_REMOVED', 'DATA_UPDATED']
 """Events recorded for model data sources."""
 
 ThresholdType = Literal['CONSTANT', 'STANDARD_DEVIATION']
 """Threshold types supported by NannyML Cloud."""
+
+SchemaInference = Literal['SERVER', 'LOCAL']
+"""Ways to identify what the columns of a dataset represent.
+
+- `SERVER`: A sample of the data is uploaded and inspected by NannyML Cloud.
+- `LOCAL`: Column names, data types and value statistics are inspected locally, without any requests.
+"""
+
+SamplingStrategy = Literal['HEAD', 'RANDOM', 'STRATIFIED', 'NULL_AWARE']
+"""Ways to select the rows of a dataset that are inspected to create a schema.
+
+- `HEAD`: The first rows.
+- `RANDOM`: Rows drawn uniformly at random from the whole dataset.
+- `STRATIFIED`: Rows spread evenly over the range of the timestamp column, so every period is represented.
+- `NULL_AWARE`: The first rows, extended with a row containing a value for every column that only has missing values
+  in those rows.
+"""
+
+SchemaChangeType = Literal['ADDED', 'REMOVED', 'COLUMN_TYPE_CHANGED', 'DATA_TYPE_CHANGED', 'CLASS_NAME_CHANGED']
+"""Ways a column can differ between two schemas.
+
+- `ADDED`: The column only exists in the new schema.
+- `REMOVED`: The column only exists in the old schema.
+- `COLUMN_TYPE_CHANGED`: The column represents something else, e.g. a feature became ignored.
+- `DATA_TYPE_CHANGED`: The data type of the column changed.
+- `CLASS_NAME_CHANGED`: The class of a multiclass prediction score column changed.
+"""
@@ -12,3 +12,11 @@ class LicenseError(SdkError):
 
 class InvalidOperationError(SdkError):
     """Raised when attempting an invalid operation"""
+
+
+class RunTimeoutError(SdkError):
+    """Raised when a run doesn't complete within the given timeout"""
+
+
+class SchemaValidationError(SdkError):
+    """Raised when data doesn't match the columns of the data source it is added to"""
@@ -1,17 +1,20 @@
 import datetime
-import functools
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Sequence
 
 import pandas as pd
 from gql import gql
 
 from nannyml_cloud_sdk._typing import TypedDict
-from nannyml_cloud_sdk.client import execute
-from nannyml_cloud_sdk.data import DATA_SOURCE_SUMMARY_FRAGMENT, DATA_SOURCE_EVENT_FRAGMENT, Data, DataSourceSummary, \
-    DataSourceEvent, _UPSERT_DATA_IN_DATA_SOURCE, _ADD_DATA_TO_DATA_SOURCE
+from nannyml_cloud_sdk.cache import metadata_cache
+from nannyml_cloud_sdk.client import execute, execute_batched
+from nannyml_cloud_sdk.data import DATA_SOURCE_SUMMARY_FRAGMENT, DATA_SOURCE_EVENT_FRAGMENT, \
+    DATA_SOURCE_DETAILS_FRAGMENT, Data, DataSourceSummary, DataSourceDetails, DataSourceEvent, \
+    _UPSERT_DATA_IN_DATA_SOURCE, _ADD_DATA_TO_DATA_SOURCE, _events_filter, _filter_events_by_time
+from nannyml_cloud_sdk.enums import DataSourceEventType
 from nannyml_cloud_sdk.experiment.enums import ExperimentType
 from nannyml_cloud_sdk.experiment.run import RunSummary, RUN_SUMMARY_FRAGMENT
 from nannyml_cloud_sdk.experiment.schema import ExperimentSchema
+from nannyml_cloud_sdk.schema import _validate_data
 
 
 class ExperimentSummary(TypedDict):
@@ -80,11 +83,30 @@ _GET_EXPERIMENT_DATA_SOURCES = gql("""
     }
 """ + DATA_SOURCE_SUMMARY_FRAGMENT)
 
+_GET_EXPERIMENT_DATA_SOURCE_DETAILS = gql("""
+    query getExperimentDataSourceDetails($experimentId: Int!) {
+        experiment(id: $experimentId) {
+            dataSource {
+                ...DataSourceDetails
+            }
+        }
+    }
+""" + DATA_SOURCE_DETAILS_FRAGMENT)
+
+_PREFETCH_EXPERIMENT_DATA_SOURCES_SELECTION = """
+    experiment(id: $experimentId) {
+        id
+        dataSource {
+            ...DataSourceSummary
+        }
+    }
+"""
+
 _GET_EXPERIMENT_DATA_HISTORY = gql("""
-    query getModelDataHistory($experimentId: Int!) {
+    query getModelDataHistory($experimentId: Int!, $eventsFilter: DataSourceEventsFilter) {
         experiment(id: $experimentId) {
             dataSource{
-                events {
+                events(filter: $eventsFilter) {
                     ...DataSourceEvent
                 }
                 ...DataSourceSummary
@@ -193,7 +215,7 @@ class Experiment:
             'storageInfo': Data.upload(experiment_data),
         }
 
-        return execute(_CREATE_EXPERIMENT, {
+        experiment = execute(_CREATE_EXPERIMENT, {
             'input': {
                 'name': name,
                 'experimentType': experiment_type,
@@ -210,6 +232,8 @@ class Experiment:
                 }
             },
         })['create_experiment']
+        metadata_cache.invalidate('EXPERIMENT', experiment['id'])
+        return experiment
 
     @classmethod
     def delete(cls, experiment_id: str) -> None:
@@ -219,20 +243,29 @@ class Experiment:
             experiment_id: ID of the experiment to delete.
         """
         execute(_DELETE_EXPERIMENT, {'id': int(experiment_id)})
+        metadata_cache.invalidate('EXPERIMENT', experiment_id)
 
     @classmethod
-    def add_experiment_data(cls, experiment_id: str, data: pd.DataFrame) -> None:
+    def add_experiment_data(cls, experiment_id: str, data: pd.DataFrame, validate: bool = False) -> None:
         """Add evaluation data to an experiment.
 
         Args:
             experiment_id: ID of the experiment.
             data: Data to be added.
+            validate: Check that the data matches the columns of the experiment data source before uploading it. This
+                catches mismatching columns, data types and missing identifiers before paying for the upload, instead
+                of failing in the next run.
+
+        Raises:
+            SchemaValidationError: If `validate` is set and the data doesn't match the experiment data source.
 
         Note:
             This method does not update existing data. It only adds new data. If you want to update existing data,
             use [upsert_data][nannyml_cloud_sdk.experiment.Experiment.upsert_experiment_data] instead.
         """
         data_source = cls._get_experiment_data_source(experiment_id)
+        if validate:
+            _validate_data(data, cls._get_experiment_data_source_details(experiment_id)['columns'], 'experiment')
         execute(_ADD_DATA_TO_DATA_SOURCE, {
             'input': {
                 'id': int(data_source['id']),
@@ -263,23 +296,68 @@ class Experiment:
         })
 
     @classmethod
-    def get_data_history(cls, experiment_id: str) -> List[DataSourceEvent]:
+    def get_data_history(
+        cls,
+        experiment_id: str,
+        event_type: Optional[DataSourceEventType] = None,
+        caused_by_user_id: Optional[str] = None,
+        start: Optional[datetime.datetime] = None,
+        end: Optional[datetime.datetime] = None,
+    ) -> List[DataSourceEvent]:
         """Get the data history for an experiment.
 
         Args:
             experiment_id: ID of the experiment.
+            event_type: Only include events of this type. Filtered by NannyML Cloud.
+            caused_by_user_id: Only include events caused by this user. Filtered by NannyML Cloud.
+            start: Only include events at or after this time.
+            end: Only include events before this time.
 
         Returns:
-            List of events related to reference data for the experiment.
+            List of events related to data for the experiment.
         """
-        return execute(_GET_EXPERIMENT_DATA_HISTORY, {
+        events = execute(_GET_EXPERIMENT_DATA_HISTORY, {
             'experimentId': int(experiment_id),
-        })['evaluation_model']['referenceDataSource']['events']
+            'eventsFilter': _events_filter(event_type, caused_by_user_id),
+        })['experiment']['dataSource']['events']
+        return _filter_events_by_time(events, start, end)
+
+    @classmethod
+    def prefetch_data_sources(cls, experiment_ids: Sequence[str]) -> Dict[str, DataSourceSummary]:
+        """Load data sources of many experiments into the metadata cache using batched requests.
+
+        Methods that add data look up the data source of an experiment first. Prefetching avoids a separate request per
+        experiment when working with many experiments.
+
+        Args:
+            experiment_ids: IDs of the experiments.
+
+        Returns:
+            Data source per experiment ID. Experiments that don't exist are not included.
+        """
+        experiments = execute_batched(
+            'query', _PREFETCH_EXPERIMENT_DATA_SOURCES_SELECTION, {'experimentId': 'Int!'},
+            [{'experimentId': int(experiment_id)} for experiment_id in experiment_ids], DATA_SOURCE_SUMMARY_FRAGMENT,
+        )
+        data_sources = {str(experiment['id']): experiment['dataSource'] for experiment in filter(None, experiments)}
+        for experiment_id, data_source in data_sources.items():
+            metadata_cache.set(('EXPERIMENT', experiment_id), data_source)
+
+        return data_sources
 
     @staticmethod
-    @functools.lru_cache(maxsize=128)
     def _get_experiment_data_source(experimentId: str) -> DataSourceSummary:
         """Get data sources for a model"""
-        return execute(_GET_EXPERIMENT_DATA_SOURCES, {
+        return metadata_cache.get(('EXPERIMENT', str(experimentId)), lambda: execute(_GET_EXPERIMENT_DATA_SOURCES, {
             'experimentId': int(experimentId),
-        })['experiment']['dataSource']
+        })['experiment']['dataSource'])
+
+    @staticmethod
+    def _get_experiment_data_source_details(experiment_id: str) -> DataSourceDetails:
+        """Get the details, including columns, of the data source of an experiment"""
+        return metadata_cache.get(
+            ('EXPERIMENT', str(experiment_id), 'details'),
+            lambda: execute(_GET_EXPERIMENT_DATA_SOURCE_DETAILS, {
+                'experimentId': int(experiment_id),
+            })['experiment']['dataSource'],
+        )
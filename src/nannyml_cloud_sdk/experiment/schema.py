@@ -1,11 +1,15 @@
+import os
 from typing import Optional, Union, Collection
 
 import pandas as pd
+import pyarrow as pa
 
-from ..client import execute
-from ..data import ColumnDetails, Data
-from ..enums import ColumnType
-from ..schema import INSPECT_SCHEMA, normalize, BaseSchema, _override_column_in_schema
+from ..data import ColumnDetails
+from ..enums import ColumnType, SamplingStrategy, SchemaInference
+from ..schema import (
+    normalize, BaseSchema, _infer_columns, _inspect_columns, _inspect_parquet, _profile_arrow_schema, _sample_rows,
+    _override_column_in_schema,
+)
 
 
 class ExperimentSchema(BaseSchema):
@@ -28,10 +32,12 @@ class Schema:
         fail_count_column_name: Optional[str] = None,
         identifier_column_name: Optional[str] = None,
         ignore_column_names: Union[str, Collection[str]] = (),
+        inference: SchemaInference = 'SERVER',
+        sampling: SamplingStrategy = 'HEAD',
     ) -> ExperimentSchema:
         """Create a schema from a pandas dataframe.
 
-        Sends a sample of the dataframe to the NannyML Cloud API to inspect the schema. Heuristics are used to identify
+        Inspects a sample of the dataframe, by default using the NannyML Cloud API. Heuristics are used to identify
         what each column represents. The schema is then modified according to the provided arguments.
 
         Args:
@@ -43,21 +49,117 @@ class Schema:
             identifier_column_name: The name of the identifier column. Any column that heuristics identified as
                 identifier will be changed to a feature column.
             ignore_column_names: The names of columns to ignore.
+            inference: Whether columns are inspected by the NannyML Cloud API (`SERVER`) or by local heuristics based
+                on column names, data types and value statistics (`LOCAL`).
+            sampling: How the `INSPECT_DATA_FRAME_NR_ROWS` inspected rows are selected, see
+                [SamplingStrategy][nannyml_cloud_sdk.enums.SamplingStrategy]. Use another strategy than `HEAD` if the
+                first rows are not representative, e.g. because the data is sorted by time.
+
+        Returns:
+            The inspected schema with any modifications applied.
+
+        Note:
+            Columns inspected by the API are cached by column names and data types, so dataframes with the same layout
+            are only inspected once. Call `nannyml_cloud_sdk.cache.inspection_cache.clear()` to inspect them again.
+        """
+        sample = _sample_rows(df, cls.INSPECT_DATA_FRAME_NR_ROWS, sampling, None)
+        schema: ExperimentSchema = {
+            'columns': _inspect_columns(sample, 'EXPERIMENT', None, inference, cls.CATEGORICAL_DTYPES),
+        }
+
+        return cls._apply_overrides(
+            schema, metric_column_name, group_column_name, success_count_column_name, fail_count_column_name,
+            identifier_column_name, ignore_column_names,
+        )
+
+    @classmethod
+    def from_parquet(
+        cls,
+        path: Union[str, 'os.PathLike[str]'],
+        metric_column_name: Optional[str] = None,
+        group_column_name: Optional[str] = None,
+        success_count_column_name: Optional[str] = None,
+        fail_count_column_name: Optional[str] = None,
+        identifier_column_name: Optional[str] = None,
+        ignore_column_names: Union[str, Collection[str]] = (),
+        inference: SchemaInference = 'LOCAL',
+    ) -> ExperimentSchema:
+        """Create a schema from a parquet file without loading its data.
+
+        Data types are read from the metadata in the file footer, together with column statistics such as null
+        counts. Values are only read for the first `INSPECT_DATA_FRAME_NR_ROWS` rows of columns that could be
+        identifiers, or of all columns when using server inference.
+
+        Args:
+            path: Path of the parquet file.
+            metric_column_name: The name of the column containing the metric names.
+            group_column_name: The name of the column containing the group names for each group.
+            success_count_column_name: The name of the column containing the success count for a metric and group.
+            fail_count_column_name: The name of the column containing the fail count for a metric and group.
+            identifier_column_name: The name of the identifier column.
+            ignore_column_names: The names of columns to ignore.
+            inference: Whether columns are inspected by local heuristics (`LOCAL`) or by the NannyML Cloud API
+                (`SERVER`).
 
         Returns:
             The inspected schema with any modifications applied.
         """
-        # Upload head of dataset than use API to inspect schema
-        upload = Data.upload(df.head(cls.INSPECT_DATA_FRAME_NR_ROWS))
-        schema = execute(INSPECT_SCHEMA, variable_values={
-            "input": {
-                "productType": 'EXPERIMENT',
-                "storageInfo": upload,
-            },
-        })['inspect_dataset']
+        schema: ExperimentSchema = {
+            'columns': _inspect_parquet(
+                path, 'EXPERIMENT', None, inference, cls.CATEGORICAL_DTYPES, cls.INSPECT_DATA_FRAME_NR_ROWS
+            ),
+        }
+        return cls._apply_overrides(
+            schema, metric_column_name, group_column_name, success_count_column_name, fail_count_column_name,
+            identifier_column_name, ignore_column_names,
+        )
 
-        # Apply overrides
+    @classmethod
+    def from_arrow_schema(
+        cls,
+        arrow_schema: pa.Schema,
+        metric_column_name: Optional[str] = None,
+        group_column_name: Optional[str] = None,
+        success_count_column_name: Optional[str] = None,
+        fail_count_column_name: Optional[str] = None,
+        identifier_column_name: Optional[str] = None,
+        ignore_column_names: Union[str, Collection[str]] = (),
+    ) -> ExperimentSchema:
+        """Create a schema from an arrow schema, e.g. of a dataset that is too large to load.
+
+        Columns are inspected locally using their names and data types only.
+
+        Args:
+            arrow_schema: The arrow schema of the data.
+            metric_column_name: The name of the column containing the metric names.
+            group_column_name: The name of the column containing the group names for each group.
+            success_count_column_name: The name of the column containing the success count for a metric and group.
+            fail_count_column_name: The name of the column containing the fail count for a metric and group.
+            identifier_column_name: The name of the identifier column.
+            ignore_column_names: The names of columns to ignore.
+
+        Returns:
+            The inspected schema with any modifications applied.
+        """
+        schema: ExperimentSchema = {
+            'columns': _infer_columns(_profile_arrow_schema(arrow_schema), 'EXPERIMENT', None, cls.CATEGORICAL_DTYPES),
+        }
+        return cls._apply_overrides(
+            schema, metric_column_name, group_column_name, success_count_column_name, fail_count_column_name,
+            identifier_column_name, ignore_column_names,
+        )
 
+    @classmethod
+    def _apply_overrides(
+        cls,
+        schema: ExperimentSchema,
+        metric_column_name: Optional[str],
+        group_column_name: Optional[str],
+        success_count_column_name: Optional[str],
+        fail_count_column_name: Optional[str],
+        identifier_column_name: Optional[str],
+        ignore_column_names: Union[str, Collection[str]],
+    ) -> ExperimentSchema:
         if metric_column_name is not None:
             schema = cls.set_metric_name(schema, metric_column_name)
         if group_column_name is not None:
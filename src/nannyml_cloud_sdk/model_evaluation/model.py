@@ -1,21 +1,22 @@
 import datetime
-import functools
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Sequence
 
 import pandas as pd
 from frozendict import frozendict
 from gql import gql
 
 from nannyml_cloud_sdk._typing import TypedDict
-from nannyml_cloud_sdk.client import execute
-from nannyml_cloud_sdk.data import DATA_SOURCE_SUMMARY_FRAGMENT, DATA_SOURCE_EVENT_FRAGMENT, Data, DataSourceSummary, \
-    DataSourceFilter, DataSourceEvent, _UPSERT_DATA_IN_DATA_SOURCE, _ADD_DATA_TO_DATA_SOURCE
-from nannyml_cloud_sdk.enums import ProblemType, PerformanceMetric
+from nannyml_cloud_sdk.cache import metadata_cache
+from nannyml_cloud_sdk.client import execute, execute_batched
+from nannyml_cloud_sdk.data import DATA_SOURCE_SUMMARY_FRAGMENT, DATA_SOURCE_EVENT_FRAGMENT, \
+    DATA_SOURCE_DETAILS_FRAGMENT, Data, DataSourceSummary, DataSourceDetails, DataSourceFilter, DataSourceEvent, \
+    _UPSERT_DATA_IN_DATA_SOURCE, _ADD_DATA_TO_DATA_SOURCE, _events_filter, _filter_events_by_time, _history_to_frame
+from nannyml_cloud_sdk.enums import DataSourceEventType, ProblemType, PerformanceMetric
 from nannyml_cloud_sdk.errors import InvalidOperationError
 from nannyml_cloud_sdk.model_evaluation.enums import HypothesisType
 from nannyml_cloud_sdk.model_evaluation.run import RunSummary, RUN_SUMMARY_FRAGMENT
 from nannyml_cloud_sdk.model_evaluation.schema import ModelSchema
-from nannyml_cloud_sdk.schema import normalize
+from nannyml_cloud_sdk.schema import _project_columns, _validate_data
 
 
 class ModelSummary(TypedDict):
@@ -88,11 +89,33 @@ _GET_MODEL_DATA_SOURCES = gql("""
     }
 """ + DATA_SOURCE_SUMMARY_FRAGMENT)
 
+_GET_MODEL_EVALUATION_DATA_SOURCE_DETAILS = gql("""
+    query getModelEvaluationDataSourceDetails($modelId: Int!) {
+        evaluation_model(id: $modelId) {
+            evaluationDataSource {
+                ...DataSourceDetails
+            }
+        }
+    }
+""" + DATA_SOURCE_DETAILS_FRAGMENT)
+
+_PREFETCH_MODEL_DATA_SOURCES_SELECTION = """
+    evaluation_model(id: $modelId) {
+        id
+        referenceDataSource {
+            ...DataSourceSummary
+        }
+        evaluationDataSource {
+            ...DataSourceSummary
+        }
+    }
+"""
+
 _GET_MODEL_REFERENCE_DATA_HISTORY = gql("""
-    query getModelDataHistory($modelId: Int!) {
+    query getModelDataHistory($modelId: Int!, $eventsFilter: DataSourceEventsFilter) {
         evaluation_model(id: $modelId) {
             referenceDataSource{
-                events {
+                events(filter: $eventsFilter) {
                     ...DataSourceEvent
                 }
                 ...DataSourceSummary
@@ -102,10 +125,10 @@ _GET_MODEL_REFERENCE_DATA_HISTORY = gql("""
 """ + DATA_SOURCE_SUMMARY_FRAGMENT + DATA_SOURCE_EVENT_FRAGMENT)
 
 _GET_MODEL_EVALUATION_DATA_HISTORY = gql("""
-    query getModelDataHistory($modelId: Int!) {
+    query getModelDataHistory($modelId: Int!, $eventsFilter: DataSourceEventsFilter) {
         evaluation_model(id: $modelId) {
             evaluationDataSource{
-                events {
+                events(filter: $eventsFilter) {
                     ...DataSourceEvent
                 }
                 ...DataSourceSummary
@@ -114,6 +137,23 @@ _GET_MODEL_EVALUATION_DATA_HISTORY = gql("""
     }
 """ + DATA_SOURCE_SUMMARY_FRAGMENT + DATA_SOURCE_EVENT_FRAGMENT)
 
+_GET_MODEL_DATA_HISTORY = gql("""
+    query getModelDataHistory($modelId: Int!, $eventsFilter: DataSourceEventsFilter) {
+        evaluation_model(id: $modelId) {
+            referenceDataSource {
+                events(filter: $eventsFilter) {
+                    ...DataSourceEvent
+                }
+            }
+            evaluationDataSource {
+                events(filter: $eventsFilter) {
+                    ...DataSourceEvent
+                }
+            }
+        }
+    }
+""" + DATA_SOURCE_EVENT_FRAGMENT)
+
 _CREATE_MODEL = gql("""
     mutation createModel($input: CreateEvaluationModelInput!) {
         create_evaluation_model(input: $input) {
@@ -226,14 +266,11 @@ class Model:
             'name': 'evaluation',
             'hasReferenceData': False,
             'hasAnalysisData': True,
-            'columns': [
-                column for column in schema['columns']
-                if column['name'] in map(normalize, evaluation_data.columns)
-            ],
+            'columns': _project_columns(schema['columns'], evaluation_data.columns),
             'storageInfo': Data.upload(evaluation_data),
         } if evaluation_data is not None else None
 
-        return execute(_CREATE_MODEL, {
+        model = execute(_CREATE_MODEL, {
             'input': {
                 'name': name,
                 'problemType': schema['problemType'],
@@ -251,6 +288,8 @@ class Model:
                 } for metric, config in metrics_configuration.items()]
             },
         })['create_evaluation_model']
+        metadata_cache.invalidate('EVALUATION', model['id'])
+        return model
 
     @classmethod
     def delete(cls, model_id: str) -> None:
@@ -260,20 +299,29 @@ class Model:
             model_id: ID of the model to delete.
         """
         execute(_DELETE_MODEL, {'id': int(model_id)})
+        metadata_cache.invalidate('EVALUATION', model_id)
 
     @classmethod
-    def add_evaluation_data(cls, model_id: str, data: pd.DataFrame) -> None:
+    def add_evaluation_data(cls, model_id: str, data: pd.DataFrame, validate: bool = False) -> None:
         """Add evaluation data to a model.
 
         Args:
             model_id: ID of the model.
             data: Data to be added.
+            validate: Check that the data matches the columns of the evaluation data source before uploading it. This
+                catches mismatching columns, data types and missing identifiers before paying for the upload, instead
+                of failing in the next run.
+
+        Raises:
+            SchemaValidationError: If `validate` is set and the data doesn't match the evaluation data source.
 
         Note:
             This method does not update existing data. It only adds new data. If you want to update existing data,
             use [upsert_evaluation_data][nannyml_cloud_sdk.model_evaluation.Model.upsert_evaluation_data] instead.
         """
         evaluation_data_source = cls._get_evaluation_data_source(model_id)
+        if validate:
+            _validate_data(data, cls._get_evaluation_data_source_details(model_id)['columns'], 'evaluation')
         execute(_ADD_DATA_TO_DATA_SOURCE, {
             'input': {
                 'id': int(evaluation_data_source['id']),
@@ -304,43 +352,123 @@ class Model:
         })
 
     @classmethod
-    def get_reference_data_history(cls, model_id: str) -> List[DataSourceEvent]:
+    def get_reference_data_history(
+        cls,
+        model_id: str,
+        event_type: Optional[DataSourceEventType] = None,
+        caused_by_user_id: Optional[str] = None,
+        start: Optional[datetime.datetime] = None,
+        end: Optional[datetime.datetime] = None,
+    ) -> List[DataSourceEvent]:
         """Get reference data history for a model.
 
         Args:
             model_id: ID of the model.
+            event_type: Only include events of this type. Filtered by NannyML Cloud.
+            caused_by_user_id: Only include events caused by this user. Filtered by NannyML Cloud.
+            start: Only include events at or after this time.
+            end: Only include events before this time.
 
         Returns:
             List of events related to reference data for the model.
         """
-        return execute(_GET_MODEL_REFERENCE_DATA_HISTORY, {
+        events = execute(_GET_MODEL_REFERENCE_DATA_HISTORY, {
             'modelId': int(model_id),
+            'eventsFilter': _events_filter(event_type, caused_by_user_id),
         })['evaluation_model']['referenceDataSource']['events']
+        return _filter_events_by_time(events, start, end)
 
     @classmethod
-    def get_evaluation_data_history(cls, model_id: str) -> List[DataSourceEvent]:
+    def get_evaluation_data_history(
+        cls,
+        model_id: str,
+        event_type: Optional[DataSourceEventType] = None,
+        caused_by_user_id: Optional[str] = None,
+        start: Optional[datetime.datetime] = None,
+        end: Optional[datetime.datetime] = None,
+    ) -> List[DataSourceEvent]:
         """Get evaluation data history for a model.
 
         Args:
             model_id: ID of the model.
+            event_type: Only include events of this type. Filtered by NannyML Cloud.
+            caused_by_user_id: Only include events caused by this user. Filtered by NannyML Cloud.
+            start: Only include events at or after this time.
+            end: Only include events before this time.
 
         Returns:
             List of events related to analysis data for the model.
         """
-        return execute(_GET_MODEL_EVALUATION_DATA_HISTORY, {
+        events = execute(_GET_MODEL_EVALUATION_DATA_HISTORY, {
             'modelId': int(model_id),
+            'eventsFilter': _events_filter(event_type, caused_by_user_id),
         })['evaluation_model']['evaluationDataSource']['events']
+        return _filter_events_by_time(events, start, end)
+
+    @classmethod
+    def get_combined_data_history(
+        cls,
+        model_id: str,
+        event_type: Optional[DataSourceEventType] = None,
+        caused_by_user_id: Optional[str] = None,
+        start: Optional[datetime.datetime] = None,
+        end: Optional[datetime.datetime] = None,
+    ) -> pd.DataFrame:
+        """Get the history of both reference and evaluation data of a model in a single request.
+
+        Args:
+            model_id: ID of the model.
+            event_type: Only include events of this type. Filtered by NannyML Cloud.
+            caused_by_user_id: Only include events caused by this user. Filtered by NannyML Cloud.
+            start: Only include events at or after this time.
+            end: Only include events before this time.
+
+        Returns:
+            Dataframe with a row per event, sorted by timestamp. Columns are `dataSource` (either `reference` or
+            `evaluation`), `id`, `eventType`, `timestamp` and `nrRows`.
+        """
+        model = execute(_GET_MODEL_DATA_HISTORY, {
+            'modelId': int(model_id),
+            'eventsFilter': _events_filter(event_type, caused_by_user_id),
+        })['evaluation_model']
+        return _history_to_frame({
+            'reference': _filter_events_by_time(model['referenceDataSource']['events'], start, end),
+            'evaluation': _filter_events_by_time(model['evaluationDataSource']['events'], start, end),
+        })
+
+    @classmethod
+    def prefetch_data_sources(cls, model_ids: Sequence[str]) -> Dict[str, Dict[str, DataSourceSummary]]:
+        """Load data sources of many models into the metadata cache using batched requests.
+
+        Methods that add data look up the data sources of a model first. Prefetching avoids a separate request per
+        model when working with many models.
+
+        Args:
+            model_ids: IDs of the models.
+
+        Returns:
+            Data sources per model ID. Models that don't exist are not included.
+        """
+        models = execute_batched(
+            'query', _PREFETCH_MODEL_DATA_SOURCES_SELECTION, {'modelId': 'Int!'},
+            [{'modelId': int(model_id)} for model_id in model_ids], DATA_SOURCE_SUMMARY_FRAGMENT,
+        )
+        data_sources = {str(model.pop('id')): model for model in filter(None, models)}
+        for model_id, model_data_sources in data_sources.items():
+            metadata_cache.set(('EVALUATION', model_id), model_data_sources)
+
+        return data_sources
 
     @staticmethod
-    @functools.lru_cache(maxsize=128)
     def _get_model_data_sources(
             model_id: str, filter: Optional[DataSourceFilter] = None
     ) -> Dict[str, DataSourceSummary]:
         """Get data sources for a model"""
-        return execute(_GET_MODEL_DATA_SOURCES, {
+        # The query always returns both data sources, so the filter is not part of the cache key
+        return metadata_cache.get(('EVALUATION', str(model_id)), lambda: execute(_GET_MODEL_DATA_SOURCES, {
             'modelId': int(model_id),
             'filter': filter,
-        })['evaluation_model']
+        })['evaluation_model'])
 
     @classmethod
     def _get_evaluation_data_source(cls, model_id: str) -> DataSourceSummary:
@@ -352,3 +480,13 @@ class Model:
             raise InvalidOperationError(
                 f"Model '{model_id}' has no evaluation data source."
             )
+
+    @staticmethod
+    def _get_evaluation_data_source_details(model_id: str) -> DataSourceDetails:
+        """Get the details, including columns, of the evaluation data source of a model"""
+        return metadata_cache.get(
+            ('EVALUATION', str(model_id), 'details'),
+            lambda: execute(_GET_MODEL_EVALUATION_DATA_SOURCE_DETAILS, {
+                'modelId': int(model_id),
+            })['evaluation_model']['evaluationDataSource'],
+        )
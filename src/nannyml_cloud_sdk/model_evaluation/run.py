@@ -1,11 +1,13 @@
 import datetime
-from typing import Optional
+from typing import Iterator, List, Optional, Sequence
 
 from gql import gql
 
 from nannyml_cloud_sdk._typing import TypedDict
 from nannyml_cloud_sdk.client import execute
-from nannyml_cloud_sdk.enums import RunState
+from nannyml_cloud_sdk.enums import RunEventType, RunState
+from nannyml_cloud_sdk.errors import InvalidOperationError
+from nannyml_cloud_sdk.run import _cancel_active_runs, _get_run_log, _iter_run_events, _tail_run_log, _wait_for_run
 
 
 class RunSummary(TypedDict):
@@ -27,6 +29,57 @@ class RunSummary(TypedDict):
     ranSuccessfully: Optional[bool]
 
 
+class RunEvent(TypedDict):
+    """Event recorded while a run is scheduled or active.
+
+    Attributes:
+        id: Identifier of the event. Identifiers increase as events are recorded.
+        eventType: Type of the event.
+        ranSuccessfully: Whether the run completed successfully. Only set for `COMPLETED` events.
+        scheduledFor: Date and time the run was scheduled to start. Only set for `SCHEDULED` events.
+        currentStep: Number of the current step. Only set for `PROGRESS` events.
+        nrSteps: Total number of steps. Only set for `PROGRESS` events.
+        description: Description of the event, e.g. a warning or error message.
+        timestamp: Date and time the event was recorded.
+    """
+    id: int
+    eventType: RunEventType
+    ranSuccessfully: Optional[bool]
+    scheduledFor: Optional[datetime.datetime]
+    currentStep: Optional[int]
+    nrSteps: Optional[int]
+    description: Optional[str]
+    timestamp: datetime.datetime
+
+
+class RunLog(TypedDict):
+    """Part of the log of a run.
+
+    Attributes:
+        runId: ID of the run.
+        state: State of the run when the log was retrieved. The log is complete once the state is `COMPLETED`.
+        log: Text of the log from the requested offset onwards.
+        offset: Offset to request the next part of the log from, i.e. the length of the log when it was retrieved.
+    """
+    runId: str
+    state: RunState
+    log: str
+    offset: int
+
+
+class RunCancellationResult(TypedDict):
+    """Outcome of cancelling the active run of a model.
+
+    Attributes:
+        modelId: ID of the model.
+        run: Summary information for the cancelled run. This is ``None`` if cancelling failed.
+        error: Description of the error if cancelling failed, ``None`` otherwise.
+    """
+    modelId: str
+    run: Optional[RunSummary]
+    error: Optional[str]
+
+
 RUN_SUMMARY_FRAGMENT = f"""
     fragment RunSummary on EvaluationRun {{
         {' '.join(RunSummary.__required_keys__)}
@@ -34,6 +87,12 @@ RUN_SUMMARY_FRAGMENT = f"""
 """
 
 
+RUN_EVENT_FRAGMENT = f"""
+    fragment RunEvent on EvaluationRunEvent {{
+        {' '.join(RunEvent.__required_keys__)}
+    }}
+"""
+
 _START_RUN = gql("""
     mutation startRun($modelId: Int!) {
         start_evaluation_model_run(evaluationModelId: $modelId) {
@@ -43,6 +102,103 @@ _START_RUN = gql("""
 """ + RUN_SUMMARY_FRAGMENT)
 
 
+_GET_LATEST_RUN = gql("""
+    query getLatestRun($modelId: Int!) {
+        evaluation_model(id: $modelId) {
+            latestRun {
+                ...RunSummary
+            }
+        }
+    }
+""" + RUN_SUMMARY_FRAGMENT)
+
+_GET_RUNS = gql("""
+    query getRuns($modelId: Int!) {
+        evaluation_model(id: $modelId) {
+            runs {
+                ...RunSummary
+            }
+        }
+    }
+""" + RUN_SUMMARY_FRAGMENT)
+
+
+_GET_LATEST_RUN_EVENTS = gql("""
+    query getLatestRunEvents($modelId: Int!) {
+        evaluation_model(id: $modelId) {
+            latestRun {
+                id
+                state
+                events {
+                    ...RunEvent
+                }
+            }
+        }
+    }
+""" + RUN_EVENT_FRAGMENT)
+
+_GET_RUN_EVENTS = gql("""
+    query getRunEvents($modelId: Int!) {
+        evaluation_model(id: $modelId) {
+            runs {
+                id
+                state
+                events {
+                    ...RunEvent
+                }
+            }
+        }
+    }
+""" + RUN_EVENT_FRAGMENT)
+
+_GET_LATEST_RUN_LOG = gql("""
+    query getLatestRunLog($modelId: Int!) {
+        evaluation_model(id: $modelId) {
+            latestRun {
+                id
+                state
+                log
+            }
+        }
+    }
+""")
+
+_GET_RUN_LOGS = gql("""
+    query getRunLogs($modelId: Int!) {
+        evaluation_model(id: $modelId) {
+            runs {
+                id
+                state
+                log
+            }
+        }
+    }
+""")
+
+_CANCEL_RUN_SELECTION = """
+    cancel_evaluation_model_run(evaluationRunId: $evaluationRunId) {
+        ...RunSummary
+    }
+"""
+
+_CANCEL_RUN = gql("""
+    mutation cancelRun($evaluationRunId: Int!) {
+        """ + _CANCEL_RUN_SELECTION + """
+    }
+""" + RUN_SUMMARY_FRAGMENT)
+
+_LIST_LATEST_RUNS = gql("""
+    query listLatestRuns {
+        evaluation_models {
+            id
+            latestRun {
+                ...RunSummary
+            }
+        }
+    }
+""" + RUN_SUMMARY_FRAGMENT)
+
+
 class Run:
     """Operations for running NannyML model evaluation."""
 
@@ -60,3 +216,154 @@ class Run:
             Summary information for the newly started run.
         """
         return execute(_START_RUN, {"modelId": int(model_id)})["start_evaluation_model_run"]
+
+    @classmethod
+    def wait(
+        cls,
+        model_id: str,
+        run_id: Optional[str] = None,
+        timeout: Optional[float] = None,
+        poll_interval: float = 2.0,
+        max_poll_interval: float = 30.0,
+    ) -> RunSummary:
+        """Wait for a run of a model to complete.
+
+        Only the state of the run is polled. Polling starts every `poll_interval` seconds and slows down while the
+        state of the run doesn't change, up to once every `max_poll_interval` seconds.
+
+        Args:
+            model_id: The ID of the model.
+            run_id: The ID of the run to wait for, e.g. as returned by
+                [trigger][nannyml_cloud_sdk.model_evaluation.Run.trigger]. Defaults to the latest run of the model.
+            timeout: Maximum number of seconds to wait. Waits indefinitely if not provided.
+            poll_interval: Initial number of seconds between checks of the run state.
+            max_poll_interval: Maximum number of seconds between checks of the run state.
+
+        Returns:
+            Summary information for the completed run. Use `ranSuccessfully` to check the outcome, it is false for
+            runs that failed or were cancelled.
+
+        Raises:
+            RunTimeoutError: If the run did not complete within `timeout` seconds.
+        """
+        return _wait_for_run(
+            lambda: execute(_GET_LATEST_RUN, {"modelId": int(model_id)})["evaluation_model"]["latestRun"],
+            lambda: execute(_GET_RUNS, {"modelId": int(model_id)})["evaluation_model"]["runs"],
+            run_id, timeout, poll_interval, max_poll_interval,
+        )
+
+    @classmethod
+    def iter_events(cls, model_id: str, run_id: Optional[str] = None, poll_interval: float = 5.0) -> Iterator[RunEvent]:
+        """Iterate over the events of a run as they are recorded.
+
+        The iterator yields events that were already recorded first, then polls for new events until the run has
+        completed. Stop iterating to stop polling, e.g. to cancel a run as soon as an error is reported.
+
+        Args:
+            model_id: The ID of the model.
+            run_id: The ID of the run. Defaults to the latest run of the model.
+            poll_interval: Number of seconds between checks for new events.
+
+        Returns:
+            Iterator over the events of the run, in the order they were recorded.
+        """
+        return _iter_run_events(
+            lambda: execute(_GET_LATEST_RUN_EVENTS, {"modelId": int(model_id)})["evaluation_model"]["latestRun"],
+            lambda: execute(_GET_RUN_EVENTS, {"modelId": int(model_id)})["evaluation_model"]["runs"],
+            run_id, poll_interval,
+        )
+
+    @classmethod
+    def get_log(cls, model_id: str, run_id: Optional[str] = None, offset: int = 0) -> RunLog:
+        """Get the log of a run.
+
+        Use the returned `offset` to get only the part of the log that was added since, e.g. to follow the log of an
+        active run. Logs of completed runs are cached on disk, in the directory configured by
+        `nannyml_cloud_sdk.log_cache_dir`, so they are only downloaded once.
+
+        Args:
+            model_id: The ID of the model.
+            run_id: The ID of the run. Defaults to the latest run of the model.
+            offset: Number of characters at the start of the log to skip.
+
+        Returns:
+            The log of the run from `offset` onwards.
+
+        Raises:
+            InvalidOperationError: If the model has no runs or the run doesn't exist.
+        """
+        return _get_run_log(  # type: ignore[return-value]
+            "EVALUATION",
+            lambda: execute(_GET_LATEST_RUN_LOG, {"modelId": int(model_id)})["evaluation_model"]["latestRun"],
+            lambda: execute(_GET_RUN_LOGS, {"modelId": int(model_id)})["evaluation_model"]["runs"],
+            run_id, offset,
+        )
+
+    @classmethod
+    def iter_log(cls, model_id: str, run_id: Optional[str] = None, poll_interval: float = 5.0) -> Iterator[str]:
+        """Iterate over the log of a run as it is written.
+
+        The iterator yields the log written so far first, then polls for text added to the log until the run has
+        completed.
+
+        Args:
+            model_id: The ID of the model.
+            run_id: The ID of the run. Defaults to the latest run of the model.
+            poll_interval: Number of seconds between checks for new log text.
+
+        Returns:
+            Iterator over parts of the log, in the order they were written.
+        """
+        return _tail_run_log(
+            lambda run_id, offset: cls.get_log(model_id, run_id, offset),  # type: ignore[arg-type,return-value]
+            run_id, poll_interval,
+        )
+
+    @classmethod
+    def cancel(cls, model_id: str, run_id: Optional[str] = None) -> RunSummary:
+        """Cancel a run of a model.
+
+        Cancelling is not immediate. The run is in the `CANCELLING` state until it has stopped, see
+        [wait][nannyml_cloud_sdk.model_evaluation.Run.wait].
+
+        Args:
+            model_id: The ID of the model.
+            run_id: The ID of the run to cancel. Defaults to the latest run of the model.
+
+        Returns:
+            Summary information for the cancelled run.
+        """
+        if run_id is None:
+            latest_run = execute(_GET_LATEST_RUN, {"modelId": int(model_id)})["evaluation_model"]["latestRun"]
+            if latest_run is None:
+                raise InvalidOperationError(f"Model '{model_id}' has no runs to cancel")
+            run_id = latest_run["id"]
+
+        return execute(_CANCEL_RUN, {"evaluationRunId": int(run_id)})["cancel_evaluation_model_run"]
+
+    @classmethod
+    def cancel_all_active(
+        cls, model_ids: Optional[Sequence[str]] = None, batch_size: int = 50
+    ) -> List[RunCancellationResult]:
+        """Cancel all scheduled and running runs, e.g. after triggering runs with bad data.
+
+        Active runs are found with a single request. They are then cancelled using batched requests, so the
+        runs of many models are cancelled together. A failure for one model does not affect the others.
+
+        Args:
+            model_ids: IDs of the models to cancel runs for. Defaults to all models.
+            batch_size: Maximum number of runs cancelled per request.
+
+        Returns:
+            A result per model that had an active run.
+        """
+        return _cancel_active_runs(  # type: ignore[return-value]
+            models=execute(_LIST_LATEST_RUNS)["evaluation_models"],
+            model_ids=model_ids,
+            id_key="modelId",
+            selection=_CANCEL_RUN_SELECTION,
+            variable_types={"evaluationRunId": "Int!"},
+            variables=lambda model_id, run: {"evaluationRunId": int(run["id"])},
+            fragments=RUN_SUMMARY_FRAGMENT,
+            batch_size=batch_size,
+        )
@@ -1,11 +1,14 @@
+import os
 from typing import Optional, Dict, Union, Collection, cast
 
 import pandas as pd
+import pyarrow as pa
 
-from ..client import execute
-from ..data import Data
-from ..enums import ProblemType
-from ..schema import INSPECT_SCHEMA, normalize, BaseSchema, _override_column_in_schema
+from ..enums import ProblemType, SamplingStrategy, SchemaInference
+from ..schema import (
+    normalize, BaseSchema, _infer_columns, _inspect_columns, _inspect_parquet, _profile_arrow_schema, _sample_rows,
+    _override_column_in_schema,
+)
 
 
 class ModelSchema(BaseSchema):
@@ -28,10 +31,12 @@ class Schema:
         prediction_score_column_name_or_mapping: Optional[Union[str, Dict[str, str]]] = None,
         identifier_column_name: Optional[str] = None,
         ignore_column_names: Union[str, Collection[str]] = (),
+        inference: SchemaInference = 'SERVER',
+        sampling: SamplingStrategy = 'HEAD',
     ) -> ModelSchema:
         """Create a schema from a pandas dataframe.
 
-        Sends a sample of the dataframe to the NannyML Cloud API to inspect the schema. Heuristics are used to identify
+        Inspects a sample of the dataframe, by default using the NannyML Cloud API. Heuristics are used to identify
         what each column represents. The schema is then modified according to the provided arguments.
 
         Args:
@@ -48,6 +53,60 @@ class Schema:
             identifier_column_name: The name of the identifier column. Any column that heuristics identified as
                 identifier will be changed to a feature column.
             ignore_column_names: The names of columns to ignore.
+            inference: Whether columns are inspected by the NannyML Cloud API (`SERVER`) or by local heuristics based
+                on column names, data types and value statistics (`LOCAL`).
+            sampling: How the `INSPECT_DATA_FRAME_NR_ROWS` inspected rows are selected, see
+                [SamplingStrategy][nannyml_cloud_sdk.enums.SamplingStrategy]. Use another strategy than `HEAD` if the
+                first rows are not representative, e.g. because the data is sorted by time.
+
+        Returns:
+            The inspected schema with any modifications applied.
+
+        Note:
+            Columns inspected by the API are cached by column names and data types, so dataframes with the same layout
+            are only inspected once. Call `nannyml_cloud_sdk.cache.inspection_cache.clear()` to inspect them again.
+        """
+        if problem_type in ('MULTICLASS_CLASSIFICATION', 'REGRESSION'):
+            raise NotImplementedError(f"problem_type '{problem_type}' is not supported yet.")
+
+        sample = _sample_rows(df, cls.INSPECT_DATA_FRAME_NR_ROWS, sampling, None)
+        schema: ModelSchema = {
+            'problemType': problem_type,
+            'columns': _inspect_columns(sample, 'EVALUATION', problem_type, inference, cls.CATEGORICAL_DTYPES),
+        }
+
+        return cls._apply_overrides(
+            schema, target_column_name, prediction_score_column_name_or_mapping, identifier_column_name,
+            ignore_column_names,
+        )
+
+    @classmethod
+    def from_parquet(
+        cls,
+        problem_type: ProblemType,
+        path: Union[str, 'os.PathLike[str]'],
+        target_column_name: Optional[str] = None,
+        prediction_score_column_name_or_mapping: Optional[Union[str, Dict[str, str]]] = None,
+        identifier_column_name: Optional[str] = None,
+        ignore_column_names: Union[str, Collection[str]] = (),
+        inference: SchemaInference = 'LOCAL',
+    ) -> ModelSchema:
+        """Create a schema from a parquet file without loading its data.
+
+        Data types are read from the metadata in the file footer, together with column statistics such as null
+        counts. Values are only read for the first `INSPECT_DATA_FRAME_NR_ROWS` rows of columns that could be
+        identifiers, or of all columns when using server inference.
+
+        Args:
+            problem_type: The problem type of the model.
+            path: Path of the parquet file.
+            target_column_name: The name of the target column.
+            prediction_score_column_name_or_mapping: The name of the prediction score column, or a dict mapping class
+                names to prediction score column names for multiclass classification.
+            identifier_column_name: The name of the identifier column.
+            ignore_column_names: The names of columns to ignore.
+            inference: Whether columns are inspected by local heuristics (`LOCAL`) or by the NannyML Cloud API
+                (`SERVER`).
 
         Returns:
             The inspected schema with any modifications applied.
@@ -55,20 +114,66 @@ class Schema:
         if problem_type in ('MULTICLASS_CLASSIFICATION', 'REGRESSION'):
             raise NotImplementedError(f"problem_type '{problem_type}' is not supported yet.")
 
-        # Upload head of dataset than use API to inspect schema
-        upload = Data.upload(df.head(cls.INSPECT_DATA_FRAME_NR_ROWS))
-        schema = execute(INSPECT_SCHEMA, variable_values={
-            "input": {
-                "productType": 'EVALUATION',
-                "problemType": problem_type,
-                "storageInfo": upload,
-            },
-        })['inspect_dataset']
+        schema: ModelSchema = {
+            'problemType': problem_type,
+            'columns': _inspect_parquet(
+                path, 'EVALUATION', problem_type, inference, cls.CATEGORICAL_DTYPES, cls.INSPECT_DATA_FRAME_NR_ROWS
+            ),
+        }
+        return cls._apply_overrides(
+            schema, target_column_name, prediction_score_column_name_or_mapping, identifier_column_name,
+            ignore_column_names,
+        )
 
-        # Problem type isn't included in API output, so we add it here
-        schema['problemType'] = problem_type
+    @classmethod
+    def from_arrow_schema(
+        cls,
+        problem_type: ProblemType,
+        arrow_schema: pa.Schema,
+        target_column_name: Optional[str] = None,
+        prediction_score_column_name_or_mapping: Optional[Union[str, Dict[str, str]]] = None,
+        identifier_column_name: Optional[str] = None,
+        ignore_column_names: Union[str, Collection[str]] = (),
+    ) -> ModelSchema:
+        """Create a schema from an arrow schema, e.g. of a dataset that is too large to load.
+
+        Columns are inspected locally using their names and data types only.
 
-        # Apply overrides
+        Args:
+            problem_type: The problem type of the model.
+            arrow_schema: The arrow schema of the data.
+            target_column_name: The name of the target column.
+            prediction_score_column_name_or_mapping: The name of the prediction score column, or a dict mapping class
+                names to prediction score column names for multiclass classification.
+            identifier_column_name: The name of the identifier column.
+            ignore_column_names: The names of columns to ignore.
+
+        Returns:
+            The inspected schema with any modifications applied.
+        """
+        if problem_type in ('MULTICLASS_CLASSIFICATION', 'REGRESSION'):
+            raise NotImplementedError(f"problem_type '{problem_type}' is not supported yet.")
+
+        schema: ModelSchema = {
+            'problemType': problem_type,
+            'columns': _infer_columns(
+                _profile_arrow_schema(arrow_schema), 'EVALUATION', problem_type, cls.CATEGORICAL_DTYPES
+            ),
+        }
+        return cls._apply_overrides(
+            schema, target_column_name, prediction_score_column_name_or_mapping, identifier_column_name,
+            ignore_column_names,
+        )
+
+    @classmethod
+    def _apply_overrides(
+        cls,
+        schema: ModelSchema,
+        target_column_name: Optional[str],
+        prediction_score_column_name_or_mapping: Optional[Union[str, Dict[str, str]]],
+        identifier_column_name: Optional[str],
+        ignore_column_names: Union[str, Collection[str]],
+    ) -> ModelSchema:
         if target_column_name is not None:
             schema = cls.set_target(schema, target_column_name)
         if prediction_score_column_name_or_mapping is not None:
@@ -1,13 +1,22 @@
 from .model import Model
-from .run import Run
+from .result import Result
+from .router import DataRouter
+from .run import Run, RunBatch
 from .schema import Schema
+from .trigger import DebouncedRunTrigger
+from .webhook import RunCompletionReceiver
 from .custom_metric import CustomMetric
 from .configuration import RuntimeConfiguration
 
 __all__ = [
     'Model',
+    'Result',
+    'DataRouter',
     'Run',
+    'RunBatch',
     'Schema',
+    'DebouncedRunTrigger',
+    'RunCompletionReceiver',
     'CustomMetric',
     'RuntimeConfiguration',
 ]
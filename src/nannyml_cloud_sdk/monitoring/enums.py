@@ -61,3 +61,33 @@ ClassificationRuleType = Literal[
     'NOT_EQUALS',
     'CLASS',
 ]
+
+AnalysisType = Literal[
+    'REALIZED_PERFORMANCE',
+    'ESTIMATED_PERFORMANCE',
+    'FEATURE_DRIFT',
+    'DATA_QUALITY',
+    'CONCEPT_SHIFT',
+    'DISTRIBUTION',
+    'SUMMARY_STATS',
+]
+
+CalculatorType = Literal[
+    'CBPE',
+    'PAPE',
+    'DLE',
+    'PERFORMANCE_CALCULATION',
+    'UNIVARIATE_DRIFT',
+    'RECONSTRUCTION_ERROR',
+    'DOMAIN_CLASSIFIER',
+    'MISSING_VALUES',
+    'UNSEEN_VALUES',
+    'RCS',
+    'CATEGORICAL_DISTRIBUTION',
+    'CONTINUOUS_DISTRIBUTION',
+    'SUMMARY_STATS_AVG',
+    'SUMMARY_STATS_ROW_COUNT',
+    'SUMMARY_STATS_MEDIAN',
+    'SUMMARY_STATS_STD',
+    'SUMMARY_STATS_SUM',
+]
@@ -1,22 +1,28 @@
 import datetime
-import functools
-from typing import List, Optional
+import json
+import os
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Union, cast
 
 import pandas as pd
 from frozendict import frozendict
 from gql import gql
 
-from ..client import execute
+from ..cache import metadata_cache
+from ..client import execute, execute_batched, executor
 from ..data import (
-    DATA_SOURCE_EVENT_FRAGMENT, DATA_SOURCE_SUMMARY_FRAGMENT, Data, DataSourceEvent, DataSourceFilter,
-    DataSourceSummary, _ADD_DATA_TO_DATA_SOURCE, _UPSERT_DATA_IN_DATA_SOURCE, _REMOVE_DATA_FROM_DATA_SOURCE
+    COLUMN_DETAILS_FRAGMENT, DATA_SOURCE_DETAILS_FRAGMENT, DATA_SOURCE_EVENT_FRAGMENT, DATA_SOURCE_SUMMARY_FRAGMENT,
+    ColumnDetails, Data, DataIngestionResult, DataSourceDetails, DataSourceEvent, DataSourceFilter, DataSourceSummary,
+    _ADD_DATA_TO_DATA_SOURCE, _UPSERT_DATA_IN_DATA_SOURCE, _add_data_in_bulk, _delete_data_in_chunks,
+    _events_filter, _filter_events_by_time, _head_to_frame, _history_to_frame, _split_by_model
 )
-from ..enums import ChunkPeriod, PerformanceMetric, ProblemType
+from ..enums import ChunkPeriod, DataSourceEventType, PerformanceMetric, ProblemType
 from ..errors import InvalidOperationError
+from ..schema import _normalized_names, _project_columns, _validate_data, normalize
 from .run import RUN_SUMMARY_FRAGMENT, RunSummary
-from .schema import ModelSchema, normalize
+from .schema import ModelSchema, Schema, SchemaChange
 from .._typing import TypedDict
-from .configuration import RuntimeConfiguration
+from .configuration import RuntimeConfiguration, _RuntimeConfiguration, _to_input
+from .custom_metric import CustomMetric
 
 
 class ModelSummary(TypedDict):
@@ -47,6 +53,18 @@ class ModelDetails(ModelSummary):
     nextRun: Optional[RunSummary]
 
 
+class SchemaEvolution(TypedDict):
+    """Outcome of evolving the schema of a model.
+
+    Attributes:
+        changes: Changes that were applied, i.e. added columns and column type changes. See
+            [Schema.diff][nannyml_cloud_sdk.monitoring.Schema.diff].
+        dataSources: Data sources that were added to store the data of new columns.
+    """
+    changes: List[SchemaChange]
+    dataSources: List[DataSourceSummary]
+
+
 _MODEL_SUMMARY_FRAGMENT = f"""
     fragment ModelSummary on Model {{
         {' '.join(ModelSummary.__required_keys__)}
@@ -91,11 +109,54 @@ _GET_MODEL_DATA_SOURCES = gql("""
     }
 """ + DATA_SOURCE_SUMMARY_FRAGMENT)
 
+_GET_MODEL_DATA_SOURCE_DETAILS = gql("""
+    query getModelDataSourceDetails($modelId: Int!, $filter: DataSourcesFilter) {
+        monitoring_model(id: $modelId) {
+            dataSources(filter: $filter) {
+                ...DataSourceDetails
+            }
+        }
+    }
+""" + DATA_SOURCE_DETAILS_FRAGMENT)
+
+_ADD_MODEL_DATA_SOURCE = gql("""
+    mutation addModelDataSource($input: AddDataSourceToModelInput!) {
+        add_model_data_source(input: $input) {
+            ...DataSourceSummary
+        }
+    }
+""" + DATA_SOURCE_SUMMARY_FRAGMENT)
+
+_EDIT_MODEL_DATA_SOURCES = gql("""
+    mutation editModelDataSources(
+        $modelId: Int!, $dataSources: [EditDataSourceColumnTypesInput!], $allowInvalidatingResults: Boolean!
+    ) {
+        edit_monitoring_model(input: {
+            modelId: $modelId
+            dataSources: $dataSources
+            allowInvalidatingResults: $allowInvalidatingResults
+        }) {
+            __typename
+        }
+    }
+""")
+
+_PREFETCH_MODEL_DATA_SOURCES_SELECTION = """
+    monitoring_model(id: $modelId) {
+        id
+        dataSources {
+            ...DataSourceSummary
+        }
+    }
+"""
+
 _GET_MODEL_DATA_HISTORY = gql("""
-    query getModelDataHistory($modelId: Int!, $dataSourceFilter: DataSourcesFilter) {
+    query getModelDataHistory(
+        $modelId: Int!, $dataSourceFilter: DataSourcesFilter, $eventsFilter: DataSourceEventsFilter
+    ) {
         monitoring_model(id: $modelId) {
             dataSources(filter: $dataSourceFilter) {
-                events {
+                events(filter: $eventsFilter) {
                     ...DataSourceEvent
                 }
                 ...DataSourceSummary
@@ -104,6 +165,53 @@ _GET_MODEL_DATA_HISTORY = gql("""
     }
 """ + DATA_SOURCE_SUMMARY_FRAGMENT + DATA_SOURCE_EVENT_FRAGMENT)
 
+_GET_DATA_SOURCE_ROW_COUNTS = gql("""
+    query getDataSourceRowCounts($filter: ModelsFilter) {
+        monitoring_models(filter: $filter) {
+            id
+            name
+            dataSources {
+                id
+                name
+                nrRows
+            }
+        }
+    }
+""")
+
+_GET_MODEL_DATA_HEAD = gql("""
+    query getModelDataHead($modelId: Int!, $dataSourceFilter: DataSourcesFilter, $nrRows: Int!) {
+        monitoring_model(id: $modelId) {
+            dataSources(filter: $dataSourceFilter) {
+                columns {
+                    ...ColumnDetails
+                }
+                head(nrRows: $nrRows)
+            }
+        }
+    }
+""" + COLUMN_DETAILS_FRAGMENT)
+
+_GET_MODEL_EXPORT = gql("""
+    query getModelExport($modelId: Int!) {
+        monitoring_model(id: $modelId) {
+            name
+            problemType
+            kpm {
+                metric
+                component
+            }
+            dataSources {
+                ...DataSourceDetails
+            }
+        }
+    }
+""" + DATA_SOURCE_DETAILS_FRAGMENT)
+
+_MODEL_BUNDLE_FILE_NAME = 'model.json'
+# Key of the object a datetime is wrapped in within a bundle, so any datetime is restored on import
+_MODEL_BUNDLE_DATETIME_KEY = '$datetime'
+
 _CREATE_MODEL = gql("""
     mutation createModel($input: CreateModelInput!) {
         create_monitoring_model(model: $input) {
@@ -224,10 +332,7 @@ class Model:
                 'name': 'analysis',
                 'hasReferenceData': False,
                 'hasAnalysisData': True,
-                'columns': [
-                    column for column in schema['columns']
-                    if column['name'] in map(normalize, analysis_data.columns)
-                ],
+                'columns': _project_columns(schema['columns'], analysis_data.columns),
                 'storageInfo': Data.upload(analysis_data),
             },
         ]
@@ -243,14 +348,11 @@ class Model:
                 'name': 'target',
                 'hasReferenceData': False,
                 'hasAnalysisData': True,
-                'columns': [
-                    column for column in schema['columns']
-                    if column['name'] in map(normalize, target_data.columns)
-                ],
+                'columns': _project_columns(schema['columns'], target_data.columns),
                 'storageInfo': Data.upload(target_data),
             })
         # Add empty target data source if target data is not provided in analysis
-        elif target_column not in map(normalize, analysis_data.columns):
+        elif target_column not in _normalized_names(analysis_data.columns):
             has_targets = False
             data_sources.append({
                 'name': 'target',
@@ -270,7 +372,7 @@ class Model:
             nr_of_rows=chunk_size
         )
 
-        return execute(_CREATE_MODEL, {
+        model = execute(_CREATE_MODEL, {
             'input': {
                 'name': name,
                 'problemType': schema['problemType'],
@@ -283,6 +385,8 @@ class Model:
                 'runOnCreate': False,
             },
         })['create_monitoring_model']
+        metadata_cache.invalidate('MONITORING', model['id'])
+        return model
 
     @classmethod
     def delete(cls, model_id: str) -> None:
@@ -292,20 +396,288 @@ class Model:
             model_id: ID of the model to delete.
         """
         execute(_DELETE_MODEL, {'id': int(model_id)})
+        metadata_cache.invalidate('MONITORING', model_id)
 
     @classmethod
-    def add_analysis_data(cls, model_id: str, data: pd.DataFrame) -> None:
+    def export(
+        cls, model_id: str, path: Union[str, 'os.PathLike[str]'], max_workers: int = 4, max_rows: Optional[int] = None
+    ) -> None:
+        """Export a model to a local bundle, e.g. to clone it into another environment.
+
+        The bundle is a directory containing a `model.json` file with the schema, key performance metric, runtime
+        configuration and custom metric links of the model, and a parquet file for every data source that contains
+        data.
+
+        Args:
+            model_id: ID of the model to export.
+            path: Directory to write the bundle to. It is created if it doesn't exist.
+            max_workers: Maximum number of data sources downloaded concurrently.
+            max_rows: Optional maximum number of rows exported per data source. Defaults to exporting all rows.
+
+        Note:
+            Data is downloaded through the data source preview: a single request per data source that returns the
+            rows as JSON, which is held in memory before it is written to parquet. This is neither compressed nor
+            chunked, so exporting large data sources is slow and memory intensive. Use `max_rows` to bound the
+            amount of data transferred, at the cost of exporting only the first rows of each data source.
+        """
+        model = execute(_GET_MODEL_EXPORT, {'modelId': int(model_id)})['monitoring_model']
+        runtime_config = RuntimeConfiguration._get_config(int(model_id))
+        os.makedirs(path, exist_ok=True)
+
+        data_sources = [
+            {
+                'name': data_source['name'],
+                'hasReferenceData': data_source['hasReferenceData'],
+                'hasAnalysisData': data_source['hasAnalysisData'],
+                'columns': data_source['columns'],
+                'file': f"{data_source['name']}.parquet" if data_source['nrRows'] else None,
+            }
+            for data_source in model['dataSources']
+        ]
+        with executor(max_workers) as pool:
+            futures = {
+                f"{data_source['name']}.parquet": pool.submit(
+                    cls.get_data_head, model_id, data_source['name'],
+                    data_source['nrRows'] if max_rows is None else min(data_source['nrRows'], max_rows)
+                )
+                for data_source in model['dataSources'] if data_source['nrRows']
+            }
+            for file_name, future in futures.items():
+                future.result().to_parquet(os.path.join(path, file_name))
+
+        with open(os.path.join(path, _MODEL_BUNDLE_FILE_NAME), 'w') as f:
+            json.dump({
+                'name': model['name'],
+                'problemType': model['problemType'],
+                'kpm': model['kpm'],
+                'dataSources': data_sources,
+                'runtimeConfig': runtime_config,
+            }, f, indent=2, default=_bundle_json_default)
+
+    @classmethod
+    def import_(
+        cls, path: Union[str, 'os.PathLike[str]'], name: Optional[str] = None, max_workers: int = 4
+    ) -> ModelDetails:
+        """Create a new model from a bundle written by [export][nannyml_cloud_sdk.monitoring.Model.export].
+
+        Data sources are uploaded concurrently. Custom metrics are linked by name, so they must exist in the
+        environment the model is imported into.
+
+        Args:
+            path: Directory containing the bundle.
+            name: Optional name for the new model. Defaults to the name of the exported model.
+            max_workers: Maximum number of data sources uploaded concurrently.
+
+        Returns:
+            Details about the model once it has been created.
+        """
+        with open(os.path.join(path, _MODEL_BUNDLE_FILE_NAME)) as f:
+            bundle = json.load(f, object_hook=_bundle_object_hook)
+        runtime_config = bundle['runtimeConfig']
+        custom_metric_ids = cls._resolve_custom_metric_ids(bundle['problemType'], runtime_config['customMetrics'])
+
+        with executor(max_workers) as pool:
+            uploads = {
+                data_source['name']: pool.submit(
+                    lambda file_name: Data.upload(pd.read_parquet(os.path.join(path, file_name))), data_source['file']
+                )
+                for data_source in bundle['dataSources'] if data_source['file'] is not None
+            }
+            data_sources = [
+                {
+                    'name': data_source['name'],
+                    'hasReferenceData': data_source['hasReferenceData'],
+                    'hasAnalysisData': data_source['hasAnalysisData'],
+                    'columns': data_source['columns'],
+                    'storageInfo': uploads[data_source['name']].result() if data_source['name'] in uploads else None,
+                }
+                for data_source in bundle['dataSources']
+            ]
+
+        # Custom metrics must be linked to the model before they can be configured
+        model = execute(_CREATE_MODEL, {
+            'input': {
+                'name': name if name is not None else bundle['name'],
+                'problemType': bundle['problemType'],
+                'dataSources': data_sources,
+                'kpm': bundle['kpm'],
+                'runtimeConfig': _to_input({**runtime_config, 'customMetrics': []}),
+                'runOnCreate': False,
+            },
+        })['create_monitoring_model']
+        metadata_cache.invalidate('MONITORING', model['id'])
+
+        if runtime_config['customMetrics']:
+            for config in runtime_config['customMetrics']:
+                config['metric']['id'] = custom_metric_ids[config['metric']['name']]
+                cls.add_custom_metric(model['id'], config['metric']['id'])
+            RuntimeConfiguration.set(int(model['id']), _RuntimeConfiguration(runtime_config))
+
+        return model
+
+    @staticmethod
+    def _resolve_custom_metric_ids(problem_type: ProblemType, configs: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Get the ID of every configured custom metric by name, failing if any of them doesn't exist"""
+        if not configs:
+            return {}
+
+        metric_ids = {metric['name']: metric['id'] for metric in CustomMetric.list(problem_type=problem_type)}
+        missing = [config['metric']['name'] for config in configs if config['metric']['name'] not in metric_ids]
+        if missing:
+            raise InvalidOperationError(f"Custom metrics {', '.join(map(repr, missing))} don't exist")
+
+        return metric_ids
+
+    @classmethod
+    def evolve_schema(
+        cls,
+        model_id: str,
+        schema: ModelSchema,
+        reference_data: Optional[pd.DataFrame] = None,
+        analysis_data: Optional[pd.DataFrame] = None,
+        allow_invalidating_results: bool = False,
+    ) -> SchemaEvolution:
+        """Apply compatible schema changes to an existing model, without recreating it.
+
+        The schema is compared with the columns of all reference data sources of the model, including those added by
+        earlier evolutions, using [Schema.diff][nannyml_cloud_sdk.monitoring.Schema.diff]. Column type changes are
+        applied to the existing data sources. New columns are stored in a new reference and analysis data source,
+        which are joined with the existing data on the identifier column. Only the identifier and the new columns are
+        uploaded. Compatible data type changes, e.g. from `int64` to `float64`, require no changes and are ignored.
+
+        Args:
+            model_id: ID of the model.
+            schema: The new schema of the model.
+            reference_data: Reference data containing the identifier and new columns. Required when adding columns.
+            analysis_data: Analysis data containing the identifier and new columns. If not provided, the analysis
+                data source for new columns is created empty.
+            allow_invalidating_results: Allow column type changes that invalidate existing results.
+
+        Returns:
+            The applied changes and the data sources that were added for new columns. Evolving a model to a schema it
+            already has applies no changes. Add analysis data for the new
+            columns to the added analysis data source using the `data_source_name` argument of
+            [add_analysis_data][nannyml_cloud_sdk.monitoring.Model.add_analysis_data].
+
+        Raises:
+            InvalidOperationError: If the schema contains incompatible changes, if columns are added to a model
+                without an identifier column, or if changes would invalidate results and `allow_invalidating_results`
+                is not set.
+        """
+        data_sources = cls._get_data_source_details(model_id)
+        reference = next((source for source in data_sources if source['name'] == 'reference'), None)
+        if reference is None:
+            raise InvalidOperationError(f"Model '{model_id}' has no reference data source")
+
+        # Columns added by earlier evolutions are stored in separate reference data sources
+        reference_columns = {column['name']: column for column in reference['columns']}
+        for data_source in data_sources:
+            if data_source['hasReferenceData']:
+                for column in data_source['columns']:
+                    reference_columns.setdefault(column['name'], column)
+
+        changes = Schema.diff({'columns': list(reference_columns.values())}, schema)
+        incompatible = [change for change in changes if not change['compatible']]
+        if incompatible:
+            raise InvalidOperationError(f"Schema changes can't be applied to model '{model_id}': " + ', '.join(
+                f"{change['name']} ({change['changeType']})" for change in incompatible
+            ))
+
+        # Check all inputs and upload data before making changes, so failing checks or uploads leave the model unchanged
+        added = [cast(ColumnDetails, change['new']) for change in changes if change['changeType'] == 'ADDED']
+        columns: List[ColumnDetails] = []
+        frames: Dict[str, Optional[pd.DataFrame]] = {}
+        if added:
+            identifier = next((column for column in reference['columns'] if column['columnType'] == 'IDENTIFIER'), None)
+            if identifier is None:
+                raise InvalidOperationError(
+                    f"Model '{model_id}' has no identifier column to join the data of new columns with existing data"
+                )
+            if reference_data is None:
+                raise ValueError("`reference_data` must be provided when adding columns")
+            columns = [identifier] + added
+            frames = {
+                'reference': _select_columns(reference_data, columns),
+                'analysis': _select_columns(analysis_data, columns) if analysis_data is not None else None,
+            }
+        storage_infos = {name: Data.upload(data) if data is not None else None for name, data in frames.items()}
+
+        retyped = {
+            change['name']: cast(ColumnDetails, change['new'])['columnType']
+            for change in changes if change['changeType'] == 'COLUMN_TYPE_CHANGED'
+        }
+        edits = []
+        for data_source in data_sources:
+            edited = [
+                {'name': column['name'], 'columnType': retyped[column['name']], 'columnFlags': column['columnFlags']}
+                for column in data_source['columns'] if column['name'] in retyped
+            ]
+            if edited:
+                edits.append({'id': data_source['id'], 'columns': edited})
+        names = {data_source['name'] for data_source in data_sources}
+        added_data_sources = []
+        try:
+            if edits:
+                outcome = execute(_EDIT_MODEL_DATA_SOURCES, {
+                    'modelId': int(model_id),
+                    'dataSources': edits,
+                    'allowInvalidatingResults': allow_invalidating_results,
+                })['edit_monitoring_model']
+                if outcome['__typename'] == 'ResultInvalidationRequired':
+                    raise InvalidOperationError(
+                        f"Changing column types invalidates results of model '{model_id}'. "
+                        "Use `allow_invalidating_results=True` to apply the changes anyway."
+                    )
+
+            for name, storage_info in storage_infos.items():
+                nr = len(names)
+                while f'{name}_{nr}' in names:
+                    nr += 1
+                names.add(f'{name}_{nr}')
+                added_data_sources.append(execute(_ADD_MODEL_DATA_SOURCE, {
+                    'input': {
+                        'modelId': str(model_id),
+                        'dataSource': {
+                            'name': f'{name}_{nr}',
+                            'hasReferenceData': name == 'reference',
+                            'hasAnalysisData': name == 'analysis',
+                            'columns': columns,
+                            'storageInfo': storage_info,
+                        },
+                    },
+                })['add_model_data_source'])
+        finally:
+            metadata_cache.invalidate('MONITORING', model_id)
+
+        applied = [change for change in changes if change['changeType'] in ('ADDED', 'COLUMN_TYPE_CHANGED')]
+        return {'changes': applied, 'dataSources': added_data_sources}
+
+    @classmethod
+    def add_analysis_data(
+        cls, model_id: str, data: pd.DataFrame, validate: bool = False, data_source_name: str = 'analysis'
+    ) -> None:
         """Add analysis data to a model.
 
         Args:
             model_id: ID of the model.
             data: Data to be added.
+            validate: Check that the data matches the columns of the analysis data source before uploading it. This
+                catches mismatching columns, data types and missing identifiers or timestamps before paying for the
+                upload, instead of failing in the next run.
+            data_source_name: Name of the data source to add data to. Only needed for the data of columns added by
+                [evolve_schema][nannyml_cloud_sdk.monitoring.Model.evolve_schema], which is stored in a separate
+                data source.
+
+        Raises:
+            SchemaValidationError: If `validate` is set and the data doesn't match the analysis data source.
 
         Note:
             This method does not update existing data. It only adds new data. If you want to update existing data,
             use [upsert_analysis_data][nannyml_cloud_sdk.monitoring.Model.upsert_analysis_data] instead.
         """
-        analysis_data_source, = cls._get_model_data_sources(model_id, frozendict({'name': 'analysis'}))
+        analysis_data_source, = cls._get_model_data_sources(model_id, frozendict({'name': data_source_name}))
+        if validate:
+            cls._validate_data(model_id, data_source_name, data)
         execute(_ADD_DATA_TO_DATA_SOURCE, {
             'input': {
                 'id': int(analysis_data_source['id']),
@@ -314,12 +686,55 @@ class Model:
         })
 
     @classmethod
-    def add_analysis_target_data(cls, model_id: str, data: pd.DataFrame) -> None:
+    def add_analysis_data_bulk(
+        cls,
+        data: Union[Mapping[str, pd.DataFrame], pd.DataFrame],
+        model_id_column: Optional[str] = None,
+        max_workers: int = 8,
+        batch_size: int = 50,
+    ) -> List[DataIngestionResult]:
+        """Add analysis data to many models at once.
+
+        Data sources of all models are resolved in a single batched request. Data is then uploaded concurrently and
+        added to the data sources using batched mutations. A failure for one model does not affect the others.
+
+        Args:
+            data: Either a mapping from model ID to the data to add, or a single dataframe containing data for all
+                models. In the latter case `model_id_column` identifies the model each row belongs to.
+            model_id_column: Name of the column containing model IDs when passing a single dataframe. The column is
+                removed before the data is uploaded.
+            max_workers: Maximum number of concurrent uploads.
+            batch_size: Maximum number of models per batched request.
+
+        Returns:
+            Outcome per model, in the order the models appear in `data`. Rows with a missing model ID are not added.
+            They are reported as a failed outcome with model ID ``None``.
+
+        Note:
+            This method does not update existing data. It only adds new data, like
+            [add_analysis_data][nannyml_cloud_sdk.monitoring.Model.add_analysis_data].
+        """
+        frames = _split_by_model(data, model_id_column)
+        data_sources = cls.prefetch_data_sources([model_id for model_id in frames if model_id is not None])
+        data_source_ids = {
+            model_id: next((source['id'] for source in sources if source['name'] == 'analysis'), None)
+            for model_id, sources in data_sources.items()
+        }
+
+        return _add_data_in_bulk(data_source_ids, frames, max_workers, batch_size)
+
+    @classmethod
+    def add_analysis_target_data(cls, model_id: str, data: pd.DataFrame, validate: bool = False) -> None:
         """Add (delayed) target data to a model.
 
         Args:
             model_id: ID of the model.
             data: Data to be added.
+            validate: Check that the data matches the columns of the target data source before uploading it, see
+                [add_analysis_data][nannyml_cloud_sdk.monitoring.Model.add_analysis_data].
+
+        Raises:
+            SchemaValidationError: If `validate` is set and the data doesn't match the target data source.
 
         Note:
             This method can only be used if the model has a target data source.
@@ -331,6 +746,8 @@ class Model:
             use [upsert_analysis_target_data][nannyml_cloud_sdk.monitoring.Model.upsert_analysis_target_data] instead.
         """
         target_data_source = cls._get_target_data_source(model_id)
+        if validate:
+            cls._validate_data(model_id, 'target', data)
         execute(_ADD_DATA_TO_DATA_SOURCE, {
             'input': {
                 'id': int(target_data_source['id']),
@@ -387,90 +804,300 @@ class Model:
         })
 
     @classmethod
-    def delete_analysis_data(cls, model_id: str, data_ids: pd.DataFrame) -> None:
+    def delete_analysis_data(
+        cls,
+        model_id: str,
+        data_ids: Union[pd.DataFrame, Iterable[Any], str, 'os.PathLike[str]'],
+        chunk_size: int = 1_000_000,
+        progress: Optional[Callable[[int], None]] = None,
+        checkpoint: Optional[Union[str, 'os.PathLike[str]']] = None,
+    ) -> None:
         """Delete analysis data from a model.
 
+        Identifiers are streamed to NannyML Cloud in chunks of at most `chunk_size` rows, so very large deletions
+        don't need to fit in memory. Duplicate identifiers are dropped within each chunk. Identifiers repeated in
+        later chunks are sent again, deleting them again has no effect.
+
         Args:
             model_id: ID of the model.
-            data_ids: ID's for the data to be deleted.
+            data_ids: ID's for the data to be deleted. Either a dataframe, a path to a parquet file or an iterable of
+                values for the identifier column of the model.
+            chunk_size: Maximum number of ID's deleted per request.
+            progress: Optional callback that is called with the number of processed ID's after every chunk.
+            checkpoint: Optional path to a file tracking progress. If a deletion is interrupted, calling this method
+                again with the same arguments resumes after the last completed chunk. Resuming fails if the
+                identifiers don't match the ones processed before.
         """
         analysis_data_source, = cls._get_model_data_sources(model_id, frozendict({'name': 'analysis'}))
-        execute(_REMOVE_DATA_FROM_DATA_SOURCE, {
-            'input': {
-                'id': int(analysis_data_source['id']),
-                'dataIds': Data.upload(data_ids),
-            },
-        })
+        _delete_data_in_chunks(
+            analysis_data_source['id'], data_ids, lambda: cls._get_identifier_column(model_id, 'analysis'),
+            chunk_size, progress, checkpoint,
+        )
 
     @classmethod
-    def delete_analysis_target_data(cls, model_id: str, data_ids: pd.DataFrame) -> None:
+    def delete_analysis_target_data(
+        cls,
+        model_id: str,
+        data_ids: Union[pd.DataFrame, Iterable[Any], str, 'os.PathLike[str]'],
+        chunk_size: int = 1_000_000,
+        progress: Optional[Callable[[int], None]] = None,
+        checkpoint: Optional[Union[str, 'os.PathLike[str]']] = None,
+    ) -> None:
         """Delete target data from a model.
 
+        Identifiers are streamed to NannyML Cloud in chunks of at most `chunk_size` rows, so very large deletions
+        don't need to fit in memory. Duplicate identifiers are dropped within each chunk. Identifiers repeated in
+        later chunks are sent again, deleting them again has no effect.
+
         Args:
             model_id: ID of the model.
-            data_ids: ID's for the data to be deleted.
+            data_ids: ID's for the data to be deleted. Either a dataframe, a path to a parquet file or an iterable of
+                values for the identifier column of the model.
+            chunk_size: Maximum number of ID's deleted per request.
+            progress: Optional callback that is called with the number of processed ID's after every chunk.
+            checkpoint: Optional path to a file tracking progress. If a deletion is interrupted, calling this method
+                again with the same arguments resumes after the last completed chunk. Resuming fails if the
+                identifiers don't match the ones processed before.
         """
         target_data_source = cls._get_target_data_source(model_id)
-        execute(_REMOVE_DATA_FROM_DATA_SOURCE, {
-            'input': {
-                'id': int(target_data_source['id']),
-                'dataIds': Data.upload(data_ids),
-            },
-        })
+        _delete_data_in_chunks(
+            target_data_source['id'], data_ids, lambda: cls._get_identifier_column(model_id, 'target'),
+            chunk_size, progress, checkpoint,
+        )
 
     @classmethod
-    def get_reference_data_history(cls, model_id: str) -> List[DataSourceEvent]:
+    def get_reference_data_history(
+        cls,
+        model_id: str,
+        event_type: Optional[DataSourceEventType] = None,
+        caused_by_user_id: Optional[str] = None,
+        start: Optional[datetime.datetime] = None,
+        end: Optional[datetime.datetime] = None,
+    ) -> List[DataSourceEvent]:
         """Get reference data history for a model.
 
         Args:
             model_id: ID of the model.
+            event_type: Only include events of this type. Filtered by NannyML Cloud.
+            caused_by_user_id: Only include events caused by this user. Filtered by NannyML Cloud.
+            start: Only include events at or after this time.
+            end: Only include events before this time.
 
         Returns:
             List of events related to reference data for the model.
         """
-        return execute(_GET_MODEL_DATA_HISTORY, {
-            'modelId': int(model_id),
-            'dataSourceFilter': {'name': 'reference'},
-        })['monitoring_model']['dataSources'][0]['events']
+        data_source, = cls._get_data_history(model_id, 'reference', event_type, caused_by_user_id)
+        return _filter_events_by_time(data_source['events'], start, end)
 
     @classmethod
-    def get_analysis_data_history(cls, model_id: str) -> List[DataSourceEvent]:
+    def get_analysis_data_history(
+        cls,
+        model_id: str,
+        event_type: Optional[DataSourceEventType] = None,
+        caused_by_user_id: Optional[str] = None,
+        start: Optional[datetime.datetime] = None,
+        end: Optional[datetime.datetime] = None,
+    ) -> List[DataSourceEvent]:
         """Get analysis data history for a model.
 
         Args:
             model_id: ID of the model.
+            event_type: Only include events of this type. Filtered by NannyML Cloud.
+            caused_by_user_id: Only include events caused by this user. Filtered by NannyML Cloud.
+            start: Only include events at or after this time.
+            end: Only include events before this time.
 
         Returns:
             List of events related to analysis data for the model.
         """
-        return execute(_GET_MODEL_DATA_HISTORY, {
-            'modelId': int(model_id),
-            'dataSourceFilter': {'name': 'analysis'},
-        })['monitoring_model']['dataSources'][0]['events']
+        data_source, = cls._get_data_history(model_id, 'analysis', event_type, caused_by_user_id)
+        return _filter_events_by_time(data_source['events'], start, end)
 
     @classmethod
-    def get_analysis_target_data_history(cls, model_id: str) -> List[DataSourceEvent]:
+    def get_analysis_target_data_history(
+        cls,
+        model_id: str,
+        event_type: Optional[DataSourceEventType] = None,
+        caused_by_user_id: Optional[str] = None,
+        start: Optional[datetime.datetime] = None,
+        end: Optional[datetime.datetime] = None,
+    ) -> List[DataSourceEvent]:
         """Get target data history for a model.
 
         Args:
             model_id: ID of the model.
+            event_type: Only include events of this type. Filtered by NannyML Cloud.
+            caused_by_user_id: Only include events caused by this user. Filtered by NannyML Cloud.
+            start: Only include events at or after this time.
+            end: Only include events before this time.
 
         Returns:
             List of events related to target data for the model.
         """
+        data_source, = cls._get_data_history(model_id, 'target', event_type, caused_by_user_id)
+        return _filter_events_by_time(data_source['events'], start, end)
+
+    @classmethod
+    def get_combined_data_history(
+        cls,
+        model_id: str,
+        event_type: Optional[DataSourceEventType] = None,
+        caused_by_user_id: Optional[str] = None,
+        start: Optional[datetime.datetime] = None,
+        end: Optional[datetime.datetime] = None,
+    ) -> pd.DataFrame:
+        """Get the history of all data sources of a model in a single request.
+
+        Args:
+            model_id: ID of the model.
+            event_type: Only include events of this type. Filtered by NannyML Cloud.
+            caused_by_user_id: Only include events caused by this user. Filtered by NannyML Cloud.
+            start: Only include events at or after this time.
+            end: Only include events before this time.
+
+        Returns:
+            Dataframe with a row per event, sorted by timestamp. Columns are `dataSource` (the name of the data
+            source, e.g. `reference`, `analysis` or `target`), `id`, `eventType`, `timestamp` and `nrRows`.
+        """
+        return _history_to_frame({
+            data_source['name']: _filter_events_by_time(data_source['events'], start, end)
+            for data_source in cls._get_data_history(model_id, None, event_type, caused_by_user_id)
+        })
+
+    @staticmethod
+    def _get_data_history(
+        model_id: str,
+        data_source_name: Optional[str],
+        event_type: Optional[DataSourceEventType],
+        caused_by_user_id: Optional[str],
+    ) -> List[Dict[str, Any]]:
+        """Get data sources of a model including their (filtered) events"""
         return execute(_GET_MODEL_DATA_HISTORY, {
             'modelId': int(model_id),
-            'dataSourceFilter': {'name': 'target'},
-        })['monitoring_model']['dataSources'][0]['events']
+            'dataSourceFilter': {'name': data_source_name} if data_source_name else None,
+            'eventsFilter': _events_filter(event_type, caused_by_user_id),
+        })['monitoring_model']['dataSources']
+
+    @classmethod
+    def get_data_source_row_counts(
+        cls, name: Optional[str] = None, problem_type: Optional[ProblemType] = None
+    ) -> pd.DataFrame:
+        """Get the number of rows in every data source of all models in a single request.
+
+        Args:
+            name: Optional model name filter.
+            problem_type: Optional problem type filter.
+
+        Returns:
+            Dataframe with a row per data source and columns `modelId`, `modelName`, `dataSourceId`,
+            `dataSourceName` and `nrRows`.
+        """
+        models = execute(_GET_DATA_SOURCE_ROW_COUNTS, {
+            'filter': {
+                'name': name,
+                'problemType': problem_type,
+            }
+        })['monitoring_models']
+        return pd.DataFrame([
+            {
+                'modelId': model['id'],
+                'modelName': model['name'],
+                'dataSourceId': data_source['id'],
+                'dataSourceName': data_source['name'],
+                'nrRows': data_source['nrRows'],
+            }
+            for model in models for data_source in model['dataSources']
+        ], columns=['modelId', 'modelName', 'dataSourceId', 'dataSourceName', 'nrRows']).astype({'nrRows': 'Int64'})
+
+    @classmethod
+    def get_data_head(cls, model_id: str, data_source_name: str = 'analysis', nr_rows: int = 10) -> pd.DataFrame:
+        """Get the first rows stored in a data source of a model.
+
+        This allows verifying data after adding it without downloading it again. Columns are converted to the data
+        types stored for the data source.
+
+        Args:
+            model_id: ID of the model.
+            data_source_name: Name of the data source, e.g. `reference`, `analysis` or `target`.
+            nr_rows: Number of rows to get.
+
+        Returns:
+            The first rows of the data source.
+        """
+        data_sources = execute(_GET_MODEL_DATA_HEAD, {
+            'modelId': int(model_id),
+            'dataSourceFilter': {'name': data_source_name},
+            'nrRows': nr_rows,
+        })['monitoring_model']['dataSources']
+        if not data_sources:
+            raise InvalidOperationError(f"Model '{model_id}' has no {data_source_name} data source")
+
+        return _head_to_frame(data_sources[0]['head'], data_sources[0]['columns'])
+
+    @classmethod
+    def prefetch_data_sources(cls, model_ids: Sequence[str]) -> Dict[str, List[DataSourceSummary]]:
+        """Load data sources of many models into the metadata cache using batched requests.
+
+        Methods that add or remove data look up the data sources of a model first. Prefetching avoids a separate
+        request per model when working with many models.
+
+        Args:
+            model_ids: IDs of the models.
+
+        Returns:
+            Data sources per model ID. Models that don't exist are not included.
+        """
+        models = execute_batched(
+            'query', _PREFETCH_MODEL_DATA_SOURCES_SELECTION, {'modelId': 'Int!'},
+            [{'modelId': int(model_id)} for model_id in model_ids], DATA_SOURCE_SUMMARY_FRAGMENT,
+        )
+        data_sources = {}
+        for model in filter(None, models):
+            model_id = str(model['id'])
+            data_sources[model_id] = model['dataSources']
+            metadata_cache.set(('MONITORING', model_id, None), model['dataSources'])
+            for name in {'reference', 'analysis', 'target'} | {source['name'] for source in model['dataSources']}:
+                metadata_cache.set(
+                    ('MONITORING', model_id, frozendict({'name': name})),
+                    [source for source in model['dataSources'] if source['name'] == name],
+                )
+
+        return data_sources
 
     @staticmethod
-    @functools.lru_cache(maxsize=128)
     def _get_model_data_sources(model_id: str, filter: Optional[DataSourceFilter] = None) -> List[DataSourceSummary]:
         """Get data sources for a model"""
-        return execute(_GET_MODEL_DATA_SOURCES, {
+        return metadata_cache.get(('MONITORING', str(model_id), filter), lambda: execute(_GET_MODEL_DATA_SOURCES, {
             'modelId': int(model_id),
             'filter': filter,
-        })['monitoring_model']['dataSources']
+        })['monitoring_model']['dataSources'])
+
+    @staticmethod
+    def _get_data_source_details(model_id: str, data_source_name: Optional[str] = None) -> List[DataSourceDetails]:
+        """Get the details, including columns, of the data sources of a model, optionally only those with a name"""
+        filter = frozendict({'name': data_source_name}) if data_source_name is not None else None
+        return metadata_cache.get(
+            ('MONITORING', str(model_id), 'details', filter),
+            lambda: execute(_GET_MODEL_DATA_SOURCE_DETAILS, {
+                'modelId': int(model_id),
+                'filter': filter,
+            })['monitoring_model']['dataSources'],
+        )
+
+    @classmethod
+    def _get_identifier_column(cls, model_id: str, data_source_name: str) -> str:
+        """Get the name of the identifier column of a data source"""
+        for data_source in cls._get_data_source_details(model_id, data_source_name):
+            for column in data_source['columns']:
+                if column['columnType'] == 'IDENTIFIER':
+                    return column['name']
+        raise InvalidOperationError(f"Model '{model_id}' has no identifier column in its {data_source_name} data")
+
+    @classmethod
+    def _validate_data(cls, model_id: str, data_source_name: str, data: pd.DataFrame) -> None:
+        """Check that data matches the columns of a data source"""
+        for data_source in cls._get_data_source_details(model_id, data_source_name):
+            _validate_data(data, data_source['columns'], data_source_name)
 
     @classmethod
     def _get_target_data_source(cls, model_id: str) -> DataSourceSummary:
@@ -499,3 +1126,24 @@ class Model:
             'modelId': int(model_id),
             'metricId': int(metric_id),
         })
+
+
+def _select_columns(data: pd.DataFrame, columns: List[ColumnDetails]) -> pd.DataFrame:
+    """Select the data of schema columns, matching column names after normalizing them"""
+    names = {normalize(str(name)): name for name in data.columns}
+    missing = [column['name'] for column in columns if column['name'] not in names]
+    if missing:
+        raise ValueError(f"Data is missing columns {', '.join(map(repr, missing))}")
+    return data[[names[column['name']] for column in columns]]
+
+
+def _bundle_json_default(value: Any) -> Any:
+    if isinstance(value, datetime.datetime):
+        return {_MODEL_BUNDLE_DATETIME_KEY: value.isoformat()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _bundle_object_hook(obj: Dict[str, Any]) -> Any:
+    if obj.keys() == {_MODEL_BUNDLE_DATETIME_KEY}:
+        return datetime.datetime.fromisoformat(obj[_MODEL_BUNDLE_DATETIME_KEY])
+    return obj
@@ -0,0 +1,528 @@
+import datetime
+import os
+import warnings
+from concurrent.futures import as_completed
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from gql import gql
+
+from ..client import execute, execute_batched, executor
+from ..errors import ApiError
+from .._typing import TypedDict
+from .configuration import _THRESHOLD_DETAILS_FRAGMENT, _THRESHOLD_FRAGMENT
+from .enums import AnalysisType, CalculatorType
+from .model import Model
+
+
+class Segment(TypedDict):
+    """Segment of the data a result was calculated for.
+
+    Attributes:
+        id: Unique identifier of the segment.
+        segmentColumnName: Name of the column the segment is derived from.
+        segment: Value of the segment column for this segment.
+    """
+    id: int
+    segmentColumnName: str
+    segment: str
+
+
+class TimeSeriesDataPoint(TypedDict):
+    """Value of a metric for a single chunk.
+
+    Attributes:
+        isAnalysis: Whether the chunk contains analysis data (as opposed to reference data).
+        startTimestamp: Start of the chunk.
+        endTimestamp: End of the chunk.
+        nrDataPoints: Number of rows in the chunk.
+        value: Value of the metric for the chunk.
+        samplingError: Sampling error of the metric for the chunk.
+        lowerConfidenceBound: Lower confidence bound of the metric value.
+        upperConfidenceBound: Upper confidence bound of the metric value.
+    """
+    isAnalysis: bool
+    startTimestamp: datetime.datetime
+    endTimestamp: datetime.datetime
+    nrDataPoints: int
+    value: Optional[float]
+    samplingError: Optional[float]
+    lowerConfidenceBound: Optional[float]
+    upperConfidenceBound: Optional[float]
+
+
+class TimeSeriesResult(TypedDict):
+    """Time series of a metric calculated for a model.
+
+    Attributes:
+        id: Unique identifier of the result.
+        modelId: ID of the model the result belongs to.
+        analysisType: Type of analysis that produced the result.
+        calculatorType: Calculator that produced the result.
+        segment: Segment the result was calculated for. This is ``None`` for results on all data.
+        tags: Tags attached to the result.
+        metricName: Name of the metric.
+        componentName: Name of the metric component, if the metric has multiple components.
+        columnName: Name of the column the metric was calculated for, if any.
+        columnNames: Names of the columns the metric was calculated for, if any.
+        data: Value of the metric per chunk.
+    """
+    id: str
+    modelId: int
+    analysisType: AnalysisType
+    calculatorType: CalculatorType
+    segment: Optional[Segment]
+    tags: List[str]
+    metricName: str
+    componentName: Optional[str]
+    columnName: Optional[str]
+    columnNames: Optional[List[str]]
+    data: List[TimeSeriesDataPoint]
+
+
+class ResultFilter(TypedDict, total=False):
+    """Filter for model results. Only results matching all provided criteria are returned."""
+    analysisTypes: List[AnalysisType]
+    calculatorTypes: List[CalculatorType]
+    metricNames: List[str]
+    componentNames: List[str]
+    columnNames: List[str]
+    tags: List[str]
+    segments: List[Optional[int]]
+
+
+_SEGMENT_FRAGMENT = f"""
+    fragment Segment on Segment {{
+        {' '.join(Segment.__required_keys__)}
+    }}
+"""
+
+_TIME_SERIES_DATA_POINT_FRAGMENT = f"""
+    fragment TimeSeriesDataPoint on TimeSeriesDataPoint {{
+        {' '.join(TimeSeriesDataPoint.__required_keys__)}
+    }}
+"""
+
+_TIME_SERIES_RESULT_FRAGMENT = """
+    fragment TimeSeriesResult on TimeSeriesResult {
+        id
+        modelId
+        analysisType
+        calculatorType
+        segment {
+            ...Segment
+        }
+        tags
+        metricName
+        componentName
+        columnName
+        columnNames
+        data {
+            ...TimeSeriesDataPoint
+        }
+    }
+""" + _SEGMENT_FRAGMENT + _TIME_SERIES_DATA_POINT_FRAGMENT
+
+_GET_MODEL_KPM_RESULTS = gql("""
+    query getModelKpmResults($modelId: Int!, $segments: [Int]) {
+        monitoring_model(id: $modelId) {
+            kpm {
+                results(segments: $segments) {
+                    ...TimeSeriesResult
+                }
+            }
+        }
+    }
+""" + _TIME_SERIES_RESULT_FRAGMENT)
+
+_GET_MODEL_RESULTS = gql("""
+    query getModelResults($modelId: Int!, $filter: [ModelResultsFilter!]) {
+        monitoring_model(id: $modelId) {
+            results(filter: $filter) {
+                __typename
+                ...TimeSeriesResult
+            }
+        }
+    }
+""" + _TIME_SERIES_RESULT_FRAGMENT)
+
+_EXPORT_MODEL_RESULTS_SELECTION = """
+    monitoring_model(id: $modelId) {
+        id
+        name
+        kpm {
+            results {
+                ...TimeSeriesResult
+            }
+        }
+        results(filter: $filter) {
+            __typename
+            ...TimeSeriesResult
+        }
+    }
+"""
+
+_FIND_BREACHES_SELECTION = """
+    monitoring_model(id: $modelId) {
+        id
+        name
+        results(filter: $filter) {
+            __typename
+            ... on TimeSeriesResult {
+                id
+                analysisType
+                calculatorType
+                segment {
+                    ...Segment
+                }
+                metricName
+                componentName
+                columnName
+                mean
+                stdev
+                config {
+                    lowerValueLimit
+                    upperValueLimit
+                    ...MetricThresholdConfig
+                }
+                data(filter: {periods: [ANALYSIS]}) {
+                    ...TimeSeriesDataPoint
+                }
+            }
+        }
+    }
+"""
+
+_FIND_BREACHES_FRAGMENTS = (
+    _SEGMENT_FRAGMENT + _TIME_SERIES_DATA_POINT_FRAGMENT + _THRESHOLD_FRAGMENT + _THRESHOLD_DETAILS_FRAGMENT
+)
+
+_MODEL_RESULTS_VARIABLES = {'modelId': 'Int!', 'filter': '[ModelResultsFilter!]'}
+
+_EXPORT_PART_FILE_NAME = 'part-0.parquet'
+
+# Explicit schema so partitions of models without any results can still be read together with the others
+_EXPORT_SCHEMA = pa.schema([
+    ('model_name', pa.string()),
+    ('result_id', pa.string()),
+    ('analysis_type', pa.string()),
+    ('calculator_type', pa.string()),
+    ('metric_name', pa.string()),
+    ('component_name', pa.string()),
+    ('column_name', pa.string()),
+    ('segment_id', pa.int64()),
+    ('segment_column_name', pa.string()),
+    ('segment', pa.string()),
+    ('is_kpm', pa.bool_()),
+    ('is_analysis', pa.bool_()),
+    ('start_timestamp', pa.timestamp('us', tz='UTC')),
+    ('end_timestamp', pa.timestamp('us', tz='UTC')),
+    ('nr_data_points', pa.int64()),
+    ('value', pa.float64()),
+    ('sampling_error', pa.float64()),
+    ('lower_confidence_bound', pa.float64()),
+    ('upper_confidence_bound', pa.float64()),
+])
+
+
+class Result:
+    """Operations for retrieving the results of monitoring runs."""
+
+    @classmethod
+    def get_kpm_results(cls, model_id: str, segments: Optional[List[Optional[int]]] = None) -> List[TimeSeriesResult]:
+        """Get the results of the key performance metric for a model.
+
+        Args:
+            model_id: ID of the model.
+            segments: Optional list of segment IDs to get results for. Use ``None`` within the list to include results
+                calculated on all data.
+
+        Returns:
+            Time series of the key performance metric for the model.
+        """
+        return execute(_GET_MODEL_KPM_RESULTS, {
+            'modelId': int(model_id),
+            'segments': segments,
+        })['monitoring_model']['kpm']['results']
+
+    @classmethod
+    def list(cls, model_id: str, filter: Optional[ResultFilter] = None) -> List[TimeSeriesResult]:
+        """List time series results for a model.
+
+        Args:
+            model_id: ID of the model.
+            filter: Optional filter for the results.
+
+        Returns:
+            Time series results of the model that match the filter. Distribution results are not included.
+        """
+        return _time_series_results(execute(_GET_MODEL_RESULTS, {
+            'modelId': int(model_id),
+            'filter': None if filter is None else [filter],
+        })['monitoring_model']['results'])
+
+    @classmethod
+    def export(
+        cls,
+        path: str,
+        model_ids: Optional[Sequence[str]] = None,
+        filter: Optional[ResultFilter] = None,
+        max_workers: int = 4,
+        batch_size: int = 10,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> List[str]:
+        """Export time series results of many models to a partitioned parquet dataset.
+
+        Results are fetched for `batch_size` models per request, with up to `max_workers` requests running
+        concurrently. Each model is written to its own partition `model_id=<id>` as soon as its results arrive, so
+        memory use is bounded by the batches in flight. Models that already have a partition are skipped, so an
+        interrupted export can be resumed by calling this method again with the same `path`.
+
+        Every row of the dataset holds the value of a metric for a single chunk. Results of the key performance metric
+        are marked in the `is_kpm` column. The dataset can be loaded using `pd.read_parquet(path)`.
+
+        Args:
+            path: Directory to write the dataset to.
+            model_ids: IDs of the models to export. Defaults to all monitoring models.
+            filter: Optional filter for the exported results. Results of the key performance metric are always
+                exported.
+            max_workers: Maximum number of concurrent requests.
+            batch_size: Number of models to fetch results for in a single request.
+            progress: Optional callback that is called with the number of processed models and the total number of
+                models each time a model has been processed.
+
+        Returns:
+            IDs of the models exported by this call, excluding models skipped because they were already exported.
+            Models whose results can't be fetched, e.g. because they don't exist, are skipped with a warning naming
+            them, so they are retried when the export is resumed.
+        """
+        if model_ids is None:
+            model_ids = [model['id'] for model in Model.list()]
+
+        pending = [model_id for model_id in map(str, model_ids) if not os.path.exists(_partition_file(path, model_id))]
+        done = len(model_ids) - len(pending)
+        if progress is not None:
+            progress(done, len(model_ids))
+
+        exported, failed = [], {}
+        for model_id, model in _fetch_model_results(
+            _EXPORT_MODEL_RESULTS_SELECTION, _TIME_SERIES_RESULT_FRAGMENT, pending, filter, max_workers, batch_size
+        ):
+            if isinstance(model, ApiError):
+                failed[model_id] = model
+            else:
+                _write_partition(path, model_id, _results_to_table(model))
+                exported.append(model_id)
+            done += 1
+            if progress is not None:
+                progress(done, len(model_ids))
+
+        _warn_failed_models(failed, 'exported')
+        return exported
+
+    @classmethod
+    def find_breaches(
+        cls,
+        model_ids: Optional[Sequence[str]] = None,
+        filter: Optional[ResultFilter] = None,
+        max_workers: int = 4,
+        batch_size: int = 10,
+    ) -> pd.DataFrame:
+        """Find all analysis chunks where a metric falls outside its threshold.
+
+        Results are fetched together with their metric configuration, using the same batching and concurrency as
+        [export][nannyml_cloud_sdk.monitoring.Result.export]. Thresholds are then evaluated locally for all results at
+        once. Segment thresholds take precedence over the threshold of the metric. Standard deviation thresholds are
+        relative to the mean and standard deviation of the metric on reference data. Thresholds are clipped to the
+        value limits of the metric.
+
+        Args:
+            model_ids: IDs of the models to scan. Defaults to all monitoring models.
+            filter: Optional filter for the scanned results.
+            max_workers: Maximum number of concurrent requests.
+            batch_size: Number of models to fetch results for in a single request.
+
+        Returns:
+            A frame with a row per breaching chunk, sorted by model, segment, metric and chunk. The `breach` column
+            indicates whether the value is `LOWER` or `UPPER` than the threshold. Models whose results can't be
+            fetched, e.g. because they don't exist, are skipped with a warning naming them.
+        """
+        if model_ids is None:
+            model_ids = [model['id'] for model in Model.list()]
+
+        models, failed = [], {}
+        for model_id, model in _fetch_model_results(
+            _FIND_BREACHES_SELECTION, _FIND_BREACHES_FRAGMENTS, list(map(str, model_ids)), filter, max_workers,
+            batch_size,
+        ):
+            if isinstance(model, ApiError):
+                failed[model_id] = model
+            else:
+                models.append(model)
+
+        _warn_failed_models(failed, 'scanned')
+        return _find_breaches(models)
+
+
+def _fetch_model_results(
+    selection: str,
+    fragments: str,
+    model_ids: Sequence[str],
+    filter: Optional[ResultFilter],
+    max_workers: int,
+    batch_size: int,
+) -> Iterator[Tuple[str, Union[Dict, ApiError]]]:
+    """Fetch results for batches of models concurrently, yielding models as soon as their batch completes
+
+    Models are yielded together with their ID. Models that can't be fetched, e.g. because they were deleted, are
+    yielded with the error that occurred instead, so they don't abort processing the other models.
+    """
+    batches = [model_ids[start:start + batch_size] for start in range(0, len(model_ids), batch_size)]
+    with executor(max_workers) as pool:
+        futures = {
+            pool.submit(
+                execute_batched, 'query', selection, _MODEL_RESULTS_VARIABLES,
+                [{'modelId': int(model_id), 'filter': None if filter is None else [filter]} for model_id in batch],
+                fragments, batch_size, return_errors=True,
+            ): batch
+            for batch in batches
+        }
+        for future in as_completed(futures):
+            yield from zip(futures[future], future.result())
+
+
+def _warn_failed_models(failed: Dict[str, ApiError], action: str) -> None:
+    """Warn about models whose results couldn't be fetched"""
+    if failed:
+        warnings.warn(f"Results of {len(failed)} models could not be {action}: " + ', '.join(
+            f"'{model_id}' ({error})" for model_id, error in failed.items()
+        ))
+
+
+def _time_series_results(results: List[Dict]) -> List[TimeSeriesResult]:
+    """Select time series results from a list of results of any type"""
+    return [result for result in results if result['__typename'] == 'TimeSeriesResult']
+
+
+def _results_to_table(model: Dict) -> pa.Table:
+    """Flatten results of a model into a frame with a row per metric value per chunk"""
+    kpm_results = model['kpm']['results']
+    kpm_result_ids = {result['id'] for result in kpm_results}
+    results = {result['id']: result for result in _time_series_results(model['results']) + kpm_results}
+
+    return pa.Table.from_pylist([
+        {
+            'model_name': model['name'],
+            'result_id': result['id'],
+            'analysis_type': result['analysisType'],
+            'calculator_type': result['calculatorType'],
+            'metric_name': result['metricName'],
+            'component_name': result['componentName'],
+            'column_name': result['columnName'],
+            'segment_id': result['segment']['id'] if result['segment'] else None,
+            'segment_column_name': result['segment']['segmentColumnName'] if result['segment'] else None,
+            'segment': result['segment']['segment'] if result['segment'] else None,
+            'is_kpm': result['id'] in kpm_result_ids,
+            'is_analysis': point['isAnalysis'],
+            'start_timestamp': point['startTimestamp'],
+            'end_timestamp': point['endTimestamp'],
+            'nr_data_points': point['nrDataPoints'],
+            'value': point['value'],
+            'sampling_error': point['samplingError'],
+            'lower_confidence_bound': point['lowerConfidenceBound'],
+            'upper_confidence_bound': point['upperConfidenceBound'],
+        }
+        for result in results.values()
+        for point in result['data']
+    ], schema=_EXPORT_SCHEMA)
+
+
+_BREACH_COLUMNS = [
+    'model_id', 'model_name', 'segment_id', 'segment_column_name', 'segment', 'analysis_type', 'calculator_type',
+    'metric_name', 'component_name', 'column_name', 'start_timestamp', 'end_timestamp', 'value', 'lower_threshold',
+    'upper_threshold', 'breach',
+]
+
+
+def _find_breaches(models: List[Dict]) -> pd.DataFrame:
+    """Evaluate thresholds for all data points of all results of the given models"""
+    results, points = [], []
+    for model in models:
+        for result in _time_series_results(model['results']):
+            segment = result['segment'] or {}
+            lower, upper = _threshold_bounds(result)
+            results.append((
+                str(model['id']), model['name'], segment.get('id'), segment.get('segmentColumnName'),
+                segment.get('segment'), result['analysisType'], result['calculatorType'], result['metricName'],
+                result['componentName'], result['columnName'], lower, upper, len(result['data']),
+            ))
+            points.extend(
+                (point['startTimestamp'], point['endTimestamp'], point['value']) for point in result['data']
+            )
+
+    result_columns = _BREACH_COLUMNS[:10] + ['lower_threshold', 'upper_threshold', 'nr_points']
+    results_df = pd.DataFrame.from_records(results, columns=result_columns)
+    df = results_df.loc[results_df.index.repeat(results_df['nr_points'])].reset_index(drop=True)
+    df[['start_timestamp', 'end_timestamp', 'value']] = pd.DataFrame.from_records(
+        points, columns=['start_timestamp', 'end_timestamp', 'value']
+    )
+    df['value'] = df['value'].astype('float64')
+
+    # Comparisons with missing values or thresholds are False, so those never breach
+    is_lower = (df['value'] < df['lower_threshold'].astype('float64')).to_numpy()
+    is_upper = (df['value'] > df['upper_threshold'].astype('float64')).to_numpy()
+    df['breach'] = np.select([is_lower, is_upper], ['LOWER', 'UPPER'], default='')
+
+    return (
+        df.loc[is_lower | is_upper, _BREACH_COLUMNS]
+        .sort_values(['model_id', 'segment_id', 'metric_name', 'component_name', 'column_name', 'start_timestamp'])
+        .reset_index(drop=True)
+    )
+
+
+def _threshold_bounds(result: Dict) -> tuple:
+    """Compute lower and upper threshold values for a result, ``None`` meaning there is no bound"""
+    config = result['config']
+    threshold = config['threshold']
+    if result['segment'] is not None:
+        threshold = next((
+            segment_threshold['threshold'] for segment_threshold in config['segmentThresholds']
+            if segment_threshold['segment']['id'] == result['segment']['id']
+            and segment_threshold['threshold'] is not None
+        ), threshold)
+
+    lower, upper = None, None
+    if threshold is None:
+        pass
+    elif threshold['__typename'] == 'ConstantThreshold':
+        lower, upper = threshold['lower'], threshold['upper']
+    elif result['mean'] is not None and result['stdev'] is not None:
+        if threshold['stdLowerMultiplier'] is not None:
+            lower = result['mean'] - threshold['stdLowerMultiplier'] * result['stdev']
+        if threshold['stdUpperMultiplier'] is not None:
+            upper = result['mean'] + threshold['stdUpperMultiplier'] * result['stdev']
+
+    if lower is not None and config['lowerValueLimit'] is not None:
+        lower = max(lower, config['lowerValueLimit'])
+    if upper is not None and config['upperValueLimit'] is not None:
+        upper = min(upper, config['upperValueLimit'])
+
+    return lower, upper
+
+
+def _partition_file(path: str, model_id: str) -> str:
+    return os.path.join(path, f'model_id={model_id}', _EXPORT_PART_FILE_NAME)
+
+
+def _write_partition(path: str, model_id: str, table: pa.Table) -> None:
+    """Write results of a model to its partition. The file only appears once it has been fully written."""
+    file_path = _partition_file(path, model_id)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+    # Hidden files are ignored when reading the dataset, so a partially written file is never picked up
+    tmp_file_path = os.path.join(os.path.dirname(file_path), f'.{_EXPORT_PART_FILE_NAME}.tmp')
+    pq.write_table(table, tmp_file_path)
+    os.replace(tmp_file_path, file_path)
@@ -0,0 +1,139 @@
+import threading
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from .._typing import TypedDict
+from ..data import _add_data_in_bulk, _split_by_model
+from .model import Model
+
+
+class RoutedDataResult(TypedDict):
+    """Outcome of routing the data for a single key to its model.
+
+    Attributes:
+        key: Value of the key column, i.e. the name of the model. ``None`` for rows with a missing key, which are
+            never added.
+        modelId: ID of the model the data was routed to, ``None`` if no model could be found.
+        nrRows: Number of rows for the key.
+        error: Description of the error if adding data failed, ``None`` if it succeeded.
+    """
+    key: Optional[str]
+    modelId: Optional[str]
+    nrRows: int
+    error: Optional[str]
+
+
+class DataRouter:
+    """Routes a stream of analysis data for many models to the right model.
+
+    Each row is routed to the model whose name matches the value of the key column. The router caches the mapping
+    from model name to model ID and from model ID to analysis data source ID, so the API is only queried for models
+    it hasn't seen before. Names that can't be resolved are not cached, so models created later are picked up. When
+    adding data for a model fails, its cached IDs are forgotten, so a model that was recreated under the same name is
+    resolved again.
+    """
+
+    def __init__(self, key_column: str = 'model_name', max_workers: int = 8, batch_size: int = 50):
+        """Create a new router.
+
+        Args:
+            key_column: Name of the column containing the model name. The column is removed before data is uploaded.
+            max_workers: Maximum number of concurrent uploads.
+            batch_size: Maximum number of models per batched request.
+        """
+        self.key_column = key_column
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self._model_ids: Dict[str, str] = {}
+        self._data_source_ids: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def route(self, data: pd.DataFrame) -> List[RoutedDataResult]:
+        """Add analysis data for many models, routing each row by the value of the key column.
+
+        The data is split by key in a single pass. Data for all resolved models is then uploaded concurrently and
+        added using batched mutations. A failure for one model does not affect the others.
+
+        Args:
+            data: Analysis data for any number of models.
+
+        Returns:
+            Outcome per key, in the order the keys appear in `data`.
+        """
+        frames = _split_by_model(data, self.key_column)
+        model_ids, errors = self._resolve_model_ids([key for key in frames if key is not None])
+        if None in frames:
+            errors[None] = f"Rows without a value for '{self.key_column}' can't be routed"
+        data_source_ids = self._resolve_data_source_ids(list(model_ids.values()))
+
+        results: Dict[Optional[str], RoutedDataResult] = {
+            key: {'key': key, 'modelId': model_ids.get(key), 'nrRows': len(frame), 'error': errors.get(key)}
+            for key, frame in frames.items()
+        }
+        routed = {model_ids[key]: frames[key] for key in model_ids}
+        keys_by_model_id = {model_id: key for key, model_id in model_ids.items()}
+
+        for outcome in _add_data_in_bulk(data_source_ids, routed, self.max_workers, self.batch_size):
+            key = keys_by_model_id[str(outcome['modelId'])]
+            results[key]['error'] = outcome['error']
+            if outcome['error'] is not None:
+                # The model or its data source may have been removed, so resolve both again next time
+                with self._lock:
+                    self._data_source_ids.pop(str(outcome['modelId']), None)
+                    self._model_ids.pop(key, None)
+
+        return list(results.values())
+
+    def invalidate(self) -> None:
+        """Forget all cached model and data source IDs."""
+        with self._lock:
+            self._model_ids.clear()
+            self._data_source_ids.clear()
+
+    def _resolve_model_ids(self, keys: Sequence[str]) -> Tuple[Dict[str, str], Dict[Optional[str], str]]:
+        """Get the model ID per key, and an error message per key that can't be resolved"""
+        with self._lock:
+            model_ids = {key: self._model_ids[key] for key in keys if key in self._model_ids}
+        unknown = [key for key in keys if key not in model_ids]
+        if not unknown:
+            return model_ids, {}
+
+        ids_by_name: Dict[str, List[str]] = {}
+        for model in Model.list():
+            ids_by_name.setdefault(model['name'], []).append(str(model['id']))
+
+        resolved: Dict[str, str] = {}
+        errors: Dict[Optional[str], str] = {}
+        for key in unknown:
+            ids = ids_by_name.get(key, [])
+            if len(ids) == 1:
+                resolved[key] = ids[0]
+            elif ids:
+                errors[key] = f"Multiple models are named '{key}'"
+            else:
+                errors[key] = f"No model is named '{key}'"
+
+        with self._lock:
+            self._model_ids.update(resolved)
+        return {**model_ids, **resolved}, errors
+
+    def _resolve_data_source_ids(self, model_ids: Sequence[str]) -> Mapping[str, Optional[str]]:
+        """Get the ID of the analysis data source per model, loading unknown ones in a single batched request"""
+        with self._lock:
+            data_source_ids = {
+                model_id: self._data_source_ids[model_id] for model_id in model_ids if model_id in self._data_source_ids
+            }
+        unknown = [model_id for model_id in model_ids if model_id not in data_source_ids]
+        if not unknown:
+            return data_source_ids
+
+        resolved = {}
+        for model_id, sources in Model.prefetch_data_sources(unknown).items():
+            analysis_id = next((source['id'] for source in sources if source['name'] == 'analysis'), None)
+            if analysis_id is not None:
+                resolved[model_id] = analysis_id
+
+        with self._lock:
+            self._data_source_ids.update(resolved)
+        return {**data_source_ids, **resolved}
@@ -1,10 +1,16 @@
 import datetime
-from typing import Optional
+import time
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Sequence, Union
 
+import pandas as pd
 from gql import gql
 
-from ..client import execute
-from ..enums import RunState
+from ..client import execute, execute_batched
+from ..errors import ApiError, RunTimeoutError
+from ..run import _cancel_active_runs, _get_run_log, _iter_run_events, _tail_run_log, _wait_for_run
+from ..enums import RunEventType, RunState
+from .enums import CalculatorType
 from .._typing import TypedDict
 
 
@@ -27,12 +33,87 @@ class RunSummary(TypedDict):
     ranSuccessfully: Optional[bool]
 
 
+class RunEvent(TypedDict):
+    """Event recorded while a run is scheduled or active.
+
+    Attributes:
+        id: Identifier of the event. Identifiers increase as events are recorded.
+        eventType: Type of the event.
+        calculator: Calculator the event relates to, ``None`` for events about the run as a whole.
+        ranSuccessfully: Whether the run completed successfully. Only set for `COMPLETED` events.
+        scheduledFor: Date and time the run was scheduled to start. Only set for `SCHEDULED` events.
+        currentStep: Number of the current step. Only set for `PROGRESS` events.
+        nrSteps: Total number of steps. Only set for `PROGRESS` events.
+        description: Description of the event, e.g. a warning or error message.
+        timestamp: Date and time the event was recorded.
+    """
+    id: int
+    eventType: RunEventType
+    calculator: Optional[CalculatorType]
+    ranSuccessfully: Optional[bool]
+    scheduledFor: Optional[datetime.datetime]
+    currentStep: Optional[int]
+    nrSteps: Optional[int]
+    description: Optional[str]
+    timestamp: datetime.datetime
+
+
+class RunBatchResult(TypedDict):
+    """Outcome of a run that was triggered as part of a [RunBatch][nannyml_cloud_sdk.monitoring.RunBatch].
+
+    Attributes:
+        modelId: ID of the model.
+        run: Summary information for the completed run. This is ``None`` if the run could not be started.
+        duration: Number of seconds between the start and completion of the run, ``None`` if unknown.
+        error: Description of the error if the run could not be started or tracked, ``None`` otherwise. Check
+            `run['ranSuccessfully']` for the outcome of the run itself.
+    """
+    modelId: str
+    run: Optional[RunSummary]
+    duration: Optional[float]
+    error: Optional[str]
+
+
+class RunLog(TypedDict):
+    """Part of the log of a run.
+
+    Attributes:
+        runId: ID of the run.
+        state: State of the run when the log was retrieved. The log is complete once the state is `COMPLETED`.
+        log: Text of the log from the requested offset onwards.
+        offset: Offset to request the next part of the log from, i.e. the length of the log when it was retrieved.
+    """
+    runId: str
+    state: RunState
+    log: str
+    offset: int
+
+
+class RunCancellationResult(TypedDict):
+    """Outcome of cancelling the active run of a model.
+
+    Attributes:
+        modelId: ID of the model.
+        run: Summary information for the cancelled run. This is ``None`` if cancelling failed.
+        error: Description of the error if cancelling failed, ``None`` otherwise.
+    """
+    modelId: str
+    run: Optional[RunSummary]
+    error: Optional[str]
+
+
 RUN_SUMMARY_FRAGMENT = f"""
     fragment RunSummary on Run {{
         {' '.join(RunSummary.__required_keys__)}
     }}
 """
 
+RUN_EVENT_FRAGMENT = f"""
+    fragment RunEvent on RunEvent {{
+        {' '.join(RunEvent.__required_keys__)}
+    }}
+"""
+
 _START_RUN = gql("""
     mutation startRun($modelId: Int!) {
         start_monitoring_model_run(modelId: $modelId) {
@@ -42,6 +123,146 @@ _START_RUN = gql("""
 """ + RUN_SUMMARY_FRAGMENT)
 
 
+_GET_LATEST_RUN = gql("""
+    query getLatestRun($modelId: Int!) {
+        monitoring_model(id: $modelId) {
+            latestRun {
+                ...RunSummary
+            }
+        }
+    }
+""" + RUN_SUMMARY_FRAGMENT)
+
+_GET_RUNS = gql("""
+    query getRuns($modelId: Int!) {
+        monitoring_model(id: $modelId) {
+            runs {
+                ...RunSummary
+            }
+        }
+    }
+""" + RUN_SUMMARY_FRAGMENT)
+
+
+_GET_LATEST_RUN_EVENTS = gql("""
+    query getLatestRunEvents($modelId: Int!) {
+        monitoring_model(id: $modelId) {
+            latestRun {
+                id
+                state
+                events {
+                    ...RunEvent
+                }
+            }
+        }
+    }
+""" + RUN_EVENT_FRAGMENT)
+
+_GET_RUN_EVENTS = gql("""
+    query getRunEvents($modelId: Int!) {
+        monitoring_model(id: $modelId) {
+            runs {
+                id
+                state
+                events {
+                    ...RunEvent
+                }
+            }
+        }
+    }
+""" + RUN_EVENT_FRAGMENT)
+
+_GET_LATEST_RUN_LOG = gql("""
+    query getLatestRunLog($modelId: Int!) {
+        monitoring_model(id: $modelId) {
+            latestRun {
+                id
+                state
+                log
+            }
+        }
+    }
+""")
+
+_GET_RUN_LOGS = gql("""
+    query getRunLogs($modelId: Int!) {
+        monitoring_model(id: $modelId) {
+            runs {
+                id
+                state
+                log
+            }
+        }
+    }
+""")
+
+_CANCEL_RUN_SELECTION = """
+    stop_monitoring_model_run(modelId: $modelId) {
+        ...RunSummary
+    }
+"""
+
+_CANCEL_RUN = gql("""
+    mutation cancelRun($modelId: Int!) {
+        """ + _CANCEL_RUN_SELECTION + """
+    }
+""" + RUN_SUMMARY_FRAGMENT)
+
+_LIST_LATEST_RUNS = gql("""
+    query listLatestRuns {
+        monitoring_models {
+            id
+            latestRun {
+                ...RunSummary
+            }
+        }
+    }
+""" + RUN_SUMMARY_FRAGMENT)
+
+_START_RUN_SELECTION = """
+    start_monitoring_model_run(modelId: $modelId) {
+        ...RunSummary
+    }
+"""
+
+_GET_LATEST_RUN_SELECTION = """
+    monitoring_model(id: $modelId) {
+        latestRun {
+            ...RunSummary
+        }
+    }
+"""
+
+_GET_RUNS_SELECTION = """
+    monitoring_model(id: $modelId) {
+        runs {
+            ...RunSummary
+        }
+    }
+"""
+
+_GET_RUN_PROFILES = gql("""
+    query getRunProfiles($modelId: Int!) {
+        monitoring_model(id: $modelId) {
+            runs {
+                ...RunSummary
+                events {
+                    ...RunEvent
+                }
+            }
+        }
+    }
+""" + RUN_SUMMARY_FRAGMENT + RUN_EVENT_FRAGMENT)
+
+_CALCULATOR_PROFILE_COLUMNS = [
+    'runId', 'calculator', 'start', 'end', 'duration', 'runDuration', 'share', 'nrEvents', 'nrWarnings', 'nrErrors'
+]
+
+_RUN_BATCH_SUMMARY_COLUMNS = [
+    'modelId', 'runId', 'ranSuccessfully', 'scheduledFor', 'startedAt', 'completedAt', 'duration', 'error'
+]
+
+
 class Run:
     """Operations for running NannyML model analysis."""
 
@@ -59,3 +280,428 @@ class Run:
             Summary information for the newly started run.
         """
         return execute(_START_RUN, {"modelId": int(model_id)})["start_monitoring_model_run"]
+
+    @classmethod
+    def wait(
+        cls,
+        model_id: str,
+        run_id: Optional[str] = None,
+        timeout: Optional[float] = None,
+        poll_interval: float = 2.0,
+        max_poll_interval: float = 30.0,
+    ) -> RunSummary:
+        """Wait for a run of a model to complete.
+
+        Only the state of the run is polled. Polling starts every `poll_interval` seconds and slows down while the
+        state of the run doesn't change, up to once every `max_poll_interval` seconds.
+
+        Args:
+            model_id: The ID of the model.
+            run_id: The ID of the run to wait for, e.g. as returned by
+                [trigger][nannyml_cloud_sdk.monitoring.Run.trigger]. Defaults to the latest run of the model.
+            timeout: Maximum number of seconds to wait. Waits indefinitely if not provided.
+            poll_interval: Initial number of seconds between checks of the run state.
+            max_poll_interval: Maximum number of seconds between checks of the run state.
+
+        Returns:
+            Summary information for the completed run. Use `ranSuccessfully` to check the outcome, it is false for
+            runs that failed or were cancelled.
+
+        Raises:
+            RunTimeoutError: If the run did not complete within `timeout` seconds.
+        """
+        return _wait_for_run(
+            lambda: execute(_GET_LATEST_RUN, {"modelId": int(model_id)})["monitoring_model"]["latestRun"],
+            lambda: execute(_GET_RUNS, {"modelId": int(model_id)})["monitoring_model"]["runs"],
+            run_id, timeout, poll_interval, max_poll_interval,
+        )
+
+    @classmethod
+    def iter_events(cls, model_id: str, run_id: Optional[str] = None, poll_interval: float = 5.0) -> Iterator[RunEvent]:
+        """Iterate over the events of a run as they are recorded.
+
+        The iterator yields events that were already recorded first, then polls for new events until the run has
+        completed. Stop iterating to stop polling, e.g. to cancel a run as soon as an error is reported.
+
+        Args:
+            model_id: The ID of the model.
+            run_id: The ID of the run. Defaults to the latest run of the model.
+            poll_interval: Number of seconds between checks for new events.
+
+        Returns:
+            Iterator over the events of the run, in the order they were recorded.
+        """
+        return _iter_run_events(
+            lambda: execute(_GET_LATEST_RUN_EVENTS, {"modelId": int(model_id)})["monitoring_model"]["latestRun"],
+            lambda: execute(_GET_RUN_EVENTS, {"modelId": int(model_id)})["monitoring_model"]["runs"],
+            run_id, poll_interval,
+        )
+
+    @classmethod
+    def get_log(cls, model_id: str, run_id: Optional[str] = None, offset: int = 0) -> RunLog:
+        """Get the log of a run.
+
+        Use the returned `offset` to get only the part of the log that was added since, e.g. to follow the log of an
+        active run. Logs of completed runs are cached on disk, in the directory configured by
+        `nannyml_cloud_sdk.log_cache_dir`, so they are only downloaded once.
+
+        Args:
+            model_id: The ID of the model.
+            run_id: The ID of the run. Defaults to the latest run of the model.
+            offset: Number of characters at the start of the log to skip.
+
+        Returns:
+            The log of the run from `offset` onwards.
+
+        Raises:
+            InvalidOperationError: If the model has no runs or the run doesn't exist.
+        """
+        return _get_run_log(  # type: ignore[return-value]
+            "MONITORING",
+            lambda: execute(_GET_LATEST_RUN_LOG, {"modelId": int(model_id)})["monitoring_model"]["latestRun"],
+            lambda: execute(_GET_RUN_LOGS, {"modelId": int(model_id)})["monitoring_model"]["runs"],
+            run_id, offset,
+        )
+
+    @classmethod
+    def iter_log(cls, model_id: str, run_id: Optional[str] = None, poll_interval: float = 5.0) -> Iterator[str]:
+        """Iterate over the log of a run as it is written.
+
+        The iterator yields the log written so far first, then polls for text added to the log until the run has
+        completed.
+
+        Args:
+            model_id: The ID of the model.
+            run_id: The ID of the run. Defaults to the latest run of the model.
+            poll_interval: Number of seconds between checks for new log text.
+
+        Returns:
+            Iterator over parts of the log, in the order they were written.
+        """
+        return _tail_run_log(
+            lambda run_id, offset: cls.get_log(model_id, run_id, offset),  # type: ignore[arg-type,return-value]
+            run_id, poll_interval,
+        )
+
+    @classmethod
+    def cancel(cls, model_id: str) -> RunSummary:
+        """Cancel the active run of a model.
+
+        Cancelling is not immediate. The run is in the `CANCELLING` state until it has stopped, see
+        [wait][nannyml_cloud_sdk.monitoring.Run.wait].
+
+        Args:
+            model_id: The ID of the model.
+
+        Returns:
+            Summary information for the cancelled run.
+        """
+        return execute(_CANCEL_RUN, {"modelId": int(model_id)})["stop_monitoring_model_run"]
+
+    @classmethod
+    def cancel_all_active(
+        cls, model_ids: Optional[Sequence[str]] = None, batch_size: int = 50
+    ) -> List[RunCancellationResult]:
+        """Cancel all scheduled and running runs, e.g. after triggering runs with bad data.
+
+        Active runs are found with a single request. They are then cancelled using batched requests, so the
+        runs of many models are cancelled together. A failure for one model does not affect the others.
+
+        Args:
+            model_ids: IDs of the models to cancel runs for. Defaults to all models.
+            batch_size: Maximum number of runs cancelled per request.
+
+        Returns:
+            A result per model that had an active run.
+        """
+        return _cancel_active_runs(  # type: ignore[return-value]
+            models=execute(_LIST_LATEST_RUNS)["monitoring_models"],
+            model_ids=model_ids,
+            id_key="modelId",
+            selection=_CANCEL_RUN_SELECTION,
+            variable_types={"modelId": "Int!"},
+            variables=lambda model_id, run: {"modelId": int(model_id)},
+            fragments=RUN_SUMMARY_FRAGMENT,
+            batch_size=batch_size,
+        )
+
+    @classmethod
+    def get_calculator_profile(
+        cls, model_id: str, run_ids: Optional[Sequence[str]] = None, last_n: int = 1
+    ) -> pd.DataFrame:
+        """Get the time spent per calculator in runs of a model, derived from the events of the runs.
+
+        The time of a calculator is measured from its first event to the first event of the next calculator, or to the
+        completion of the run for the last calculator. Use the profile to find calculators that dominate run time, e.g.
+        to disable them in the [RuntimeConfiguration][nannyml_cloud_sdk.monitoring.RuntimeConfiguration].
+
+        Args:
+            model_id: The ID of the model.
+            run_ids: IDs of the runs to profile. Defaults to the `last_n` completed runs.
+            last_n: Number of most recently completed runs to profile if no `run_ids` are provided.
+
+        Returns:
+            Dataframe with a row per run and calculator and columns `runId`, `calculator`, `start`, `end`, `duration`
+            (seconds), `runDuration` (seconds), `share` (fraction of the run duration), `nrEvents`, `nrWarnings` and
+            `nrErrors`. Rows are sorted by run, then by decreasing duration.
+        """
+        runs = execute(_GET_RUN_PROFILES, {"modelId": int(model_id)})["monitoring_model"]["runs"]
+        if run_ids is not None:
+            selected = {str(run_id) for run_id in run_ids}
+            runs = [run for run in runs if str(run["id"]) in selected]
+        else:
+            completed = [run for run in runs if run["state"] == "COMPLETED" and run["completedAt"] is not None]
+            runs = sorted(completed, key=lambda run: run["completedAt"])[-last_n:]
+
+        return _calculator_profile(runs)
+
+    @classmethod
+    def compare_calculator_profiles(cls, model_id: str, last_n: int = 5) -> pd.DataFrame:
+        """Compare the time spent per calculator across the most recent runs of a model.
+
+        This shows the effect of configuration changes on the run time of each calculator.
+
+        Args:
+            model_id: The ID of the model.
+            last_n: Number of most recently completed runs to compare.
+
+        Returns:
+            Dataframe with the duration in seconds per calculator (rows) and run (columns), in the order the runs
+            completed. The last row, `TOTAL`, contains the duration of each run.
+        """
+        profile = cls.get_calculator_profile(model_id, last_n=last_n)
+        run_ids = list(dict.fromkeys(profile['runId']))
+        comparison = profile.pivot(index='calculator', columns='runId', values='duration').reindex(columns=run_ids)
+        comparison.loc['TOTAL'] = profile.groupby('runId', sort=False)['runDuration'].first()
+        return comparison
+
+    @classmethod
+    def trigger_many(
+        cls, model_ids: Sequence[str], max_in_flight: int = 10, poll_interval: float = 5.0, batch_size: int = 50
+    ) -> 'RunBatch':
+        """Trigger runs for many models, limiting the number of runs that are active at the same time.
+
+        Args:
+            model_ids: IDs of the models to run.
+            max_in_flight: Maximum number of runs that are scheduled or running at the same time. Runs for the
+                remaining models are started as earlier runs complete.
+            poll_interval: Number of seconds between checks of the run states.
+            batch_size: Maximum number of models per batched request.
+
+        Returns:
+            A batch that tracks all runs. Iterate over it to wait for runs as they complete.
+        """
+        return RunBatch(model_ids, max_in_flight, poll_interval, batch_size)
+
+
+class RunBatch:
+    """Runs for many models that are started and tracked together.
+
+    Runs are started and polled using batched requests, so tracking hundreds of runs takes a single request per poll.
+    The first runs are started when the batch is created. Iterating over the batch starts the remaining runs as slots
+    free up and yields a result as each run completes.
+    """
+
+    def __init__(
+        self, model_ids: Sequence[str], max_in_flight: int = 10, poll_interval: float = 5.0, batch_size: int = 50
+    ):
+        """Create a batch and start the first runs.
+
+        Args:
+            model_ids: IDs of the models to run.
+            max_in_flight: Maximum number of runs that are scheduled or running at the same time.
+            poll_interval: Number of seconds between checks of the run states.
+            batch_size: Maximum number of models per batched request.
+        """
+        self.max_in_flight = max_in_flight
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self._pending = deque(str(model_id) for model_id in model_ids)
+        self._in_flight: Dict[str, str] = {}
+        self._results: List[RunBatchResult] = []
+        self._failed_starts = self._start_runs()
+
+    def __iter__(self) -> Iterator[RunBatchResult]:
+        return self.as_completed()
+
+    def as_completed(self, timeout: Optional[float] = None) -> Iterator[RunBatchResult]:
+        """Wait for runs to complete, yielding results in the order runs complete.
+
+        Args:
+            timeout: Maximum number of seconds to wait for all runs. Waits indefinitely if not provided.
+
+        Raises:
+            RunTimeoutError: If not all runs completed within `timeout` seconds. Runs that did not complete yet can be
+                awaited by iterating over the batch again.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            finished, self._failed_starts = self._failed_starts, []
+            finished += self._poll_runs()
+            finished += self._start_runs()
+            for result in finished:
+                self._results.append(result)
+                yield result
+
+            if not self._in_flight and not self._pending:
+                return
+            if finished:
+                continue
+            if deadline is not None and time.monotonic() >= deadline:
+                raise RunTimeoutError(f"{len(self._in_flight) + len(self._pending)} runs did not complete in time")
+            time.sleep(self.poll_interval)
+
+    def wait(self, timeout: Optional[float] = None) -> pd.DataFrame:
+        """Wait for all runs to complete.
+
+        Args:
+            timeout: Maximum number of seconds to wait for all runs. Waits indefinitely if not provided.
+
+        Returns:
+            Summary of all runs, see [summary][nannyml_cloud_sdk.monitoring.RunBatch.summary].
+        """
+        for _ in self.as_completed(timeout):
+            pass
+        return self.summary()
+
+    def summary(self) -> pd.DataFrame:
+        """Summarize the runs that completed so far.
+
+        Returns:
+            Dataframe with a row per completed run and columns `modelId`, `runId`, `ranSuccessfully`, `scheduledFor`,
+            `startedAt`, `completedAt`, `duration` (in seconds) and `error`.
+        """
+        return pd.DataFrame([
+            {
+                'modelId': result['modelId'],
+                'runId': result['run']['id'] if result['run'] else None,
+                'ranSuccessfully': result['run']['ranSuccessfully'] if result['run'] else False,
+                'scheduledFor': result['run']['scheduledFor'] if result['run'] else None,
+                'startedAt': result['run']['startedAt'] if result['run'] else None,
+                'completedAt': result['run']['completedAt'] if result['run'] else None,
+                'duration': result['duration'],
+                'error': result['error'],
+            }
+            for result in self._results
+        ], columns=_RUN_BATCH_SUMMARY_COLUMNS)
+
+    def _start_runs(self) -> List[RunBatchResult]:
+        """Start runs for pending models while there are free slots, returning results for runs that failed to start"""
+        nr_runs = min(self.max_in_flight - len(self._in_flight), len(self._pending))
+        model_ids = [self._pending.popleft() for _ in range(max(nr_runs, 0))]
+        runs = execute_batched(
+            'mutation', _START_RUN_SELECTION, {'modelId': 'Int!'},
+            [{'modelId': int(model_id)} for model_id in model_ids], RUN_SUMMARY_FRAGMENT, self.batch_size,
+            return_errors=True,
+        )
+
+        failed: List[RunBatchResult] = []
+        for model_id, run in zip(model_ids, runs):
+            if isinstance(run, ApiError):
+                failed.append({'modelId': model_id, 'run': None, 'duration': None, 'error': str(run)})
+            else:
+                self._in_flight[model_id] = str(run['id'])
+        return failed
+
+    def _poll_runs(self) -> List[RunBatchResult]:
+        """Check the state of all active runs, returning results for runs that completed"""
+        finished: List[RunBatchResult] = []
+        for model_id, run in _get_tracked_runs(self._in_flight, self.batch_size).items():
+            if isinstance(run, ApiError):
+                finished.append({'modelId': model_id, 'run': None, 'duration': None, 'error': str(run)})
+                del self._in_flight[model_id]
+            elif run['state'] == 'COMPLETED':
+                finished.append({'modelId': model_id, 'run': run, 'duration': _duration(run), 'error': None})
+                del self._in_flight[model_id]
+
+        return finished
+
+
+def _get_tracked_runs(run_ids: Dict[str, str], batch_size: int) -> Dict[str, Union[RunSummary, ApiError]]:
+    """Get the current summary of a run per model, or the error that occurred looking it up
+
+    The latest runs of all models are requested using batched requests. Only runs that have been superseded by a newer
+    run are looked up in the list of all runs of their model.
+
+    Args:
+        run_ids: ID of the run to look up per model ID.
+        batch_size: Maximum number of models per batched request.
+    """
+    model_ids = list(run_ids)
+    models = execute_batched(
+        'query', _GET_LATEST_RUN_SELECTION, {'modelId': 'Int!'},
+        [{'modelId': int(model_id)} for model_id in model_ids], RUN_SUMMARY_FRAGMENT, batch_size,
+        return_errors=True,
+    )
+
+    runs: Dict[str, Union[RunSummary, ApiError]] = {}
+    superseded = []
+    for model_id, model in zip(model_ids, models):
+        if isinstance(model, ApiError):
+            runs[model_id] = model
+        elif model['latestRun'] is not None and str(model['latestRun']['id']) == run_ids[model_id]:
+            runs[model_id] = model['latestRun']
+        else:
+            superseded.append(model_id)
+
+    # A newer run exists for these models, so look up the tracked runs in the lists of all runs
+    models = execute_batched(
+        'query', _GET_RUNS_SELECTION, {'modelId': 'Int!'},
+        [{'modelId': int(model_id)} for model_id in superseded], RUN_SUMMARY_FRAGMENT, batch_size,
+        return_errors=True,
+    )
+    for model_id, model in zip(superseded, models):
+        run_id = run_ids[model_id]
+        if isinstance(model, ApiError):
+            runs[model_id] = model
+            continue
+
+        run = next((run for run in model['runs'] if str(run['id']) == run_id), None)
+        runs[model_id] = ApiError(f"Run '{run_id}' does not exist") if run is None else run
+
+    return runs
+
+
+def _calculator_profile(runs: List[Dict]) -> pd.DataFrame:
+    """Derive the time spent per calculator from the events of runs"""
+    events = pd.DataFrame(
+        [
+            {**event, 'runId': str(run['id'])}
+            for run in runs for event in run['events'] if event['calculator'] is not None
+        ],
+        columns=['runId', 'calculator', 'eventType', 'timestamp'],
+    )
+    events['timestamp'] = pd.to_datetime(events['timestamp'], utc=True)
+    events['isWarning'] = events['eventType'] == 'WARNING'
+    events['isError'] = events['eventType'].isin(['ERROR', 'TIMEOUT'])
+
+    profile = events.groupby(['runId', 'calculator'], sort=False).agg(
+        start=('timestamp', 'min'),
+        lastEvent=('timestamp', 'max'),
+        nrEvents=('eventType', 'size'),
+        nrWarnings=('isWarning', 'sum'),
+        nrErrors=('isError', 'sum'),
+    ).reset_index().sort_values(['runId', 'start'], kind='stable')
+
+    # A calculator runs until the next one starts, the last one until the run completes. Fall back to the last event
+    # of the calculator for runs that have not completed.
+    completed_at = pd.to_datetime(
+        profile['runId'].map({str(run['id']): run['completedAt'] for run in runs}), utc=True
+    )
+    profile['end'] = profile.groupby('runId')['start'].shift(-1).fillna(completed_at).fillna(profile['lastEvent'])
+    profile['duration'] = (profile['end'] - profile['start']).dt.total_seconds()
+    run_durations = {str(run['id']): _duration(run) for run in runs}
+    profile['runDuration'] = profile['runId'].map(run_durations).astype('float64')
+    profile['share'] = profile['duration'] / profile['runDuration']
+
+    run_order = {run_id: i for i, run_id in enumerate(run_durations)}
+    profile = profile.sort_values(
+        ['runId', 'duration'], key=lambda column: column.map(run_order) if column.name == 'runId' else -column
+    )
+    return profile[_CALCULATOR_PROFILE_COLUMNS].reset_index(drop=True)
+
+
+def _duration(run: RunSummary) -> Optional[float]:
+    if run['startedAt'] is None or run['completedAt'] is None:
+        return None
+    return (run['completedAt'] - run['startedAt']).total_seconds()
@@ -1,11 +1,16 @@
-from typing import Dict, Literal, Optional, Union, cast, overload, Collection
+import os
+from typing import Dict, List, Literal, Optional, Union, cast, overload, Collection
 
 import pandas as pd
+import pyarrow as pa
 
-from ..client import execute
-from ..data import ColumnDetails, Data
-from ..enums import ColumnType, FeatureType, ProblemType
-from ..schema import INSPECT_SCHEMA, normalize, BaseSchema
+from .._typing import TypedDict
+from ..data import ColumnDetails
+from ..enums import ColumnType, FeatureType, ProblemType, SamplingStrategy, SchemaChangeType, SchemaInference
+from ..schema import (
+    normalize, BaseSchema, _ColumnIndex, _dtype_kind, _infer_columns, _inspect_columns, _inspect_parquet,
+    _profile_arrow_schema, _sample_rows,
+)
 
 
 class ModelSchema(BaseSchema):
@@ -13,6 +18,28 @@ class ModelSchema(BaseSchema):
     problemType: ProblemType
 
 
+class SchemaChange(TypedDict):
+    """Difference in a single column between two schemas.
+
+    Attributes:
+        name: Name of the column.
+        changeType: What changed about the column.
+        old: The column in the old schema, ``None`` if the column was added.
+        new: The column in the new schema, ``None`` if the column was removed.
+        compatible: Whether the change can be applied to an existing model, see
+            [Model.evolve_schema][nannyml_cloud_sdk.monitoring.Model.evolve_schema].
+    """
+    name: str
+    changeType: SchemaChangeType
+    old: Optional[ColumnDetails]
+    new: Optional[ColumnDetails]
+    compatible: bool
+
+
+# Column types that can be added to or changed in an existing model without affecting how other columns are analyzed
+_EVOLVABLE_COLUMN_TYPES = ('CONTINUOUS_FEATURE', 'CATEGORICAL_FEATURE', 'IGNORED')
+
+
 class Schema:
     """Operations for working with machine learning model schemas."""
 
@@ -33,6 +60,8 @@ class Schema:
         feature_columns: Dict[str, FeatureType] = ...,
         ignore_column_names: Union[str, Collection[str]] = ...,
         segment_column_names: Union[str, Collection[str]] = ...,
+        inference: SchemaInference = ...,
+        sampling: SamplingStrategy = ...,
     ) -> ModelSchema:
         """First"""
         pass
@@ -51,11 +80,12 @@ class Schema:
         feature_columns: Dict[str, FeatureType] = ...,
         ignore_column_names: Union[str, Collection[str]] = ...,
         segment_column_names: Union[str, Collection[str]] = ...,
-
+        inference: SchemaInference = ...,
+        sampling: SamplingStrategy = ...,
     ) -> ModelSchema:
         """Create a schema from a pandas dataframe.
 
-        Sends a sample of the dataframe to the NannyML Cloud API to inspect the schema. Heuristics are used to identify
+        Inspects a sample of the dataframe, by default using the NannyML Cloud API. Heuristics are used to identify
         what each column represents. The schema is then modified according to the provided arguments.
         """
         pass
@@ -73,10 +103,12 @@ class Schema:
         feature_columns: Dict[str, FeatureType] = {},
         ignore_column_names: Union[str, Collection[str]] = (),
         segment_column_names: Union[str, Collection[str]] = (),
+        inference: SchemaInference = 'SERVER',
+        sampling: SamplingStrategy = 'HEAD',
     ) -> ModelSchema:
         """Create a schema from a pandas dataframe.
 
-        Sends a sample of the dataframe to the NannyML Cloud API to inspect the schema. Heuristics are used to identify
+        Inspects a sample of the dataframe, by default using the NannyML Cloud API. Heuristics are used to identify
         what each column represents. The schema is then modified according to the provided arguments.
 
         Args:
@@ -101,41 +133,132 @@ class Schema:
             ignore_column_names: The names of columns to ignore.
             segment_column_names: The names of columns to mark as segment sources. Their values will be used
                 to segment the data. The column will keep its original type.
+            inference: Whether columns are inspected by the NannyML Cloud API (`SERVER`) or by local heuristics based
+                on column names, data types and value statistics (`LOCAL`). Local inference requires no requests, so it
+                is much faster when creating many schemas. Compare the results with server inference to validate them.
+            sampling: How the `INSPECT_DATA_FRAME_NR_ROWS` inspected rows are selected, see
+                [SamplingStrategy][nannyml_cloud_sdk.enums.SamplingStrategy]. Use another strategy than `HEAD` if the
+                first rows are not representative, e.g. because the data is sorted by time. `STRATIFIED` sampling
+                uses the timestamp column.
 
         Returns:
             The inspected schema with any modifications applied.
+
+        Note:
+            Columns inspected by the API are cached by column names and data types, so dataframes with the same layout
+            are only inspected once. Call `nannyml_cloud_sdk.cache.inspection_cache.clear()` to inspect them again.
         """
-        # Upload head of dataset than use API to inspect schema
-        upload = Data.upload(df.head(cls.INSPECT_DATA_FRAME_NR_ROWS))
-        schema = execute(INSPECT_SCHEMA, variable_values={
-            "input": {
-                "productType": 'MONITORING',
-                "problemType": problem_type,
-                "storageInfo": upload,
-            },
-        })['inspect_dataset']
-
-        # Problem type isn't included in API output, so we add it here
-        schema['problemType'] = problem_type
-
-        # Apply overrides
-        if target_column_name is not None:
-            schema = cls.set_target(schema, target_column_name)
-        if timestamp_column_name is not None:
-            schema = cls.set_timestamp(schema, timestamp_column_name)
-        if prediction_column_name is not None:
-            schema = cls.set_prediction(schema, prediction_column_name)
-        if prediction_score_column_name_or_mapping is not None:
-            schema = cls.set_prediction_score(schema, prediction_score_column_name_or_mapping)
-        if identifier_column_name is not None:
-            schema = cls.set_identifier(schema, identifier_column_name)
-        for column_name, feature_type in feature_columns.items():
-            schema = cls.set_feature(schema, column_name, feature_type)
-        schema = cls.set_ignored(schema, ignore_column_names)
-        for column_name in segment_column_names:
-            schema = cls.set_segment(schema, column_name)
+        sample = _sample_rows(df, cls.INSPECT_DATA_FRAME_NR_ROWS, sampling, timestamp_column_name)
+        schema: ModelSchema = {
+            'problemType': problem_type,
+            'columns': _inspect_columns(sample, 'MONITORING', problem_type, inference, cls.CATEGORICAL_DTYPES),
+        }
+
+        return cls._apply_overrides(
+            schema, target_column_name, timestamp_column_name, prediction_column_name,
+            prediction_score_column_name_or_mapping, identifier_column_name, feature_columns, ignore_column_names,
+            segment_column_names,
+        )
 
-        return schema
+    @classmethod
+    def from_parquet(
+        cls,
+        problem_type: ProblemType,
+        path: Union[str, 'os.PathLike[str]'],
+        target_column_name: Optional[str] = None,
+        timestamp_column_name: Optional[str] = None,
+        prediction_column_name: Optional[str] = None,
+        prediction_score_column_name_or_mapping: Optional[Union[str, Dict[str, str]]] = None,
+        identifier_column_name: Optional[str] = None,
+        feature_columns: Optional[Dict[str, FeatureType]] = None,
+        ignore_column_names: Union[str, Collection[str]] = (),
+        segment_column_names: Union[str, Collection[str]] = (),
+        inference: SchemaInference = 'LOCAL',
+    ) -> ModelSchema:
+        """Create a schema from a parquet file without loading its data.
+
+        Data types are read from the metadata in the file footer, together with column statistics such as null
+        counts. Values are only read for the first `INSPECT_DATA_FRAME_NR_ROWS` rows of columns that could be
+        identifiers, or of all columns when using server inference.
+
+        Args:
+            problem_type: The problem type of the model.
+            path: Path of the parquet file.
+            target_column_name: The name of the target column.
+            timestamp_column_name: The name of the timestamp column.
+            prediction_column_name: The name of the prediction column.
+            prediction_score_column_name_or_mapping: The name of the prediction score column, or a dict mapping class
+                names to prediction score column names for multiclass classification.
+            identifier_column_name: The name of the identifier column.
+            feature_columns: A dictionary specifying whether features are `CATEGORICAL` or `CONTINUOUS`.
+            ignore_column_names: The names of columns to ignore.
+            segment_column_names: The names of columns to mark as segment sources.
+            inference: Whether columns are inspected by local heuristics (`LOCAL`) or by the NannyML Cloud API
+                (`SERVER`).
+
+        Returns:
+            The inspected schema with any modifications applied. See
+            [from_df][nannyml_cloud_sdk.monitoring.Schema.from_df] for details on the modifications.
+        """
+        schema: ModelSchema = {
+            'problemType': problem_type,
+            'columns': _inspect_parquet(
+                path, 'MONITORING', problem_type, inference, cls.CATEGORICAL_DTYPES, cls.INSPECT_DATA_FRAME_NR_ROWS
+            ),
+        }
+        return cls._apply_overrides(
+            schema, target_column_name, timestamp_column_name, prediction_column_name,
+            prediction_score_column_name_or_mapping, identifier_column_name, feature_columns, ignore_column_names,
+            segment_column_names,
+        )
+
+    @classmethod
+    def from_arrow_schema(
+        cls,
+        problem_type: ProblemType,
+        arrow_schema: pa.Schema,
+        target_column_name: Optional[str] = None,
+        timestamp_column_name: Optional[str] = None,
+        prediction_column_name: Optional[str] = None,
+        prediction_score_column_name_or_mapping: Optional[Union[str, Dict[str, str]]] = None,
+        identifier_column_name: Optional[str] = None,
+        feature_columns: Optional[Dict[str, FeatureType]] = None,
+        ignore_column_names: Union[str, Collection[str]] = (),
+        segment_column_names: Union[str, Collection[str]] = (),
+    ) -> ModelSchema:
+        """Create a schema from an arrow schema, e.g. of a dataset that is too large to load.
+
+        Columns are inspected locally using their names and data types only. Specify the columns that can't be
+        identified by name.
+
+        Args:
+            problem_type: The problem type of the model.
+            arrow_schema: The arrow schema of the data.
+            target_column_name: The name of the target column.
+            timestamp_column_name: The name of the timestamp column.
+            prediction_column_name: The name of the prediction column.
+            prediction_score_column_name_or_mapping: The name of the prediction score column, or a dict mapping class
+                names to prediction score column names for multiclass classification.
+            identifier_column_name: The name of the identifier column.
+            feature_columns: A dictionary specifying whether features are `CATEGORICAL` or `CONTINUOUS`.
+            ignore_column_names: The names of columns to ignore.
+            segment_column_names: The names of columns to mark as segment sources.
+
+        Returns:
+            The inspected schema with any modifications applied. See
+            [from_df][nannyml_cloud_sdk.monitoring.Schema.from_df] for details on the modifications.
+        """
+        schema: ModelSchema = {
+            'problemType': problem_type,
+            'columns': _infer_columns(
+                _profile_arrow_schema(arrow_schema), 'MONITORING', problem_type, cls.CATEGORICAL_DTYPES
+            ),
+        }
+        return cls._apply_overrides(
+            schema, target_column_name, timestamp_column_name, prediction_column_name,
+            prediction_score_column_name_or_mapping, identifier_column_name, feature_columns, ignore_column_names,
+            segment_column_names,
+        )
 
     @classmethod
     def set_target(cls, schema: ModelSchema, column_name: str) -> ModelSchema:
@@ -149,13 +272,7 @@ class Schema:
         Returns:
             The modified schema.
         """
-        column_name = normalize(column_name)
-        for column in schema['columns']:
-            if column['name'] == column_name:
-                column['columnType'] = 'TARGET'
-            elif column['columnType'] == 'TARGET':
-                column['columnType'] = cls._guess_feature_type(column)
-
+        _ColumnIndex(schema).override(column_name, 'TARGET', cls._guess_feature_type)
         return schema
 
     @classmethod
@@ -173,17 +290,7 @@ class Schema:
         Returns:
             The modified schema.
         """
-        column_name = normalize(column_name)
-        for column in schema['columns']:
-            if column['name'] == column_name:
-                column['columnType'] = 'TIMESTAMP'
-
-                # Set appropriate datetime data type if not already set
-                if 'datetime' not in column['dataType']:
-                    column['dataType'] = 'datetime64[ns]'
-            elif column['columnType'] == 'TIMESTAMP':
-                column['columnType'] = cls._guess_feature_type(column)
-
+        cls._set_timestamp(_ColumnIndex(schema), column_name)
         return schema
 
     @classmethod
@@ -198,13 +305,7 @@ class Schema:
         Returns:
             The modified schema.
         """
-        column_name = normalize(column_name)
-        for column in schema['columns']:
-            if column['name'] == column_name:
-                column['columnType'] = 'PREDICTION'
-            elif column['columnType'] == 'PREDICTION':
-                column['columnType'] = cls._guess_feature_type(column)
-
+        _ColumnIndex(schema).override(column_name, 'PREDICTION', cls._guess_feature_type)
         return schema
 
     @classmethod
@@ -225,27 +326,7 @@ class Schema:
         Returns:
             The modified schema.
         """
-        if isinstance(column_name_or_mapping, str):
-            if schema['problemType'] == 'MULTICLASS_CLASSIFICATION':
-                raise ValueError('Must specify a dictionary of prediction score columns for multiclass classification')
-            column_name_or_mapping = {normalize(column_name_or_mapping): cast(str, None)}
-        elif schema['problemType'] != 'MULTICLASS_CLASSIFICATION':
-            raise ValueError(
-                'Must specify a single prediction score column name for binary classification and regression'
-            )
-        else:
-            column_name_or_mapping = {
-                normalize(column_name): class_name for (class_name, column_name) in column_name_or_mapping.items()
-            }
-
-        for column in schema['columns']:
-            if column['name'] in column_name_or_mapping:
-                column['columnType'] = 'PREDICTION_SCORE'
-                column['className'] = column_name_or_mapping[column['name']]
-            elif column['columnType'] == 'PREDICTION_SCORE':
-                column['columnType'] = cls._guess_feature_type(column)
-                column['className'] = None
-
+        cls._set_prediction_score(_ColumnIndex(schema), column_name_or_mapping)
         return schema
 
     @classmethod
@@ -260,12 +341,7 @@ class Schema:
         Returns:
             The modified schema.
         """
-        column_name = normalize(column_name)
-        for column in schema['columns']:
-            if column['name'] == column_name:
-                column['columnType'] = 'CATEGORICAL_FEATURE' if feature_type == 'CATEGORY' else 'CONTINUOUS_FEATURE'
-                break
-
+        cls._set_feature(_ColumnIndex(schema), column_name, feature_type)
         return schema
 
     @classmethod
@@ -279,14 +355,7 @@ class Schema:
         Returns:
             The modified schema.
         """
-        if isinstance(column_names, str):
-            column_names = (column_names,)
-        column_names = {normalize(column_name) for column_name in column_names}
-
-        for column in schema['columns']:
-            if column['name'] in column_names:
-                column['columnType'] = 'IGNORED'
-
+        cls._set_ignored(_ColumnIndex(schema), column_names)
         return schema
 
     @classmethod
@@ -301,13 +370,7 @@ class Schema:
         Returns:
             The modified schema.
         """
-        column_name = normalize(column_name)
-        for column in schema['columns']:
-            if column['name'] == column_name:
-                column['columnType'] = 'IDENTIFIER'
-            elif column['columnType'] == 'IDENTIFIER':
-                column['columnType'] = cls._guess_feature_type(column)
-
+        _ColumnIndex(schema).override(column_name, 'IDENTIFIER', cls._guess_feature_type)
         return schema
 
     @classmethod
@@ -321,13 +384,131 @@ class Schema:
         Returns:
             The modified schema.
         """
-        column_name = normalize(column_name)
-        for column in schema['columns']:
-            if column['name'] == column_name:
-                column['columnFlags'].append('SEGMENT')
+        cls._set_segments(_ColumnIndex(schema), column_name)
+        return schema
+
+    @classmethod
+    def diff(cls, old: BaseSchema, new: BaseSchema) -> List[SchemaChange]:
+        """Compare two schemas column by column.
+
+        Changes are compatible if they only add or change feature and ignored columns, and don't change data types in
+        a way that affects how data is read. A column can have multiple changes, e.g. both its column type and data
+        type.
+
+        Args:
+            old: The schema to compare against, e.g. the schema of an existing model.
+            new: The new schema.
+
+        Returns:
+            Changes of the columns in the new schema, in schema order, followed by the columns that were removed.
+        """
+        old_columns = {column['name']: column for column in old['columns']}
+        new_names = {column['name'] for column in new['columns']}
+
+        changes: List[SchemaChange] = []
+        for column in new['columns']:
+            name, previous = column['name'], old_columns.get(column['name'])
+            if previous is None:
+                changes.append(_change(name, 'ADDED', None, column, column['columnType'] in _EVOLVABLE_COLUMN_TYPES))
+                continue
+            if previous['columnType'] != column['columnType']:
+                compatible = {previous['columnType'], column['columnType']}.issubset(_EVOLVABLE_COLUMN_TYPES)
+                changes.append(_change(name, 'COLUMN_TYPE_CHANGED', previous, column, compatible))
+            if previous['dataType'] != column['dataType']:
+                compatible = _dtype_kind(previous['dataType']) == _dtype_kind(column['dataType'])
+                changes.append(_change(name, 'DATA_TYPE_CHANGED', previous, column, compatible))
+            if previous['className'] != column['className']:
+                changes.append(_change(name, 'CLASS_NAME_CHANGED', previous, column, False))
+
+        for column in old['columns']:
+            if column['name'] not in new_names:
+                changes.append(_change(column['name'], 'REMOVED', column, None, False))
+
+        return changes
+
+    @classmethod
+    def _apply_overrides(
+        cls,
+        schema: ModelSchema,
+        target_column_name: Optional[str],
+        timestamp_column_name: Optional[str],
+        prediction_column_name: Optional[str],
+        prediction_score_column_name_or_mapping: Optional[Union[str, Dict[str, str]]],
+        identifier_column_name: Optional[str],
+        feature_columns: Optional[Dict[str, FeatureType]],
+        ignore_column_names: Union[str, Collection[str]],
+        segment_column_names: Union[str, Collection[str]],
+    ) -> ModelSchema:
+        """Apply all overrides through a single index, so the columns are only scanned once"""
+        index = _ColumnIndex(schema)
+        if target_column_name is not None:
+            index.override(target_column_name, 'TARGET', cls._guess_feature_type)
+        if timestamp_column_name is not None:
+            cls._set_timestamp(index, timestamp_column_name)
+        if prediction_column_name is not None:
+            index.override(prediction_column_name, 'PREDICTION', cls._guess_feature_type)
+        if prediction_score_column_name_or_mapping is not None:
+            cls._set_prediction_score(index, prediction_score_column_name_or_mapping)
+        if identifier_column_name is not None:
+            index.override(identifier_column_name, 'IDENTIFIER', cls._guess_feature_type)
+        for column_name, feature_type in (feature_columns or {}).items():
+            cls._set_feature(index, column_name, feature_type)
+        cls._set_ignored(index, ignore_column_names)
+        cls._set_segments(index, segment_column_names)
 
         return schema
 
+    @classmethod
+    def _set_timestamp(cls, index: _ColumnIndex, column_name: str) -> None:
+        for column in index.override(column_name, 'TIMESTAMP', cls._guess_feature_type):
+            # Set appropriate datetime data type if not already set
+            if 'datetime' not in column['dataType']:
+                column['dataType'] = 'datetime64[ns]'
+
+    @classmethod
+    def _set_prediction_score(cls, index: _ColumnIndex, column_name_or_mapping: Union[str, Dict[str, str]]) -> None:
+        if isinstance(column_name_or_mapping, str):
+            if index.schema['problemType'] == 'MULTICLASS_CLASSIFICATION':  # type: ignore[typeddict-item]
+                raise ValueError('Must specify a dictionary of prediction score columns for multiclass classification')
+            column_name_or_mapping = {normalize(column_name_or_mapping): cast(str, None)}
+        elif index.schema['problemType'] != 'MULTICLASS_CLASSIFICATION':  # type: ignore[typeddict-item]
+            raise ValueError(
+                'Must specify a single prediction score column name for binary classification and regression'
+            )
+        else:
+            column_name_or_mapping = {
+                normalize(column_name): class_name for (class_name, column_name) in column_name_or_mapping.items()
+            }
+
+        for column in index.with_type('PREDICTION_SCORE'):
+            if column['name'] not in column_name_or_mapping:
+                index.set_type(column, cls._guess_feature_type(column))
+                column['className'] = None
+        for column_name, class_name in column_name_or_mapping.items():
+            for column in index.get(column_name):
+                index.set_type(column, 'PREDICTION_SCORE')
+                column['className'] = class_name
+
+    @classmethod
+    def _set_feature(cls, index: _ColumnIndex, column_name: str, feature_type: FeatureType) -> None:
+        column_type: ColumnType = 'CATEGORICAL_FEATURE' if feature_type == 'CATEGORY' else 'CONTINUOUS_FEATURE'
+        index.override(column_name, column_type, None)
+
+    @classmethod
+    def _set_ignored(cls, index: _ColumnIndex, column_names: Union[str, Collection[str]]) -> None:
+        if isinstance(column_names, str):
+            column_names = (column_names,)
+        for column_name in column_names:
+            index.override(column_name, 'IGNORED', None)
+
+    @classmethod
+    def _set_segments(cls, index: _ColumnIndex, column_names: Union[str, Collection[str]]) -> None:
+        if isinstance(column_names, str):
+            column_names = (column_names,)
+        for column_name in column_names:
+            for column in index.get(column_name):
+                column['columnFlags'].append('SEGMENT')
+
     @classmethod
     def _guess_feature_type(cls, column: ColumnDetails) -> ColumnType:
         """Guess feature type from column details."""
@@ -335,3 +516,13 @@ class Schema:
             'CATEGORICAL_FEATURE' if column['dataType'] in cls.CATEGORICAL_DTYPES
             else 'CONTINUOUS_FEATURE'
         )
+
+
+def _change(
+    name: str,
+    change_type: SchemaChangeType,
+    old: Optional[ColumnDetails],
+    new: Optional[ColumnDetails],
+    compatible: bool,
+) -> SchemaChange:
+    return {'name': name, 'changeType': change_type, 'old': old, 'new': new, 'compatible': compatible}
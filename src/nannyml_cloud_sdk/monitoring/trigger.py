@@ -0,0 +1,222 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .._typing import TypedDict
+from ..client import execute_batched
+from ..errors import ApiError
+from ..run import _ACTIVE_RUN_STATES
+from .model import Model
+from .run import RUN_SUMMARY_FRAGMENT, RunSummary, _GET_LATEST_RUN_SELECTION, _START_RUN_SELECTION
+
+_logger = logging.getLogger(__name__)
+
+
+class TriggerResult(TypedDict):
+    """Outcome of triggering a run for a model with new data.
+
+    Attributes:
+        modelId: ID of the model.
+        run: Summary information for the started run. This is ``None`` if the run could not be started.
+        error: Description of the error if the run could not be started, ``None`` otherwise.
+    """
+    modelId: str
+    run: Optional[RunSummary]
+    error: Optional[str]
+
+
+class DebouncedRunTrigger:
+    """Triggers a single run per model once new data has stopped arriving.
+
+    Report each addition of data with [notify][nannyml_cloud_sdk.monitoring.DebouncedRunTrigger.notify], or add data
+    through [add_analysis_data][nannyml_cloud_sdk.monitoring.DebouncedRunTrigger.add_analysis_data]. A run is
+    triggered for a model when no data was added for `quiet_period` seconds, when data has been waiting for
+    `max_delay` seconds, or when the trigger is flushed explicitly, e.g. at the end of a batch.
+
+    Runs are never triggered for a model that already has a scheduled or running run. The model stays pending instead,
+    so the new data is analyzed by a run triggered after the active run has completed.
+    """
+
+    def __init__(
+        self,
+        quiet_period: float = 300.0,
+        max_delay: Optional[float] = None,
+        batch_size: int = 50,
+        on_trigger: Optional[Callable[[List[TriggerResult]], None]] = None,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        """Create a new trigger.
+
+        Args:
+            quiet_period: Number of seconds without new data after which a run is triggered.
+            max_delay: Maximum number of seconds between the first addition of data and triggering a run, even if
+                data keeps arriving. Runs are only triggered after a quiet period if not provided.
+            batch_size: Maximum number of models per batched request.
+            on_trigger: Function called with the results whenever runs are triggered in the background, see
+                [start][nannyml_cloud_sdk.monitoring.DebouncedRunTrigger.start].
+            timer: Function returning the current time in seconds.
+        """
+        self.quiet_period = quiet_period
+        self.max_delay = max_delay
+        self.batch_size = batch_size
+        self.on_trigger = on_trigger
+        self._timer = timer
+        # Time data was first and last added per model since its last run was triggered
+        self._pending: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+
+    def __enter__(self) -> 'DebouncedRunTrigger':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop(flush=exc_type is None)
+
+    def notify(self, model_id: str) -> None:
+        """Record that data was added to a model.
+
+        Args:
+            model_id: ID of the model that data was added to.
+        """
+        now = self._timer()
+        with self._lock:
+            first, _ = self._pending.get(str(model_id), (now, now))
+            self._pending[str(model_id)] = (first, now)
+
+    def add_analysis_data(self, model_id: str, data: pd.DataFrame) -> None:
+        """Add analysis data to a model and record it, see
+        [Model.add_analysis_data][nannyml_cloud_sdk.monitoring.Model.add_analysis_data].
+
+        Args:
+            model_id: ID of the model.
+            data: Data to be added.
+        """
+        Model.add_analysis_data(model_id, data)
+        self.notify(model_id)
+
+    def pending(self) -> List[str]:
+        """Get the IDs of the models with data that no run was triggered for yet."""
+        with self._lock:
+            return list(self._pending)
+
+    def flush(self, force: bool = False) -> List[TriggerResult]:
+        """Trigger runs for all models that are due.
+
+        The latest runs of all due models are checked in a single batched request, and runs are started using
+        batched requests. Models with an active run stay pending. Models that fail are no longer pending, so they are
+        only retried once data is added again.
+
+        Args:
+            force: Trigger runs for all pending models, regardless of when data was last added.
+
+        Returns:
+            A result per model that a run was triggered for.
+        """
+        results, _ = self._flush(force)
+        return results
+
+    def _flush(self, force: bool) -> Tuple[List[TriggerResult], List[TriggerResult]]:
+        """Trigger runs for all models that are due, also returning a result per model skipped for an active run"""
+        now = self._timer()
+        with self._lock:
+            due = {model_id: times for model_id, times in self._pending.items() if force or self._is_due(times, now)}
+        if not due:
+            return [], []
+
+        models = execute_batched(
+            'query', _GET_LATEST_RUN_SELECTION, {'modelId': 'Int!'}, [{'modelId': int(model_id)} for model_id in due],
+            RUN_SUMMARY_FRAGMENT, self.batch_size, return_errors=True,
+        )
+        results: List[TriggerResult] = []
+        skipped: List[TriggerResult] = []
+        startable = []
+        for model_id, model in zip(due, models):
+            if isinstance(model, ApiError):
+                results.append({'modelId': model_id, 'run': None, 'error': str(model)})
+            elif model['latestRun'] is None or model['latestRun']['state'] not in _ACTIVE_RUN_STATES:
+                startable.append(model_id)
+            else:
+                skipped.append({
+                    'modelId': model_id,
+                    'run': model['latestRun'],
+                    'error': f"Run '{model['latestRun']['id']}' is still active, no run was triggered for the new data",
+                })
+
+        runs = execute_batched(
+            'mutation', _START_RUN_SELECTION, {'modelId': 'Int!'},
+            [{'modelId': int(model_id)} for model_id in startable], RUN_SUMMARY_FRAGMENT, self.batch_size,
+            return_errors=True,
+        )
+        for model_id, run in zip(startable, runs):
+            if isinstance(run, ApiError):
+                results.append({'modelId': model_id, 'run': None, 'error': str(run)})
+            else:
+                results.append({'modelId': model_id, 'run': run, 'error': None})
+
+        with self._lock:
+            for result in results:
+                # Data added while runs were being triggered may not be included, so keep the model pending
+                if self._pending.get(result['modelId']) == due[result['modelId']]:
+                    del self._pending[result['modelId']]
+        return results, skipped
+
+    def start(self, check_interval: float = 30.0) -> None:
+        """Start triggering runs in a background thread.
+
+        Args:
+            check_interval: Number of seconds between checks for models that are due.
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, args=(check_interval,), daemon=True)
+        self._thread.start()
+
+    def stop(self, flush: bool = True) -> List[TriggerResult]:
+        """Stop triggering runs in the background.
+
+        Args:
+            flush: Trigger runs for all pending models before returning.
+
+        Returns:
+            A result per pending model when flushing. Models that still have a scheduled or running run are included
+            with that run and an error, since no run was triggered for their new data. They stay pending, see
+            [pending][nannyml_cloud_sdk.monitoring.DebouncedRunTrigger.pending].
+
+        Raises:
+            ApiError: If triggering runs in the background failed.
+        """
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+        if not flush:
+            return []
+        results, skipped = self._flush(force=True)
+        return results + skipped
+
+    def _run(self, check_interval: float) -> None:
+        while not self._stop.wait(check_interval):
+            try:
+                results = self.flush()
+                if results and self.on_trigger is not None:
+                    self.on_trigger(results)
+            except Exception as error:  # noqa: BLE001 - also covers `on_trigger`, the error is re-raised by stop()
+                # Stop checking and surface the error when the trigger is stopped
+                _logger.exception("Triggering runs failed, runs are no longer triggered in the background")
+                self._error = error
+                return
+
+    def _is_due(self, times: Tuple[float, float], now: float) -> bool:
+        first, last = times
+        return now - last >= self.quiet_period or (self.max_delay is not None and now - first >= self.max_delay)
@@ -0,0 +1,264 @@
+import asyncio
+import hmac
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Mapping, Optional, Tuple
+from urllib.parse import urlparse
+
+from ..client import _REQUEST_ERRORS, executor
+from ..errors import ApiError, InvalidOperationError
+from .run import Run, RunSummary, _get_tracked_runs
+
+_logger = logging.getLogger(__name__)
+
+_HTTP_REASONS = {204: 'No Content', 400: 'Bad Request', 401: 'Unauthorized', 404: 'Not Found', 408: 'Request Timeout'}
+
+# Limits of webhook calls, which only need a few headers and a small body
+_MAX_LINE_SIZE = 8 * 1024
+_MAX_HEADER_LINES = 100
+_MAX_BODY_SIZE = 1024 * 1024
+
+
+class RunCompletionReceiver:
+    """Waits for runs to complete, checking runs when NannyML Cloud calls a webhook instead of polling continuously.
+
+    The receiver is a small HTTP server that runs on the asyncio event loop. Configure its address as the webhook in
+    the notification settings of NannyML Cloud. Every webhook call makes the receiver check all tracked runs at once
+    using batched requests, and resolve the futures of runs that completed. Calls that arrive while runs are being
+    checked are combined into a single check. If no webhook call arrives for `fallback_interval` seconds, the runs are
+    checked anyway, so runs complete even if a webhook call is missed.
+
+    Use the receiver as an async context manager, or call
+    [start][nannyml_cloud_sdk.monitoring.RunCompletionReceiver.start] and
+    [stop][nannyml_cloud_sdk.monitoring.RunCompletionReceiver.stop].
+    """
+
+    def __init__(
+        self,
+        host: str = '127.0.0.1',
+        port: int = 8080,
+        path: str = '/',
+        headers: Optional[Mapping[str, str]] = None,
+        fallback_interval: float = 300.0,
+        batch_size: int = 50,
+        request_timeout: float = 10.0,
+    ):
+        """Create a new receiver.
+
+        Args:
+            host: Host to listen on. Defaults to local connections only, use `0.0.0.0` to accept webhook calls from
+                other hosts.
+            port: Port to listen on. Use 0 to pick a free port, see
+                [port][nannyml_cloud_sdk.monitoring.RunCompletionReceiver.port].
+            path: Path webhook calls are sent to. Requests to other paths are rejected.
+            headers: Headers every webhook call must include, e.g. a secret configured as an additional header of the
+                webhook. Requests without these headers are rejected.
+            fallback_interval: Number of seconds without webhook calls after which runs are checked anyway.
+            batch_size: Maximum number of models per batched request.
+            request_timeout: Maximum number of seconds to receive a webhook call in. Slower requests are rejected.
+        """
+        self.host = host
+        self.path = path
+        self.headers = {key.lower(): value for key, value in (headers or {}).items()}
+        self.fallback_interval = fallback_interval
+        self.batch_size = batch_size
+        self.request_timeout = request_timeout
+        self._port = port
+        self._tracked: Dict[str, Tuple[str, 'asyncio.Future[RunSummary]']] = {}
+        self._wake: Optional[asyncio.Event] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._checker: Optional['asyncio.Task[None]'] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def port(self) -> int:
+        """Port the receiver listens on."""
+        return self._port
+
+    async def __aenter__(self) -> 'RunCompletionReceiver':
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.stop()
+
+    async def start(self) -> None:
+        """Start receiving webhook calls and checking tracked runs."""
+        if self._server is not None:
+            return
+        self._wake = asyncio.Event()
+        # Requests are blocking, so they are sent from a single worker thread. This also keeps checks from overlapping.
+        # Creating it may connect to the API, so that happens outside the event loop as well.
+        self._executor = await asyncio.get_running_loop().run_in_executor(None, executor, 1)
+        self._server = await asyncio.start_server(
+            self._handle_request, self.host, self._port, limit=_MAX_LINE_SIZE
+        )
+        self._port = self._server.sockets[0].getsockname()[1]
+        self._checker = asyncio.ensure_future(self._check_periodically())
+
+    async def stop(self) -> None:
+        """Stop receiving webhook calls. Futures of runs that haven't completed are cancelled.
+
+        Raises:
+            Exception: The unexpected error that stopped checking tracked runs, if any. Errors sending requests to the
+                API don't stop checking, they are logged and the runs are checked again later.
+        """
+        if self._server is None:
+            return
+        self._server.close()
+        await self._server.wait_closed()
+        assert self._checker is not None
+        self._checker.cancel()
+        try:
+            await self._checker
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._server = self._checker = None
+
+            for _, future in self._tracked.values():
+                future.cancel()
+            self._tracked.clear()
+            assert self._executor is not None
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def trigger(self, model_id: str) -> 'asyncio.Future[RunSummary]':
+        """Trigger a run for a model and track it, see [Run.trigger][nannyml_cloud_sdk.monitoring.Run.trigger].
+
+        Args:
+            model_id: The ID of the model to run.
+
+        Returns:
+            Future that resolves to the summary of the run once it has completed.
+        """
+        run = await asyncio.get_running_loop().run_in_executor(self._executor, Run.trigger, model_id)
+        return self.track(model_id, run['id'])
+
+    def track(self, model_id: str, run_id: str) -> 'asyncio.Future[RunSummary]':
+        """Track a run until it has completed. Must be called from the event loop the receiver runs on.
+
+        Args:
+            model_id: The ID of the model.
+            run_id: The ID of the run.
+
+        Returns:
+            Future that resolves to the summary of the run once it has completed. The future fails with an
+            [ApiError][nannyml_cloud_sdk.errors.ApiError] if the run can't be found.
+
+        Raises:
+            InvalidOperationError: If another run of the model is already tracked.
+        """
+        model_id = str(model_id)
+        if model_id in self._tracked and str(self._tracked[model_id][0]) == str(run_id):
+            return self._tracked[model_id][1]
+        if model_id in self._tracked:
+            raise InvalidOperationError(f"Model '{model_id}' already has a tracked run")
+
+        future: 'asyncio.Future[RunSummary]' = asyncio.get_running_loop().create_future()
+        self._tracked[model_id] = (str(run_id), future)
+        return future
+
+    async def check(self) -> None:
+        """Check all tracked runs now, resolving the futures of runs that completed."""
+        # Futures that were cancelled by the caller no longer need to be tracked
+        for model_id in [model_id for model_id, (_, future) in self._tracked.items() if future.done()]:
+            del self._tracked[model_id]
+        if not self._tracked:
+            return
+
+        tracked = dict(self._tracked)
+        runs = await asyncio.get_running_loop().run_in_executor(
+            self._executor, _get_tracked_runs, {model_id: run_id for model_id, (run_id, _) in tracked.items()},
+            self.batch_size,
+        )
+        for model_id, run in runs.items():
+            _, future = tracked[model_id]
+            if future.done():
+                continue
+            if isinstance(run, ApiError):
+                future.set_exception(run)
+            elif run['state'] == 'COMPLETED':
+                future.set_result(run)
+            else:
+                continue
+            if self._tracked.get(model_id, (None, None))[1] is future:
+                del self._tracked[model_id]
+
+    async def _check_periodically(self) -> None:
+        assert self._wake is not None
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.fallback_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.check()
+            except _REQUEST_ERRORS:
+                # Keep receiving, runs that couldn't be checked are checked again on the next webhook call or fallback
+                _logger.exception("Checking tracked runs failed, retrying on the next webhook call or fallback check")
+
+    async def _handle_request(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            try:
+                method, target, headers = await asyncio.wait_for(_read_request(reader), self.request_timeout)
+                if method != 'POST' or urlparse(target).path != self.path:
+                    status = 404
+                elif not all(
+                    # Compare bytes, since strings may only contain ASCII characters. Headers are read as latin-1, so
+                    # encoding them again gives the bytes that were received.
+                    hmac.compare_digest(headers.get(key, '').encode('latin-1'), value.encode())
+                    for key, value in self.headers.items()
+                ):
+                    status = 401
+                else:
+                    status = 204
+                    assert self._wake is not None
+                    self._wake.set()
+            except (ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                status = 400
+            except asyncio.TimeoutError:
+                status = 408
+
+            writer.write(
+                f'HTTP/1.1 {status} {_HTTP_REASONS[status]}\r\nContent-Length: 0\r\nConnection: close\r\n\r\n'
+                .encode('latin-1')
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Tuple[str, str, Dict[str, str]]:
+    """Read an HTTP request, returning its method, target and headers. The body is read but not used
+
+    Raises:
+        ValueError: If the request is malformed or exceeds the size limits.
+    """
+    request_line = (await reader.readline()).decode('latin-1')
+    try:
+        method, target, _ = request_line.split(' ', 2)
+    except ValueError:
+        raise ValueError(f"Invalid request line: {request_line!r}") from None
+    lines: List[str] = []
+    while True:
+        line = (await reader.readline()).decode('latin-1')
+        if line in ('\r\n', '\n', ''):
+            break
+        if len(lines) == _MAX_HEADER_LINES:
+            raise ValueError(f"Request has more than {_MAX_HEADER_LINES} headers")
+        lines.append(line)
+
+    headers = {}
+    for line in lines:
+        key, separator, value = line.partition(':')
+        if not separator:
+            raise ValueError(f"Invalid header line: {line!r}")
+        headers[key.strip().lower()] = value.strip()
+
+    content_length = int(headers.get('content-length', 0))
+    if not 0 <= content_length <= _MAX_BODY_SIZE:
+        raise ValueError(f"Invalid content length: {content_length}")
+    await reader.readexactly(content_length)
+    return method, target, headers
@@ -0,0 +1,284 @@
+import gzip
+import os
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, TypeVar
+from urllib.parse import urlparse
+
+import nannyml_cloud_sdk
+from .client import execute_batched
+from .errors import ApiError, InvalidOperationError, RunTimeoutError
+
+_TRun = TypeVar('_TRun', bound=Dict[str, Any])
+
+_TRunEvent = TypeVar('_TRunEvent', bound=Dict[str, Any])
+
+_ACTIVE_RUN_STATES = ('SCHEDULED', 'RUNNING')
+
+_DEFAULT_LOG_CACHE_DIR = os.path.join('~', '.cache', 'nannyml_cloud_sdk', 'run_logs')
+
+_BACKOFF_FACTOR = 1.5
+"""Factor by which the polling interval grows while the state of a run doesn't change."""
+
+
+def _wait_for_run(
+    get_latest_run: Callable[[], Optional[_TRun]],
+    get_runs: Callable[[], List[_TRun]],
+    run_id: Optional[str],
+    timeout: Optional[float],
+    poll_interval: float,
+    max_poll_interval: float,
+    sleep: Callable[[float], None] = time.sleep,
+    timer: Callable[[], float] = time.monotonic,
+) -> _TRun:
+    """Poll the state of a run until it has completed.
+
+    The latest run is polled since that is a small query. Once a newer run than the one being waited for shows up,
+    the run has finished and it is looked up in the list of all runs instead. The polling interval starts at
+    `poll_interval` and grows while the state of the run doesn't change, up to `max_poll_interval`. It is reset
+    whenever the state changes, e.g. from `SCHEDULED` to `RUNNING`.
+
+    Args:
+        get_latest_run: Function returning the latest run of the model.
+        get_runs: Function returning all runs of the model.
+        run_id: ID of the run to wait for. ``None`` to wait for the latest run.
+        timeout: Maximum number of seconds to wait. ``None`` to wait indefinitely.
+        poll_interval: Initial number of seconds between polls.
+        max_poll_interval: Maximum number of seconds between polls.
+        sleep: Function to sleep for a number of seconds.
+        timer: Function returning the current time in seconds.
+
+    Returns:
+        Summary of the completed run.
+
+    Raises:
+        InvalidOperationError: If the model has no runs or the run doesn't exist.
+        RunTimeoutError: If the run hasn't completed within `timeout` seconds.
+    """
+    deadline = None if timeout is None else timer() + timeout
+    interval = poll_interval
+    last_state = None
+    superseded = False
+    while True:
+        run = None if superseded else get_latest_run()
+        if run is None and not superseded and run_id is None:
+            raise InvalidOperationError("Model has no runs to wait for")
+        if run is None or (run_id is not None and str(run['id']) != str(run_id)):
+            superseded = True
+            run = next((run for run in get_runs() if str(run['id']) == str(run_id)), None)
+            if run is None:
+                raise InvalidOperationError(f"Run '{run_id}' does not exist")
+
+        # A cancelled run passes through CANCELLING and ends up COMPLETED with `ranSuccessfully` set to false
+        if run['state'] == 'COMPLETED':
+            return run
+
+        if run['state'] != last_state:
+            interval, last_state = poll_interval, run['state']
+        else:
+            interval = min(interval * _BACKOFF_FACTOR, max_poll_interval)
+
+        delay = interval
+        if deadline is not None:
+            remaining = deadline - timer()
+            if remaining <= 0:
+                raise RunTimeoutError(f"Run '{run['id']}' did not complete within {timeout} seconds ({run['state']})")
+            delay = min(delay, remaining)
+        sleep(delay)
+
+
+def _iter_run_events(
+    get_latest_run: Callable[[], Optional[Dict[str, Any]]],
+    get_runs: Callable[[], List[Dict[str, Any]]],
+    run_id: Optional[str],
+    poll_interval: float,
+    sleep: Callable[[float], None] = time.sleep,
+) -> Iterator[_TRunEvent]:
+    """Poll the events of a run, yielding every event once until the run has completed.
+
+    The API has no filter for events after a given ID, so every poll returns all events of the run. Events with an ID
+    at or below the last yielded ID are skipped.
+
+    Args:
+        get_latest_run: Function returning the latest run of the model, including its `id`, `state` and `events`.
+        get_runs: Function returning all runs of the model, including their `id`, `state` and `events`.
+        run_id: ID of the run. ``None`` for the latest run at the time of the first poll.
+        poll_interval: Number of seconds between polls.
+        sleep: Function to sleep for a number of seconds.
+
+    Raises:
+        InvalidOperationError: If the model has no runs or the run doesn't exist.
+    """
+    last_event_id = None
+    superseded = False
+    while True:
+        run = None if superseded else get_latest_run()
+        if run is None and run_id is None:
+            raise InvalidOperationError("Model has no runs")
+        if run is None or (run_id is not None and str(run['id']) != str(run_id)):
+            superseded = True
+            run = next((run for run in get_runs() if str(run['id']) == str(run_id)), None)
+            if run is None:
+                raise InvalidOperationError(f"Run '{run_id}' does not exist")
+        run_id = str(run['id'])
+
+        for event in sorted(run['events'], key=lambda event: event['id']):
+            if last_event_id is None or event['id'] > last_event_id:
+                last_event_id = event['id']
+                yield event
+
+        if run['state'] == 'COMPLETED':
+            return
+        sleep(poll_interval)
+
+
+def _cancel_active_runs(
+    models: List[Dict[str, Any]],
+    model_ids: Optional[Sequence[str]],
+    id_key: str,
+    selection: str,
+    variable_types: Dict[str, str],
+    variables: Callable[[str, Dict[str, Any]], Dict[str, Any]],
+    fragments: str,
+    batch_size: int,
+) -> List[Dict[str, Any]]:
+    """Cancel the active runs of models using batched mutations.
+
+    Args:
+        models: Models with their `id` and `latestRun`.
+        model_ids: IDs of the models to cancel runs for. ``None`` to cancel runs for all models.
+        id_key: Key for the model ID in the results, e.g. `modelId`.
+        selection: Mutation selection that cancels a run.
+        variable_types: GraphQL types of the variables used in `selection`.
+        variables: Function returning the variables of `selection` for a model ID and its active run.
+        fragments: Definitions of fragments used in `selection`.
+        batch_size: Maximum number of mutations per request.
+
+    Returns:
+        A result per model that had an active run, containing the cancelled run or the error that occurred.
+    """
+    selected = None if model_ids is None else {str(model_id) for model_id in model_ids}
+    active = [
+        (str(model['id']), model['latestRun']) for model in models
+        if model['latestRun'] is not None and model['latestRun']['state'] in _ACTIVE_RUN_STATES
+        and (selected is None or str(model['id']) in selected)
+    ]
+    runs = execute_batched(
+        'mutation', selection, variable_types, [variables(model_id, run) for model_id, run in active], fragments,
+        batch_size, return_errors=True,
+    )
+    return [
+        {
+            id_key: model_id,
+            'run': None if isinstance(run, ApiError) else run,
+            'error': str(run) if isinstance(run, ApiError) else None,
+        }
+        for (model_id, _), run in zip(active, runs)
+    ]
+
+
+def _get_run_log(
+    product_type: str,
+    get_latest_run: Callable[[], Optional[Dict[str, Any]]],
+    get_runs: Callable[[], List[Dict[str, Any]]],
+    run_id: Optional[str],
+    offset: int,
+) -> Dict[str, Any]:
+    """Get the log of a run from the offset onwards, using the local cache for completed runs.
+
+    The API returns the full log of a run. Logs of completed runs can't change anymore, so they are cached on disk. The
+    latest run is requested first since that only includes a single log. Only if the run has been superseded, the logs
+    of all runs are requested and all completed ones are cached.
+
+    Args:
+        product_type: Product type of the run, e.g. `MONITORING`.
+        get_latest_run: Function returning the latest run of the model, including its `id`, `state` and `log`.
+        get_runs: Function returning all runs of the model, including their `id`, `state` and `log`.
+        run_id: ID of the run. ``None`` for the latest run.
+        offset: Number of characters of the log to skip.
+
+    Returns:
+        The run ID, state, the log from `offset` onwards and the offset to continue from.
+
+    Raises:
+        InvalidOperationError: If the model has no runs or the run doesn't exist.
+    """
+    if run_id is not None:
+        log = _read_cached_run_log(product_type, run_id)
+        if log is not None:
+            return _log_tail(run_id, 'COMPLETED', log, offset)
+
+    run = get_latest_run()
+    if run is None and run_id is None:
+        raise InvalidOperationError("Model has no runs")
+    if run is None or (run_id is not None and str(run['id']) != str(run_id)):
+        runs = get_runs()
+        for other in runs:
+            _cache_run_log(product_type, other)
+        run = next((run for run in runs if str(run['id']) == str(run_id)), None)
+        if run is None:
+            raise InvalidOperationError(f"Run '{run_id}' does not exist")
+    else:
+        _cache_run_log(product_type, run)
+
+    return _log_tail(str(run['id']), run['state'], run['log'] or '', offset)
+
+
+def _tail_run_log(
+    get_log: Callable[[Optional[str], int], Dict[str, Any]],
+    run_id: Optional[str],
+    poll_interval: float,
+    sleep: Callable[[float], None] = time.sleep,
+) -> Iterator[str]:
+    """Poll the log of a run, yielding the text added since the previous poll until the run has completed.
+
+    Args:
+        get_log: Function returning the log of a run from an offset onwards, see `_get_run_log`.
+        run_id: ID of the run. ``None`` for the latest run at the time of the first poll.
+        poll_interval: Number of seconds between polls.
+        sleep: Function to sleep for a number of seconds.
+    """
+    offset = 0
+    while True:
+        tail = get_log(run_id, offset)
+        run_id, offset = tail['runId'], tail['offset']
+        if tail['log']:
+            yield tail['log']
+        if tail['state'] == 'COMPLETED':
+            return
+        sleep(poll_interval)
+
+
+def _log_tail(run_id: str, state: str, log: str, offset: int) -> Dict[str, Any]:
+    return {'runId': str(run_id), 'state': state, 'log': log[offset:], 'offset': len(log)}
+
+
+def _run_log_cache_path(product_type: str, run_id: str) -> str:
+    """Path of the cached log of a run. Logs are kept apart per server, since run IDs are only unique per server"""
+    cache_dir = os.path.expanduser(nannyml_cloud_sdk.log_cache_dir or _DEFAULT_LOG_CACHE_DIR)
+    server = urlparse(nannyml_cloud_sdk.url).netloc.replace(':', '_') or 'default'
+    return os.path.join(cache_dir, server, f'{product_type.lower()}-{run_id}.log.gz')
+
+
+def _read_cached_run_log(product_type: str, run_id: str) -> Optional[str]:
+    try:
+        with gzip.open(_run_log_cache_path(product_type, run_id), 'rt', encoding='utf-8') as f:
+            return f.read()
+    except (OSError, EOFError):
+        # Missing, unreadable or truncated cache files are treated as a cache miss
+        return None
+
+
+def _cache_run_log(product_type: str, run: Dict[str, Any]) -> None:
+    """Store the log of a completed run in the local cache"""
+    if run['state'] != 'COMPLETED' or run['log'] is None:
+        return
+
+    path = _run_log_cache_path(product_type, run['id'])
+    if os.path.exists(path):
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write to a temporary file first, so concurrent readers never see a partial log
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        f.write(run['log'])
+    os.replace(tmp_path, path)
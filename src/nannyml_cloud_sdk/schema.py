@@ -1,21 +1,116 @@
-from typing import List
+import copy
+import hashlib
+import json
+import os
+import re
+import warnings
+from typing import Any, Callable, Collection, Dict, FrozenSet, Iterable, List, Optional, Union
 
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from gql import gql
 
 from ._typing import TypedDict
-from .data import COLUMN_DETAILS_FRAGMENT, ColumnDetails
-from .enums import ColumnType
+from .cache import inspection_cache
+from .client import execute
+from .data import COLUMN_DETAILS_FRAGMENT, ColumnDetails, Data
+from .enums import ColumnType, ProblemType, ProductType, SamplingStrategy, SchemaInference
+from .errors import SchemaValidationError
 
 
 class BaseSchema(TypedDict):
     columns: List[ColumnDetails]
 
 
+class _ColumnProfile(TypedDict):
+    """Statistics of a column used to infer what the column represents.
+
+    Attributes:
+        name: Normalized name of the column.
+        dataType: Pandas data type of the column.
+        nrValues: Number of non-null values in the inspected rows, ``None`` if unknown.
+        nrUnique: Number of unique non-null values in the inspected rows, ``None`` if unknown.
+    """
+    name: str
+    dataType: str
+    nrValues: Optional[int]
+    nrUnique: Optional[int]
+
+
 def normalize(column_name: str) -> str:
     """Normalize a column name."""
     return column_name.casefold()
 
 
+def _normalized_names(column_names: Iterable[Any]) -> FrozenSet[str]:
+    """Normalize column names once, e.g. those of a dataframe, so membership checks take constant time"""
+    return frozenset(normalize(str(name)) for name in column_names)
+
+
+def _project_columns(columns: Iterable[ColumnDetails], column_names: Iterable[Any]) -> List[ColumnDetails]:
+    """Select the schema columns that are present in data with the given column names, keeping their order"""
+    names = _normalized_names(column_names)
+    return [column for column in columns if column['name'] in names]
+
+
+class _ColumnIndex:
+    """Index of the columns of a schema by name and column type.
+
+    Overriding a column through the index takes constant time, so any number of overrides is applied in a single pass
+    over the columns. The index modifies the column dicts of the schema in place.
+    """
+
+    def __init__(self, schema: BaseSchema):
+        self.schema = schema
+        self._by_name: Dict[str, List[ColumnDetails]] = {}
+        self._by_type: Dict[str, Dict[int, ColumnDetails]] = {}
+        for column in schema['columns']:
+            self._by_name.setdefault(column['name'], []).append(column)
+            self._by_type.setdefault(column['columnType'], {})[id(column)] = column
+
+    def get(self, column_name: str) -> List[ColumnDetails]:
+        """Get the columns with a name, which is normalized first"""
+        return self._by_name.get(normalize(column_name), [])
+
+    def with_type(self, column_type: ColumnType) -> List[ColumnDetails]:
+        """Get the columns that have a column type"""
+        return list(self._by_type.get(column_type, {}).values())
+
+    def set_type(self, column: ColumnDetails, column_type: ColumnType) -> None:
+        """Change the column type of a column"""
+        self._by_type[column['columnType']].pop(id(column), None)
+        column['columnType'] = column_type
+        self._by_type.setdefault(column_type, {})[id(column)] = column
+
+    def override(
+        self,
+        column_name: str,
+        column_type: ColumnType,
+        overridden_type: Union[ColumnType, Callable[[ColumnDetails], ColumnType], None] = 'IGNORED',
+    ) -> List[ColumnDetails]:
+        """Set the column type of a column, changing other columns of that type to `overridden_type`.
+
+        Args:
+            column_name: Name of the column.
+            column_type: New column type of the column.
+            overridden_type: Column type for other columns that had `column_type`, or a function returning it for a
+                column. ``None`` if multiple columns can have `column_type`.
+
+        Returns:
+            The columns with the name, usually a single one.
+        """
+        columns = self.get(column_name)
+        if overridden_type is not None:
+            for other in self.with_type(column_type):
+                if not any(other is column for column in columns):
+                    self.set_type(other, overridden_type(other) if callable(overridden_type) else overridden_type)
+        for column in columns:
+            self.set_type(column, column_type)
+        return columns
+
+
 def _override_column_in_schema(
         column_name: str,
         column_type: ColumnType,
@@ -24,14 +119,7 @@ def _override_column_in_schema(
         overridden_type: ColumnType = 'IGNORED'
 ):
     """Updates the Schema given that a certain column was marked as having a certain column type."""
-
-    column_name = normalize(column_name)
-    for column in schema['columns']:
-        if column['name'] == column_name:
-            column['columnType'] = column_type
-        elif column['columnType'] == column_type and is_exclusive_type:
-            column['columnType'] = overridden_type
-
+    _ColumnIndex(schema).override(column_name, column_type, overridden_type if is_exclusive_type else None)
     return schema
 
 
@@ -44,3 +132,358 @@ INSPECT_SCHEMA = gql("""
         }
     }
 """ + COLUMN_DETAILS_FRAGMENT)
+
+
+_TIMESTAMP_NAMES = frozenset({'timestamp', 'date', 'datetime', 'time', 'ts'})
+_TARGET_NAMES = frozenset({'target', 'y', 'y_true', 'label', 'actual', 'ground_truth'})
+_PREDICTION_NAMES = frozenset({'prediction', 'y_pred', 'pred', 'predicted', 'predicted_label'})
+_IDENTIFIER_NAMES = frozenset({'id', 'identifier', 'uuid', 'key', 'row_id'})
+_PREDICTION_SCORE_PATTERN = re.compile(
+    r'^(?:y_pred_proba|predicted_probability|prediction_score|prediction_proba|proba|score)(?:_(?P<class_name>.+))?$'
+)
+_EXPERIMENT_NAMES: Dict[str, ColumnType] = {
+    'metric': 'METRIC_NAME', 'metric_name': 'METRIC_NAME',
+    'group': 'GROUP_NAME', 'group_name': 'GROUP_NAME', 'variant': 'GROUP_NAME',
+    'success': 'SUCCESS_COUNT', 'success_count': 'SUCCESS_COUNT', 'successes': 'SUCCESS_COUNT',
+    'fail': 'FAIL_COUNT', 'fail_count': 'FAIL_COUNT', 'failures': 'FAIL_COUNT', 'failure_count': 'FAIL_COUNT',
+}
+
+
+_SAMPLING_SEED = 0
+"""Seed for random sampling, so the same data always results in the same schema."""
+
+
+def _sample_rows(
+    df: pd.DataFrame, nr_rows: int, sampling: SamplingStrategy, timestamp_column_name: Optional[str] = None
+) -> pd.DataFrame:
+    """Select the rows of a dataframe to inspect.
+
+    Rows are selected by position, so only the selected rows are copied. The rows keep their original order.
+
+    Args:
+        df: Dataframe to sample.
+        nr_rows: Number of rows to select. `NULL_AWARE` sampling adds at most one row per column to this.
+        sampling: Strategy to select rows with.
+        timestamp_column_name: Name of the timestamp column for `STRATIFIED` sampling. Defaults to the first column
+            with a datetime data type. Rows are selected at random if there is no such column.
+    """
+    if len(df) <= nr_rows:
+        return df
+
+    if sampling == 'HEAD':
+        return df.head(nr_rows)
+    if sampling == 'NULL_AWARE':
+        return df.iloc[_add_rows_with_values(df, np.arange(nr_rows))]
+
+    timestamp = _find_timestamp_column(df, timestamp_column_name) if sampling == 'STRATIFIED' else None
+    if timestamp is None:
+        positions = np.random.default_rng(_SAMPLING_SEED).choice(len(df), size=nr_rows, replace=False)
+    else:
+        # Pick rows at evenly spaced quantiles of the timestamp. Missing timestamps are sorted last.
+        order = np.argsort(pd.to_datetime(timestamp).to_numpy(), kind='stable')
+        positions = order[np.unique(np.linspace(0, len(df) - 1, nr_rows).round().astype(np.int64))]
+    return df.iloc[np.sort(positions)]
+
+
+def _add_rows_with_values(df: pd.DataFrame, positions: np.ndarray) -> np.ndarray:
+    """Add the position of the first row with a value for every column that has no values in the selected rows"""
+    missing = ~df.iloc[positions].notna().any().to_numpy()
+    extra = []
+    for i in np.flatnonzero(missing):
+        has_value = df.iloc[:, i].notna().to_numpy()
+        if has_value.any():
+            extra.append(int(has_value.argmax()))
+    return np.union1d(positions, np.asarray(extra, dtype=np.int64))
+
+
+def _find_timestamp_column(df: pd.DataFrame, column_name: Optional[str]) -> Optional[pd.Series]:
+    if column_name is not None:
+        column_name = normalize(column_name)
+        position = next((i for i, name in enumerate(df.columns) if normalize(str(name)) == column_name), None)
+    else:
+        position = next(
+            (i for i, dtype in enumerate(df.dtypes) if pd.api.types.is_datetime64_any_dtype(dtype)), None
+        )
+    return None if position is None else df.iloc[:, position]
+
+
+def _inspect_columns(
+    sample: pd.DataFrame,
+    product_type: ProductType,
+    problem_type: Optional[ProblemType],
+    inference: SchemaInference,
+    categorical_dtypes: Collection[str],
+) -> List[ColumnDetails]:
+    """Identify what the columns of a sample represent, using the NannyML Cloud API or local heuristics"""
+    if inference == 'LOCAL':
+        return _infer_columns(_profile_columns(sample), product_type, problem_type, categorical_dtypes)
+
+    def inspect() -> List[ColumnDetails]:
+        variables = {"productType": product_type, "storageInfo": Data.upload(sample)}
+        if problem_type is not None:
+            variables["problemType"] = problem_type
+        return execute(INSPECT_SCHEMA, variable_values={"input": variables})['inspect_dataset']['columns']
+
+    # Overrides modify the columns in place, so never hand out the cached columns themselves
+    columns = inspection_cache.get((product_type, str(problem_type), _fingerprint(sample)), inspect)
+    return copy.deepcopy(columns)
+
+
+def _fingerprint(df: pd.DataFrame) -> str:
+    """Fingerprint of the column layout of a dataframe, i.e. its column names and data types"""
+    layout = [[str(name), str(dtype)] for name, dtype in df.dtypes.items()]
+    return hashlib.sha256(json.dumps(layout).encode()).hexdigest()
+
+
+def _profile_columns(sample: pd.DataFrame) -> List[_ColumnProfile]:
+    """Compute the statistics used to infer column types for every column of a sample"""
+    nr_values = sample.notna().sum()
+    return [
+        {
+            'name': normalize(str(name)),
+            'dataType': _data_type(sample[name].dtype),
+            'nrValues': int(nr_values.iloc[i]),
+            'nrUnique': _nr_unique(sample.iloc[:, i]),
+        }
+        for i, name in enumerate(sample.columns)
+    ]
+
+
+def _inspect_parquet(
+    path: Union[str, 'os.PathLike[str]'],
+    product_type: ProductType,
+    problem_type: Optional[ProblemType],
+    inference: SchemaInference,
+    categorical_dtypes: Collection[str],
+    nr_rows: int,
+) -> List[ColumnDetails]:
+    """Identify what the columns of a parquet file represent, reading as little of the file as possible.
+
+    Local inference uses the data types and statistics in the file footer. Rows are only read for columns that could
+    be identifiers when the footer doesn't contain distinct counts. Server inference uploads the first `nr_rows` rows.
+    """
+    parquet_file = pq.ParquetFile(path)
+    if inference == 'SERVER':
+        sample = next(parquet_file.iter_batches(batch_size=nr_rows), None)
+        schema = parquet_file.schema_arrow
+        head = pa.Table.from_batches([sample] if sample is not None else [], schema=schema).to_pandas()
+        return _inspect_columns(head, product_type, problem_type, inference, categorical_dtypes)
+
+    return _infer_columns(_profile_parquet(parquet_file, nr_rows), product_type, problem_type, categorical_dtypes)
+
+
+def _profile_arrow_schema(schema: pa.Schema) -> List[_ColumnProfile]:
+    """Profile columns using only their arrow data types"""
+    return [
+        {'name': normalize(field.name), 'dataType': _arrow_data_type(field.type), 'nrValues': None, 'nrUnique': None}
+        for field in schema if not field.name.startswith('__index_level_')
+    ]
+
+
+def _profile_parquet(parquet_file: pq.ParquetFile, nr_rows: int) -> List[_ColumnProfile]:
+    """Profile columns using the statistics in the footer of a parquet file, reading values only when required"""
+    metadata = parquet_file.metadata
+    null_counts: Dict[str, Optional[int]] = {}
+    distinct_counts: Dict[str, Optional[int]] = {}
+    for i in range(metadata.num_row_groups):
+        row_group = metadata.row_group(i)
+        for j in range(row_group.num_columns):
+            column = row_group.column(j)
+            path, statistics = column.path_in_schema, column.statistics
+            has_null_count = statistics is not None and statistics.has_null_count
+            if path not in null_counts or null_counts[path] is not None:
+                null_counts[path] = null_counts.get(path, 0) + statistics.null_count if has_null_count else None
+            # Distinct counts of row groups can't be combined, so they are only usable for a single row group
+            has_distinct_count = statistics is not None and statistics.has_distinct_count
+            distinct_counts[path] = (
+                statistics.distinct_count if has_distinct_count and metadata.num_row_groups == 1 else None
+            )
+
+    profiles = _profile_arrow_schema(parquet_file.schema_arrow)
+    fields = [field for field in parquet_file.schema_arrow if not field.name.startswith('__index_level_')]
+    for profile, field in zip(profiles, fields):
+        null_count = null_counts.get(field.name)
+        if null_count is not None:
+            profile['nrValues'] = metadata.num_rows - null_count
+            if null_count > 0 and pa.types.is_integer(field.type):
+                # Integers with missing values are read as floats
+                profile['dataType'] = 'float64'
+        profile['nrUnique'] = distinct_counts.get(field.name)
+
+    # Uniqueness decides whether a column is an identifier, so read a few values if the footer doesn't tell
+    unknown = [field.name for profile, field in zip(profiles, fields)
+               if _has_identifier_name(profile['name']) and profile['nrUnique'] is None]
+    if unknown:
+        sample = next(parquet_file.iter_batches(batch_size=nr_rows, columns=unknown), None)
+        if sample is not None:
+            values = {profile['name']: profile for profile in _profile_columns(sample.to_pandas())}
+            for profile in profiles:
+                if profile['name'] in values:
+                    profile['nrValues'] = values[profile['name']]['nrValues']
+                    profile['nrUnique'] = values[profile['name']]['nrUnique']
+
+    return profiles
+
+
+def _arrow_data_type(arrow_type: pa.DataType) -> str:
+    """Pandas data type an arrow column is read as"""
+    if pa.types.is_dictionary(arrow_type):
+        return 'category'
+    if pa.types.is_timestamp(arrow_type):
+        # Timestamps keep their unit and time zone when read, e.g. `datetime64[us, UTC]`
+        return str(arrow_type.to_pandas_dtype())
+    if pa.types.is_boolean(arrow_type) or pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type):
+        return str(np.dtype(arrow_type.to_pandas_dtype()))
+    return 'object'
+
+
+def _data_type(dtype) -> str:
+    """Name of a pandas data type as reported by NannyML Cloud, which reads strings back as objects"""
+    name = str(dtype)
+    return 'object' if name in ('string', 'str') else name
+
+
+def _nr_unique(series: pd.Series) -> Optional[int]:
+    try:
+        return int(series.nunique(dropna=True))
+    except TypeError:
+        # Unhashable values, e.g. lists
+        return None
+
+
+def _infer_columns(
+    profiles: List[_ColumnProfile],
+    product_type: ProductType,
+    problem_type: Optional[ProblemType],
+    categorical_dtypes: Collection[str],
+) -> List[ColumnDetails]:
+    """Infer what each column represents from its name, data type and value statistics.
+
+    Names are matched against common conventions, e.g. `timestamp`, `y_true` or `y_pred_proba_<class>`. Every role
+    except features and multiclass prediction scores is assigned to the first matching column only. Remaining columns
+    are categorical or continuous features for monitoring and ignored for other products.
+    """
+    columns: List[ColumnDetails] = []
+    assigned = set()
+
+    def assign(column_type: ColumnType) -> Optional[ColumnType]:
+        if column_type in assigned:
+            return None
+        assigned.add(column_type)
+        return column_type
+
+    for profile in profiles:
+        name, data_type = profile['name'], profile['dataType']
+        is_numeric = pd.api.types.is_numeric_dtype(data_type) and data_type != 'bool'
+        score = _PREDICTION_SCORE_PATTERN.match(name) if is_numeric else None
+        class_name = None
+
+        column_type: Optional[ColumnType] = None
+        if product_type == 'EXPERIMENT':
+            if name in _EXPERIMENT_NAMES:
+                column_type = assign(_EXPERIMENT_NAMES[name])
+        elif product_type == 'MONITORING' and ('datetime' in data_type or name in _TIMESTAMP_NAMES):
+            column_type = assign('TIMESTAMP')
+        elif name in _TARGET_NAMES:
+            column_type = assign('TARGET')
+        elif product_type == 'MONITORING' and name in _PREDICTION_NAMES:
+            column_type = assign('PREDICTION')
+        elif score is not None and problem_type == 'MULTICLASS_CLASSIFICATION':
+            column_type, class_name = 'PREDICTION_SCORE', score.group('class_name') or name
+        elif score is not None and problem_type != 'REGRESSION':
+            column_type = assign('PREDICTION_SCORE')
+
+        if column_type is None and _is_identifier(profile):
+            column_type = assign('IDENTIFIER')
+        if column_type is None:
+            if product_type != 'MONITORING':
+                column_type = 'IGNORED'
+            elif data_type in categorical_dtypes:
+                column_type = 'CATEGORICAL_FEATURE'
+            else:
+                column_type = 'CONTINUOUS_FEATURE'
+
+        columns.append({
+            'name': name, 'columnType': column_type, 'dataType': data_type, 'className': class_name, 'columnFlags': [],
+        })
+
+    return columns
+
+
+def _is_identifier(profile: _ColumnProfile) -> bool:
+    """Identifiers are named like one and have a unique, non-floating point value in every row"""
+    if not _has_identifier_name(profile['name']):
+        return False
+    if 'float' in profile['dataType'] or 'datetime' in profile['dataType']:
+        return False
+    return profile['nrUnique'] is None or profile['nrValues'] is None or profile['nrUnique'] == profile['nrValues']
+
+
+def _has_identifier_name(name: str) -> bool:
+    return name in _IDENTIFIER_NAMES or name.endswith('_id')
+
+
+def _validate_data(data: pd.DataFrame, columns: Collection[ColumnDetails], data_source_name: str) -> None:
+    """Check that data matches the columns of a data source before it is uploaded.
+
+    Column names and data types are compared using metadata only. Values are checked for missing identifiers and
+    timestamps, and for multiclass prediction scores outside of [0, 1]. All problems are reported at once. Columns
+    that are not part of the data source only cause a warning, since they don't prevent the data from being added.
+
+    Raises:
+        SchemaValidationError: If the data doesn't match the columns.
+    """
+    normalized = [normalize(str(name)) for name in data.columns]
+    names = dict(zip(normalized, data.columns))
+    if len(names) != len(data.columns):
+        duplicates = data.columns[pd.Index(normalized).duplicated()]
+        raise SchemaValidationError(
+            f"Data for the {data_source_name} data source has duplicate columns {', '.join(map(repr, duplicates))}"
+        )
+
+    expected = {column['name'] for column in columns}
+    unknown = [name for normalized, name in names.items() if normalized not in expected]
+    if unknown:
+        warnings.warn(
+            f"Data for the {data_source_name} data source has unknown columns {', '.join(map(repr, unknown))}, "
+            "which are not part of its schema"
+        )
+
+    problems = []
+    missing = [column['name'] for column in columns if column['name'] not in names]
+    if missing:
+        problems.append(f"missing columns {', '.join(map(repr, missing))}")
+
+    for column in columns:
+        if column['name'] not in names:
+            continue
+        name, series = names[column['name']], data[names[column['name']]]
+        kind = _dtype_kind(series.dtype)
+        if kind != _dtype_kind(column['dataType']):
+            problems.append(f"column {name!r} has data type '{series.dtype}' instead of '{column['dataType']}'")
+        elif column['columnType'] in ('IDENTIFIER', 'TIMESTAMP'):
+            nr_missing = int(series.isna().sum())
+            if nr_missing:
+                problems.append(f"{column['columnType'].lower()} column {name!r} has {nr_missing} missing values")
+        elif column['columnType'] == 'PREDICTION_SCORE' and column['className'] is not None and kind == 'numeric':
+            nr_invalid = int((series.notna() & ~series.between(0, 1)).sum())
+            if nr_invalid:
+                problems.append(f"prediction score column {name!r} has {nr_invalid} values outside of [0, 1]")
+
+    if problems:
+        raise SchemaValidationError(
+            f"Data doesn't match the {data_source_name} data source: {'; '.join(problems)}"
+        )
+
+
+def _dtype_kind(dtype) -> str:
+    """Group data types that NannyML Cloud treats the same, e.g. integers read back as floats due to missing values"""
+    name = str(dtype)
+    if 'datetime' in name:
+        return 'datetime'
+    if name in ('bool', 'boolean'):
+        return 'bool'
+    try:
+        return 'numeric' if pd.api.types.is_numeric_dtype(pd.api.types.pandas_dtype(name)) else 'other'
+    except TypeError:
+        return 'other'
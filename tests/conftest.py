@@ -2,6 +2,7 @@ import pytest
 from gql import Client
 
 import nannyml_cloud_sdk
+import nannyml_cloud_sdk.cache
 
 
 @pytest.fixture(scope="session")
@@ -15,3 +16,9 @@ def gql_client(gql_schema):
     client = Client(schema=gql_schema)
     nannyml_cloud_sdk.client._active_client = client
     return client
+
+
+@pytest.fixture(autouse=True)
+def clear_metadata_cache():
+    yield
+    nannyml_cloud_sdk.cache.metadata_cache.clear()
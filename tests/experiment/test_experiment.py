@@ -1,3 +1,7 @@
+import datetime
+
+from nannyml_cloud_sdk import client
+from nannyml_cloud_sdk.data import DATA_SOURCE_SUMMARY_FRAGMENT
 from nannyml_cloud_sdk.experiment import experiment
 
 
@@ -23,3 +27,32 @@ def test_experiment_get_experiment_data_sources_query_matches_api_schema(gql_cli
 
 def test_experiment_get_experiment_data_history_query_matches_api_schema(gql_client):
     gql_client.validate(experiment._GET_EXPERIMENT_DATA_HISTORY)
+
+
+def test_experiment_get_experiment_data_source_details_query_matches_api_schema(gql_client):
+    gql_client.validate(experiment._GET_EXPERIMENT_DATA_SOURCE_DETAILS)
+
+
+def test_experiment_prefetch_data_sources_query_matches_api_schema(gql_client):
+    gql_client.validate(client._batched_document(
+        'query', experiment._PREFETCH_EXPERIMENT_DATA_SOURCES_SELECTION, (('experimentId', 'Int!'),), 2,
+        DATA_SOURCE_SUMMARY_FRAGMENT,
+    ))
+
+
+def test_experiment_get_data_history_reads_experiment_data_source(monkeypatch):
+    events = [
+        {'id': '1', 'eventType': 'CREATED', 'timestamp': datetime.datetime(2024, 1, 1), 'nrRows': 10},
+        {'id': '2', 'eventType': 'DATA_ADDED', 'timestamp': datetime.datetime(2024, 2, 1), 'nrRows': 5},
+    ]
+    requests = []
+    monkeypatch.setattr(experiment, 'execute', lambda document, variable_values: requests.append(variable_values) or {
+        'experiment': {'dataSource': {'events': events}}
+    })
+
+    history = experiment.Experiment.get_data_history(
+        '3', event_type='DATA_ADDED', start=datetime.datetime(2024, 1, 15, tzinfo=datetime.timezone.utc)
+    )
+
+    assert history == events[1:]
+    assert requests == [{'experimentId': 3, 'eventsFilter': {'eventType': 'DATA_ADDED', 'causedByUserId': None}}]
@@ -1,3 +1,5 @@
+import pandas as pd
+
 from nannyml_cloud_sdk.experiment.schema import ExperimentSchema, Schema
 
 
@@ -156,3 +158,16 @@ def test_schema_set_identifier_unsets_existing_identifier() -> None:
 
     assert new_schema is schema
     assert schema['columns'][1]['columnType'] == 'IGNORED'
+
+
+def test_schema_from_df_infers_columns_locally() -> None:
+    df = pd.DataFrame({
+        'metric': ['ctr', 'ctr'], 'variant': ['a', 'b'], 'success_count': [10, 12], 'fail_count': [90, 88],
+        'notes': ['', ''],
+    })
+
+    schema = Schema.from_df(df, inference='LOCAL')
+
+    assert [column['columnType'] for column in schema['columns']] == [
+        'METRIC_NAME', 'GROUP_NAME', 'SUCCESS_COUNT', 'FAIL_COUNT', 'IGNORED'
+    ]
@@ -1,3 +1,5 @@
+from nannyml_cloud_sdk import client
+from nannyml_cloud_sdk.data import DATA_SOURCE_SUMMARY_FRAGMENT
 from nannyml_cloud_sdk.model_evaluation import model
 
 
@@ -27,3 +29,18 @@ def test_model_get_model_reference_data_history_query_matches_api_schema(gql_cli
 
 def test_model_get_model_evaluation_data_history_query_matches_api_schema(gql_client):
     gql_client.validate(model._GET_MODEL_EVALUATION_DATA_HISTORY)
+
+
+def test_model_get_model_data_history_query_matches_api_schema(gql_client):
+    gql_client.validate(model._GET_MODEL_DATA_HISTORY)
+
+
+def test_model_get_model_evaluation_data_source_details_query_matches_api_schema(gql_client):
+    gql_client.validate(model._GET_MODEL_EVALUATION_DATA_SOURCE_DETAILS)
+
+
+def test_model_prefetch_data_sources_query_matches_api_schema(gql_client):
+    gql_client.validate(client._batched_document(
+        'query', model._PREFETCH_MODEL_DATA_SOURCES_SELECTION, (('modelId', 'Int!'),), 2,
+        DATA_SOURCE_SUMMARY_FRAGMENT,
+    ))
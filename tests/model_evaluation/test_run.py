@@ -1,5 +1,44 @@
+from nannyml_cloud_sdk import client
 from nannyml_cloud_sdk.model_evaluation import run
 
 
 def test_run_start_query_matches_api_schema(gql_client):
     gql_client.validate(run._START_RUN)
+
+
+def test_run_get_latest_run_query_matches_api_schema(gql_client):
+    gql_client.validate(run._GET_LATEST_RUN)
+
+
+def test_run_get_runs_query_matches_api_schema(gql_client):
+    gql_client.validate(run._GET_RUNS)
+
+
+def test_run_get_latest_run_events_query_matches_api_schema(gql_client):
+    gql_client.validate(run._GET_LATEST_RUN_EVENTS)
+
+
+def test_run_get_run_events_query_matches_api_schema(gql_client):
+    gql_client.validate(run._GET_RUN_EVENTS)
+
+
+def test_run_cancel_query_matches_api_schema(gql_client):
+    gql_client.validate(run._CANCEL_RUN)
+
+
+def test_run_batched_cancel_query_matches_api_schema(gql_client):
+    gql_client.validate(client._batched_document(
+        'mutation', run._CANCEL_RUN_SELECTION, (('evaluationRunId', 'Int!'),), 2, run.RUN_SUMMARY_FRAGMENT
+    ))
+
+
+def test_run_list_latest_runs_query_matches_api_schema(gql_client):
+    gql_client.validate(run._LIST_LATEST_RUNS)
+
+
+def test_run_get_latest_run_log_query_matches_api_schema(gql_client):
+    gql_client.validate(run._GET_LATEST_RUN_LOG)
+
+
+def test_run_get_run_logs_query_matches_api_schema(gql_client):
+    gql_client.validate(run._GET_RUN_LOGS)
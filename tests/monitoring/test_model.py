@@ -1,3 +1,15 @@
+import datetime
+import json
+import os
+
+import pandas as pd
+import pytest
+from frozendict import frozendict
+
+from nannyml_cloud_sdk import client, schema as schema_module
+from nannyml_cloud_sdk.cache import metadata_cache
+from nannyml_cloud_sdk.data import DATA_SOURCE_SUMMARY_FRAGMENT
+from nannyml_cloud_sdk.errors import ApiError, InvalidOperationError, SchemaValidationError
 from nannyml_cloud_sdk.monitoring import model
 
 
@@ -23,3 +35,280 @@ def test_model_get_model_data_sources_query_matches_api_schema(gql_client):
 
 def test_model_get_model_data_history_query_matches_api_schema(gql_client):
     gql_client.validate(model._GET_MODEL_DATA_HISTORY)
+
+
+def test_model_get_model_data_source_details_query_matches_api_schema(gql_client):
+    gql_client.validate(model._GET_MODEL_DATA_SOURCE_DETAILS)
+
+
+def test_model_get_data_source_row_counts_query_matches_api_schema(gql_client):
+    gql_client.validate(model._GET_DATA_SOURCE_ROW_COUNTS)
+
+
+def test_model_get_model_data_head_query_matches_api_schema(gql_client):
+    gql_client.validate(model._GET_MODEL_DATA_HEAD)
+
+
+def test_model_prefetch_data_sources_query_matches_api_schema(gql_client):
+    gql_client.validate(client._batched_document(
+        'query', model._PREFETCH_MODEL_DATA_SOURCES_SELECTION, (('modelId', 'Int!'),), 2,
+        DATA_SOURCE_SUMMARY_FRAGMENT,
+    ))
+
+
+def test_model_prefetch_data_sources_fills_metadata_cache(monkeypatch):
+    data_sources = [
+        {'id': '10', 'name': 'reference', 'hasReferenceData': True, 'hasAnalysisData': False, 'nrRows': 1},
+        {'id': '11', 'name': 'analysis', 'hasReferenceData': False, 'hasAnalysisData': True, 'nrRows': 1},
+    ]
+    monkeypatch.setattr(model, 'execute_batched', lambda *args, **kwargs: [{'id': 1, 'dataSources': data_sources}])
+    monkeypatch.setattr(model, 'execute', lambda *args: pytest.fail('Data sources should be cached'))
+
+    model.Model.prefetch_data_sources(['1'])
+
+    assert model.Model._get_model_data_sources('1', frozendict({'name': 'analysis'})) == [data_sources[1]]
+    assert model.Model._get_model_data_sources('1', frozendict({'name': 'target'})) == []
+    assert model.Model._get_model_data_sources('1') == data_sources
+
+
+def test_model_create_projects_wide_schema_in_linear_time(monkeypatch):
+    nr_columns = 10_000
+    schema = {'problemType': 'BINARY_CLASSIFICATION', 'columns': [
+        {'name': f'f{i}', 'columnType': 'CONTINUOUS_FEATURE', 'dataType': 'float64', 'className': None,
+         'columnFlags': []}
+        for i in range(nr_columns)
+    ] + [{'name': 'y', 'columnType': 'TARGET', 'dataType': 'int64', 'className': None, 'columnFlags': []}]}
+    analysis_data = pd.DataFrame(columns=[f'F{i}' for i in range(0, nr_columns, 2)])
+    created = []
+    calls = []
+    normalize = schema_module.normalize
+    monkeypatch.setattr(schema_module, 'normalize', lambda name: calls.append(name) or normalize(name))
+    monkeypatch.setattr(model.Data, 'upload', staticmethod(lambda df: None))
+    monkeypatch.setattr(model.RuntimeConfiguration, 'default', staticmethod(lambda **kwargs: {}))
+    monkeypatch.setattr(
+        model, 'execute', lambda query, variables: created.append(variables['input']) or {'create_monitoring_model': {
+            'id': '1',
+        }}
+    )
+
+    model.Model.create('wide', schema, pd.DataFrame(), analysis_data, 'F1', chunk_size=100)
+
+    analysis, target = created[0]['dataSources'][1:]
+    assert [column['name'] for column in analysis['columns']] == [f'f{i}' for i in range(0, nr_columns, 2)]
+    assert [column['name'] for column in target['columns']] == ['y']
+    # Every column name of the analysis data is normalized once for the projection and once for the target check
+    assert len(calls) == 2 * len(analysis_data.columns)
+
+
+def test_model_delete_invalidates_metadata_cache(monkeypatch):
+    monkeypatch.setattr(model, 'execute', lambda *args: None)
+    metadata_cache.set(('MONITORING', '1', None), [])
+
+    model.Model.delete('1')
+
+    assert metadata_cache.get(('MONITORING', '1', None), lambda: 'reloaded') == 'reloaded'
+
+
+def test_model_add_analysis_data_validates_before_upload(monkeypatch):
+    columns = [
+        {'name': 'id', 'columnType': 'IDENTIFIER', 'dataType': 'int64', 'className': None, 'columnFlags': []},
+        {'name': 'age', 'columnType': 'CONTINUOUS_FEATURE', 'dataType': 'float64', 'className': None,
+         'columnFlags': []},
+    ]
+    metadata_cache.set(('MONITORING', '1', frozendict({'name': 'analysis'})), [{'id': '11'}])
+    metadata_cache.set(('MONITORING', '1', 'details', frozendict({'name': 'analysis'})), [{'columns': columns}])
+    monkeypatch.setattr(model.Data, 'upload', staticmethod(lambda df: pytest.fail('Invalid data was uploaded')))
+
+    with pytest.raises(SchemaValidationError, match="identifier column 'ID' has 1 missing values"):
+        model.Model.add_analysis_data('1', pd.DataFrame({'ID': [1.0, None], 'age': [30, 40]}), validate=True)
+
+
+def test_model_add_model_data_source_query_matches_api_schema(gql_client):
+    gql_client.validate(model._ADD_MODEL_DATA_SOURCE)
+
+
+def test_model_edit_model_data_sources_query_matches_api_schema(gql_client):
+    gql_client.validate(model._EDIT_MODEL_DATA_SOURCES)
+
+
+def _evolvable_model(monkeypatch):
+    columns = [
+        {'name': 'id', 'columnType': 'IDENTIFIER', 'dataType': 'int64', 'className': None, 'columnFlags': []},
+        {'name': 'age', 'columnType': 'CONTINUOUS_FEATURE', 'dataType': 'float64', 'className': None,
+         'columnFlags': []},
+        {'name': 'y', 'columnType': 'TARGET', 'dataType': 'int64', 'className': None, 'columnFlags': []},
+    ]
+    data_sources = [
+        {'id': '10', 'name': 'reference', 'hasReferenceData': True, 'hasAnalysisData': False, 'columns': columns},
+        {'id': '11', 'name': 'analysis', 'hasReferenceData': False, 'hasAnalysisData': True, 'columns': columns[:2]},
+        {'id': '12', 'name': 'target', 'hasReferenceData': False, 'hasAnalysisData': True,
+         'columns': [columns[0], columns[2]]},
+    ]
+    metadata_cache.set(('MONITORING', '1', 'details', None), data_sources)
+    uploads = []
+    monkeypatch.setattr(model.Data, 'upload', staticmethod(lambda df: uploads.append(df) or {'cache': {'id': 'x'}}))
+    return columns, uploads
+
+
+_INCOME_COLUMN = {
+    'name': 'income', 'columnType': 'CONTINUOUS_FEATURE', 'dataType': 'float64', 'className': None, 'columnFlags': [],
+}
+
+
+def test_model_evolve_schema_adds_data_sources_for_new_columns(monkeypatch):
+    columns, uploads = _evolvable_model(monkeypatch)
+    requests = []
+
+    def execute(query, variables):
+        requests.append((query, variables))
+        if query is model._EDIT_MODEL_DATA_SOURCES:
+            assert len(uploads) == 1, 'Data should be uploaded before the model is changed'
+            return {'edit_monitoring_model': {'__typename': 'Model'}}
+        data_source = variables['input']['dataSource']
+        return {'add_model_data_source': {'id': str(20 + len(requests)), 'name': data_source['name']}}
+
+    monkeypatch.setattr(model, 'execute', execute)
+    schema = {'problemType': 'BINARY_CLASSIFICATION', 'columns': [
+        columns[0], {**columns[1], 'columnType': 'IGNORED'}, {**columns[2], 'dataType': 'float64'}, _INCOME_COLUMN,
+    ]}
+    reference_data = pd.DataFrame({'ID': [1, 2], 'age': [20.0, 30.0], 'y': [0, 1], 'Income': [1.0, 2.0]})
+
+    evolution = model.Model.evolve_schema('1', schema, reference_data)
+
+    # Compatible data type changes need no changes, so they are not reported as applied
+    assert [change['changeType'] for change in evolution['changes']] == ['COLUMN_TYPE_CHANGED', 'ADDED']
+    assert [source['name'] for source in evolution['dataSources']] == ['reference_3', 'analysis_4']
+    assert requests[0][1]['dataSources'] == [
+        {'id': '10', 'columns': [{'name': 'age', 'columnType': 'IGNORED', 'columnFlags': []}]},
+        {'id': '11', 'columns': [{'name': 'age', 'columnType': 'IGNORED', 'columnFlags': []}]},
+    ]
+    assert [column['name'] for column in requests[1][1]['input']['dataSource']['columns']] == ['id', 'income']
+    assert requests[2][1]['input']['dataSource']['storageInfo'] is None
+    assert list(uploads[0].columns) == ['ID', 'Income']
+    assert metadata_cache.get(('MONITORING', '1', 'details', None), lambda: 'reloaded') == 'reloaded'
+
+
+def test_model_evolve_schema_compares_with_columns_of_earlier_evolutions(monkeypatch):
+    columns, uploads = _evolvable_model(monkeypatch)
+    # An earlier evolution added the income column, then the analysis data source it added was removed
+    data_sources = metadata_cache.get(('MONITORING', '1', 'details', None), lambda: pytest.fail('Not cached')) + [
+        {'id': '13', 'name': 'reference_3', 'hasReferenceData': True, 'hasAnalysisData': False,
+         'columns': [columns[0], _INCOME_COLUMN]},
+    ]
+    requests = []
+
+    def execute(query, variables):
+        requests.append(variables['input']['dataSource'])
+        return {'add_model_data_source': {'id': str(20 + len(requests)), 'name': requests[-1]['name']}}
+
+    monkeypatch.setattr(model, 'execute', execute)
+    schema = {'problemType': 'BINARY_CLASSIFICATION', 'columns': columns + [_INCOME_COLUMN]}
+
+    metadata_cache.set(('MONITORING', '1', 'details', None), data_sources)
+    assert model.Model.evolve_schema('1', schema) == {'changes': [], 'dataSources': []}
+    assert requests == [] and uploads == []
+
+    score = {**_INCOME_COLUMN, 'name': 'score'}
+    metadata_cache.set(('MONITORING', '1', 'details', None), data_sources)
+    evolution = model.Model.evolve_schema(
+        '1', {**schema, 'columns': schema['columns'] + [score]}, pd.DataFrame({'id': [1], 'score': [0.5]})
+    )
+
+    assert [change['name'] for change in evolution['changes']] == ['score']
+    assert [source['name'] for source in evolution['dataSources']] == ['reference_4', 'analysis_5']
+    assert [column['name'] for column in requests[0]['columns']] == ['id', 'score']
+
+
+def test_model_evolve_schema_invalidates_cache_when_changes_fail(monkeypatch):
+    columns, _ = _evolvable_model(monkeypatch)
+
+    def execute(query, variables):
+        raise ApiError('Data source could not be added')
+
+    monkeypatch.setattr(model, 'execute', execute)
+    schema = {'problemType': 'BINARY_CLASSIFICATION', 'columns': columns + [_INCOME_COLUMN]}
+
+    with pytest.raises(ApiError):
+        model.Model.evolve_schema('1', schema, pd.DataFrame({'id': [1], 'income': [1.0]}))
+    assert metadata_cache.get(('MONITORING', '1', 'details', None), lambda: 'reloaded') == 'reloaded'
+
+
+def test_model_evolve_schema_rejects_incompatible_changes(monkeypatch):
+    columns, _ = _evolvable_model(monkeypatch)
+    monkeypatch.setattr(model, 'execute', lambda *args: pytest.fail('Model should not be changed'))
+    schema = {'problemType': 'BINARY_CLASSIFICATION', 'columns': columns[:2]}
+
+    with pytest.raises(InvalidOperationError, match=r'y \(REMOVED\)'):
+        model.Model.evolve_schema('1', schema)
+
+
+def test_model_get_model_export_query_matches_api_schema(gql_client):
+    gql_client.validate(model._GET_MODEL_EXPORT)
+
+
+def test_model_export_and_import_round_trip(monkeypatch, tmp_path):
+    columns = [{'name': 'x', 'columnType': 'CONTINUOUS_FEATURE', 'dataType': 'int64', 'className': None,
+                'columnFlags': []}]
+    created_at = datetime.datetime(2024, 5, 1, 12, 30, tzinfo=datetime.timezone.utc)
+    runtime_config = {'customMetrics': [{'metric': {'id': 1, 'name': 'margin', 'createdAt': created_at}}]}
+    created, linked, configured, heads = [], [], [], []
+
+    def execute(document, variable_values):
+        if document is model._GET_MODEL_EXPORT:
+            return {'monitoring_model': {
+                'name': 'churn',
+                'problemType': 'BINARY_CLASSIFICATION',
+                'kpm': {'metric': 'F1', 'component': None},
+                'dataSources': [
+                    {'id': '1', 'name': 'reference', 'hasReferenceData': True, 'hasAnalysisData': False,
+                     'nrRows': 2, 'columns': columns},
+                    {'id': '2', 'name': 'target', 'hasReferenceData': False, 'hasAnalysisData': True,
+                     'nrRows': 0, 'columns': columns},
+                ],
+            }}
+        created.append(variable_values['input'])
+        return {'create_monitoring_model': {'id': '7'}}
+
+    monkeypatch.setattr(model, 'execute', execute)
+    monkeypatch.setattr(model.Model, 'get_data_head',
+                        staticmethod(lambda *args: heads.append(args) or pd.DataFrame({'x': [1, 2]})))
+    monkeypatch.setattr(model.RuntimeConfiguration, '_get_config', staticmethod(lambda model_id: runtime_config))
+    monkeypatch.setattr(model.RuntimeConfiguration, 'set', staticmethod(lambda *args: configured.append(args)))
+    monkeypatch.setattr(model, '_to_input', lambda config: config)
+    monkeypatch.setattr(model.Data, 'upload', staticmethod(lambda df: {'cache': {'id': f'rows-{len(df)}'}}))
+    monkeypatch.setattr(model.CustomMetric, 'list', staticmethod(lambda problem_type: [{'id': 5, 'name': 'margin'}]))
+    monkeypatch.setattr(model.Model, 'add_custom_metric', staticmethod(lambda *args: linked.append(args)))
+
+    model.Model.export('3', tmp_path, max_rows=1)
+    imported = model.Model.import_(tmp_path, name='churn-staging')
+
+    assert sorted(os.listdir(tmp_path)) == ['model.json', 'reference.parquet']
+    assert heads == [('3', 'reference', 1)]
+    assert imported == {'id': '7'}
+    assert created[0]['name'] == 'churn-staging'
+    assert [ds['storageInfo'] for ds in created[0]['dataSources']] == [{'cache': {'id': 'rows-2'}}, None]
+    assert created[0]['runtimeConfig'] == {'customMetrics': []}
+    assert linked == [('7', 5)]
+    assert configured[0][1].to_dict()['customMetrics'][0]['metric'] == {
+        'id': 5, 'name': 'margin', 'createdAt': created_at,
+    }
+
+
+def test_model_bundle_round_trips_all_datetimes():
+    timestamp = datetime.datetime(2024, 5, 1, 12, 30, tzinfo=datetime.timezone.utc)
+    bundle = {'a': [{'startedAt': timestamp, 'label': '2024-05-01T12:30:00'}], 'b': timestamp.replace(tzinfo=None)}
+
+    restored = json.loads(json.dumps(bundle, default=model._bundle_json_default), object_hook=model._bundle_object_hook)
+
+    assert restored == bundle
+
+
+def test_model_import_fails_on_missing_custom_metrics(monkeypatch, tmp_path):
+    (tmp_path / 'model.json').write_text(json.dumps({
+        'name': 'churn', 'problemType': 'BINARY_CLASSIFICATION', 'kpm': {'metric': 'F1', 'component': None},
+        'dataSources': [], 'runtimeConfig': {'customMetrics': [{'metric': {'id': 1, 'name': 'margin'}}]},
+    }))
+    monkeypatch.setattr(model.CustomMetric, 'list', staticmethod(lambda problem_type: []))
+
+    with pytest.raises(InvalidOperationError, match="'margin'"):
+        model.Model.import_(tmp_path)
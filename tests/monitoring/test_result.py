@@ -0,0 +1,180 @@
+import datetime
+import os
+
+import pandas as pd
+import pytest
+
+from nannyml_cloud_sdk import client
+from nannyml_cloud_sdk.errors import ApiError
+from nannyml_cloud_sdk.monitoring import result
+from nannyml_cloud_sdk.monitoring.result import Result
+
+
+def _model_results(model_id: int) -> dict:
+    kpm_result = {
+        'id': f'{model_id}-f1',
+        'modelId': model_id,
+        'analysisType': 'ESTIMATED_PERFORMANCE',
+        'calculatorType': 'CBPE',
+        'segment': None,
+        'tags': [],
+        'metricName': 'F1',
+        'componentName': None,
+        'columnName': None,
+        'columnNames': None,
+        'data': [{
+            'isAnalysis': True,
+            'startTimestamp': datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc),
+            'endTimestamp': datetime.datetime(2024, 2, 1, tzinfo=datetime.timezone.utc),
+            'nrDataPoints': 100,
+            'value': 0.9,
+            'samplingError': 0.01,
+            'lowerConfidenceBound': 0.88,
+            'upperConfidenceBound': 0.92,
+        }],
+    }
+    return {
+        'id': model_id,
+        'name': f'model {model_id}',
+        'kpm': {'results': [kpm_result]},
+        'results': [{'__typename': 'TimeSeriesResult', **kpm_result}, {'__typename': 'KdeDistributionResult'}],
+    }
+
+
+def test_get_kpm_results_query_matches_api_schema(gql_client):
+    gql_client.validate(result._GET_MODEL_KPM_RESULTS)
+
+
+def test_get_model_results_query_matches_api_schema(gql_client):
+    gql_client.validate(result._GET_MODEL_RESULTS)
+
+
+def test_export_batched_query_matches_api_schema(gql_client):
+    gql_client.validate(client._batched_document(
+        'query', result._EXPORT_MODEL_RESULTS_SELECTION, tuple(result._MODEL_RESULTS_VARIABLES.items()), 3,
+        result._TIME_SERIES_RESULT_FRAGMENT,
+    ))
+
+
+def test_export_writes_partition_per_model_and_skips_exported_models(tmp_path, monkeypatch, gql_client):
+    requested = []
+
+    def execute_batched(operation, selection, variable_types, items, fragments, batch_size, return_errors):
+        requested.extend(item['modelId'] for item in items)
+        return [_model_results(item['modelId']) for item in items]
+
+    monkeypatch.setattr(result, 'execute_batched', execute_batched)
+
+    assert sorted(Result.export(str(tmp_path), model_ids=['1', '2'])) == ['1', '2']
+    assert Result.export(str(tmp_path), model_ids=['1', '2', '3']) == ['3']
+    assert sorted(requested) == [1, 2, 3]
+
+    df = pd.read_parquet(tmp_path)
+    assert len(df) == 3
+    assert df['is_kpm'].all()
+    assert sorted(df['model_id'].astype(str)) == ['1', '2', '3']
+
+
+def test_export_skips_and_reports_models_that_cannot_be_fetched(tmp_path, monkeypatch):
+    def execute_batched(operation, selection, variable_types, items, fragments, batch_size, return_errors):
+        assert return_errors
+        return [
+            ApiError('No result returned for item 1') if item['modelId'] == 2
+            else _model_results(item['modelId']) if selection is result._EXPORT_MODEL_RESULTS_SELECTION
+            else {'id': item['modelId'], 'name': 'model', 'results': []}
+            for item in items
+        ]
+
+    monkeypatch.setattr(result, 'execute_batched', execute_batched)
+    progress = []
+
+    with pytest.warns(UserWarning, match=r"could not be exported: '2' \(No result returned"):
+        exported = Result.export(str(tmp_path), model_ids=['1', '2', '3'], progress=lambda *args: progress.append(args))
+
+    assert sorted(exported) == ['1', '3']
+    assert progress[-1] == (3, 3)
+    assert sorted(os.listdir(tmp_path)) == ['model_id=1', 'model_id=3']
+
+    with pytest.warns(UserWarning, match="could not be scanned: '2'"):
+        assert Result.find_breaches(model_ids=['1', '2']).empty
+
+
+def test_find_breaches_batched_query_matches_api_schema(gql_client):
+    gql_client.validate(client._batched_document(
+        'query', result._FIND_BREACHES_SELECTION, tuple(result._MODEL_RESULTS_VARIABLES.items()), 3,
+        result._FIND_BREACHES_FRAGMENTS,
+    ))
+
+
+def _threshold_result(threshold: dict, values: list, segment=None, segment_thresholds=(), **config) -> dict:
+    return {
+        '__typename': 'TimeSeriesResult',
+        'id': 'result',
+        'analysisType': 'FEATURE_DRIFT',
+        'calculatorType': 'UNIVARIATE_DRIFT',
+        'segment': segment,
+        'metricName': 'JENSEN_SHANNON',
+        'componentName': None,
+        'columnName': 'feature',
+        'mean': 0.5,
+        'stdev': 0.1,
+        'config': {
+            'lowerValueLimit': config.get('lowerValueLimit'),
+            'upperValueLimit': config.get('upperValueLimit'),
+            'threshold': threshold,
+            'segmentThresholds': list(segment_thresholds),
+        },
+        'data': [
+            {
+                'startTimestamp': datetime.datetime(2024, 1, day + 1),
+                'endTimestamp': datetime.datetime(2024, 1, day + 2),
+                'value': value,
+            }
+            for day, value in enumerate(values)
+        ],
+    }
+
+
+def test_find_breaches_evaluates_constant_thresholds():
+    df = result._find_breaches([{'id': 1, 'name': 'model', 'results': [
+        _threshold_result({'__typename': 'ConstantThreshold', 'lower': 0.2, 'upper': None}, [0.1, 0.5, 0.9, None]),
+    ]}])
+
+    assert df['value'].tolist() == [0.1]
+    assert df['breach'].tolist() == ['LOWER']
+    assert df['upper_threshold'].isna().all()
+
+
+def test_find_breaches_evaluates_standard_deviation_thresholds_within_value_limits():
+    threshold = {'__typename': 'StandardDeviationThreshold', 'stdLowerMultiplier': 3, 'stdUpperMultiplier': 3}
+    df = result._find_breaches([{'id': 1, 'name': 'model', 'results': [
+        _threshold_result(threshold, [0.1, 0.25, 0.5, 0.7, 0.85], upperValueLimit=0.75),
+    ]}])
+
+    assert df['value'].tolist() == [0.1, 0.85]
+    assert df['breach'].tolist() == ['LOWER', 'UPPER']
+    assert df['lower_threshold'].iloc[0] == pytest.approx(0.2)
+    assert df['upper_threshold'].iloc[0] == pytest.approx(0.75)
+
+
+def test_find_breaches_prefers_segment_thresholds():
+    segment = {'id': 7, 'segmentColumnName': 'country', 'segment': 'BE'}
+    df = result._find_breaches([{'id': 1, 'name': 'model', 'results': [
+        _threshold_result(
+            {'__typename': 'ConstantThreshold', 'lower': 0, 'upper': 1}, [0.5, 0.8], segment=segment,
+            segment_thresholds=[{
+                'segment': {'id': 7},
+                'threshold': {'__typename': 'ConstantThreshold', 'lower': 0, 'upper': 0.6},
+            }],
+        ),
+    ]}])
+
+    assert df['value'].tolist() == [0.8]
+    assert df['segment'].tolist() == ['BE']
+
+
+def test_find_breaches_without_results_returns_empty_frame():
+    df = result._find_breaches([{'id': 1, 'name': 'model', 'results': []}])
+
+    assert df.empty
+    assert list(df.columns) == result._BREACH_COLUMNS
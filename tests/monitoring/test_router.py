@@ -0,0 +1,78 @@
+import pandas as pd
+
+from nannyml_cloud_sdk.monitoring import router
+from nannyml_cloud_sdk.monitoring.router import DataRouter
+
+
+def test_route_splits_data_by_key_and_caches_ids(monkeypatch):
+    calls = {'list': 0, 'prefetch': []}
+    added = {}
+
+    def list_models():
+        calls['list'] += 1
+        return [
+            {'id': '1', 'name': 'churn'}, {'id': '2', 'name': 'fraud'},
+            {'id': '3', 'name': 'dup'}, {'id': '4', 'name': 'dup'},
+        ]
+
+    def prefetch_data_sources(model_ids):
+        calls['prefetch'].append(model_ids)
+        return {model_id: [{'id': f'{model_id}0', 'name': 'analysis'}] for model_id in model_ids}
+
+    def add_data_in_bulk(data_source_ids, frames, max_workers, batch_size):
+        for model_id, frame in frames.items():
+            added.setdefault(data_source_ids[model_id], []).extend(frame['x'])
+        return [{'modelId': model_id, 'nrRows': len(frame), 'error': None} for model_id, frame in frames.items()]
+
+    monkeypatch.setattr(router.Model, 'list', staticmethod(list_models))
+    monkeypatch.setattr(router.Model, 'prefetch_data_sources', staticmethod(prefetch_data_sources))
+    monkeypatch.setattr(router, '_add_data_in_bulk', add_data_in_bulk)
+    data_router = DataRouter()
+
+    results = data_router.route(pd.DataFrame({
+        'model_name': ['fraud', 'churn', 'fraud', 'unknown', 'dup'],
+        'x': [1, 2, 3, 4, 5],
+    }))
+    data_router.route(pd.DataFrame({'model_name': ['churn'], 'x': [6]}))
+
+    assert results == [
+        {'key': 'fraud', 'modelId': '2', 'nrRows': 2, 'error': None},
+        {'key': 'churn', 'modelId': '1', 'nrRows': 1, 'error': None},
+        {'key': 'unknown', 'modelId': None, 'nrRows': 1, 'error': "No model is named 'unknown'"},
+        {'key': 'dup', 'modelId': None, 'nrRows': 1, 'error': "Multiple models are named 'dup'"},
+    ]
+    assert added == {'20': [1, 3], '10': [2, 6]}
+    assert calls == {'list': 1, 'prefetch': [['2', '1']]}
+
+
+def test_route_resolves_model_and_data_source_again_after_failure(monkeypatch):
+    prefetched, listed = [], []
+    monkeypatch.setattr(router.Model, 'list', staticmethod(lambda: listed.append(1) or [{'id': '1', 'name': 'churn'}]))
+    monkeypatch.setattr(router.Model, 'prefetch_data_sources', staticmethod(
+        lambda model_ids: prefetched.append(model_ids) or {'1': [{'id': '10', 'name': 'analysis'}]}
+    ))
+    monkeypatch.setattr(router, '_add_data_in_bulk', lambda *args: [{'modelId': '1', 'nrRows': 1, 'error': 'failed'}])
+    data_router = DataRouter()
+
+    data_router.route(pd.DataFrame({'model_name': ['churn'], 'x': [1]}))
+    data_router.route(pd.DataFrame({'model_name': ['churn'], 'x': [1]}))
+
+    assert prefetched == [['1'], ['1']]
+    assert len(listed) == 2
+
+
+def test_route_reports_rows_without_key(monkeypatch):
+    monkeypatch.setattr(router.Model, 'list', staticmethod(lambda: [{'id': '1', 'name': 'churn'}]))
+    monkeypatch.setattr(router.Model, 'prefetch_data_sources', staticmethod(
+        lambda model_ids: {'1': [{'id': '10', 'name': 'analysis'}]}
+    ))
+    monkeypatch.setattr(router, '_add_data_in_bulk', lambda data_source_ids, frames, *args: [
+        {'modelId': model_id, 'nrRows': len(frame), 'error': None} for model_id, frame in frames.items()
+    ])
+
+    results = DataRouter().route(pd.DataFrame({'model_name': ['churn', None, 'churn'], 'x': [1, 2, 3]}))
+
+    assert results == [
+        {'key': 'churn', 'modelId': '1', 'nrRows': 2, 'error': None},
+        {'key': None, 'modelId': None, 'nrRows': 1, 'error': "Rows without a value for 'model_name' can't be routed"},
+    ]
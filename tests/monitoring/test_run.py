@@ -1,5 +1,188 @@
+import datetime
+
+import pandas as pd
+import pytest
+
+from nannyml_cloud_sdk import client
+from nannyml_cloud_sdk.errors import ApiError
 from nannyml_cloud_sdk.monitoring import run
 
 
 def test_run_start_query_matches_api_schema(gql_client):
     gql_client.validate(run._START_RUN)
+
+
+def test_run_get_latest_run_query_matches_api_schema(gql_client):
+    gql_client.validate(run._GET_LATEST_RUN)
+
+
+def test_run_get_runs_query_matches_api_schema(gql_client):
+    gql_client.validate(run._GET_RUNS)
+
+
+def test_run_batched_start_query_matches_api_schema(gql_client):
+    gql_client.validate(client._batched_document(
+        'mutation', run._START_RUN_SELECTION, (('modelId', 'Int!'),), 2, run.RUN_SUMMARY_FRAGMENT
+    ))
+
+
+def test_run_batched_get_latest_run_query_matches_api_schema(gql_client):
+    gql_client.validate(client._batched_document(
+        'query', run._GET_LATEST_RUN_SELECTION, (('modelId', 'Int!'),), 2, run.RUN_SUMMARY_FRAGMENT
+    ))
+
+
+def test_run_batch_limits_runs_in_flight_and_yields_completions(monkeypatch):
+    started_at = datetime.datetime(2024, 1, 1)
+    polls = {}
+    requests = []
+
+    def summary(model_id, state):
+        return {
+            'id': f'run-{model_id}', 'state': state, 'scheduledFor': None, 'startedAt': started_at,
+            'completedAt': started_at + datetime.timedelta(seconds=int(model_id)) if state == 'COMPLETED' else None,
+            'ranSuccessfully': True if state == 'COMPLETED' else None,
+        }
+
+    def execute_batched(operation, selection, variable_types, items, fragments, batch_size, return_errors):
+        model_ids = [str(item['modelId']) for item in items]
+        if selection is run._GET_RUNS_SELECTION:
+            assert not model_ids
+            return []
+        requests.append((operation, model_ids))
+        if operation == 'mutation':
+            return [ApiError('Model not found') if model_id == '3' else summary(model_id, 'SCHEDULED')
+                    for model_id in model_ids]
+        results = []
+        for model_id in model_ids:
+            polls[model_id] = polls.get(model_id, 0) + 1
+            state = 'COMPLETED' if polls[model_id] == int(model_id) else 'RUNNING'
+            results.append({'latestRun': summary(model_id, state)})
+        return results
+
+    monkeypatch.setattr(run, 'execute_batched', execute_batched)
+
+    batch = run.Run.trigger_many(['2', '1', '3', '4'], max_in_flight=2, poll_interval=0)
+    completed = [result['modelId'] for result in batch]
+    summary_df = batch.summary()
+
+    assert completed == ['1', '3', '2', '4']
+    assert requests[:3] == [('mutation', ['2', '1']), ('query', ['2', '1']), ('mutation', ['3'])]
+    assert all(len(model_ids) <= 2 for operation, model_ids in requests if operation == 'query')
+    assert summary_df['duration'].fillna(-1).tolist() == [1.0, -1, 2.0, 4.0]
+    assert [None if pd.isna(error) else error for error in summary_df['error']] == [None, 'Model not found', None, None]
+
+
+def test_run_batched_get_runs_query_matches_api_schema(gql_client):
+    gql_client.validate(client._batched_document(
+        'query', run._GET_RUNS_SELECTION, (('modelId', 'Int!'),), 2, run.RUN_SUMMARY_FRAGMENT
+    ))
+
+
+def test_get_tracked_runs_looks_up_superseded_runs_in_batches(monkeypatch):
+    requests = []
+
+    def execute_batched(operation, selection, variable_types, items, fragments, batch_size, return_errors):
+        model_ids = [str(item['modelId']) for item in items]
+        requests.append((selection, model_ids))
+        if selection is run._GET_LATEST_RUN_SELECTION:
+            return [{'latestRun': {'id': f'{model_id}-new'}} for model_id in model_ids]
+        return [
+            ApiError('Model not found') if model_id == '3' else {'runs': [{'id': f'{model_id}-old'}]}
+            for model_id in model_ids
+        ]
+
+    monkeypatch.setattr(run, 'execute_batched', execute_batched)
+    monkeypatch.setattr(run, 'execute', lambda *args: pytest.fail('Runs should be looked up in batches'))
+
+    runs = run._get_tracked_runs({'1': '1-new', '2': '2-old', '3': '3-old', '4': 'missing'}, batch_size=50)
+
+    assert requests == [
+        (run._GET_LATEST_RUN_SELECTION, ['1', '2', '3', '4']), (run._GET_RUNS_SELECTION, ['2', '3', '4']),
+    ]
+    assert runs['1'] == {'id': '1-new'}
+    assert runs['2'] == {'id': '2-old'}
+    assert str(runs['3']) == 'Model not found'
+    assert str(runs['4']) == "Run 'missing' does not exist"
+
+
+def test_run_get_latest_run_events_query_matches_api_schema(gql_client):
+    gql_client.validate(run._GET_LATEST_RUN_EVENTS)
+
+
+def test_run_get_run_events_query_matches_api_schema(gql_client):
+    gql_client.validate(run._GET_RUN_EVENTS)
+
+
+def test_run_cancel_query_matches_api_schema(gql_client):
+    gql_client.validate(run._CANCEL_RUN)
+
+
+def test_run_batched_cancel_query_matches_api_schema(gql_client):
+    gql_client.validate(client._batched_document(
+        'mutation', run._CANCEL_RUN_SELECTION, (('modelId', 'Int!'),), 2, run.RUN_SUMMARY_FRAGMENT
+    ))
+
+
+def test_run_list_latest_runs_query_matches_api_schema(gql_client):
+    gql_client.validate(run._LIST_LATEST_RUNS)
+
+
+def test_run_get_run_profiles_query_matches_api_schema(gql_client):
+    gql_client.validate(run._GET_RUN_PROFILES)
+
+
+def test_calculator_profile_measures_time_between_calculator_events():
+    start = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+    def event(seconds, calculator, event_type='PROGRESS'):
+        return {
+            'id': seconds, 'eventType': event_type, 'calculator': calculator,
+            'timestamp': start + datetime.timedelta(seconds=seconds),
+        }
+
+    runs = [{
+        'id': 7, 'startedAt': start, 'completedAt': start + datetime.timedelta(seconds=100),
+        'events': [
+            event(0, None, 'STARTED'), event(1, 'CBPE'), event(11, 'CBPE'),
+            event(20, 'UNIVARIATE_DRIFT'), event(50, 'UNIVARIATE_DRIFT', 'WARNING'), event(80, 'UNIVARIATE_DRIFT'),
+        ],
+    }]
+
+    profile = run._calculator_profile(runs)
+
+    assert profile['calculator'].tolist() == ['UNIVARIATE_DRIFT', 'CBPE']
+    assert profile['duration'].tolist() == [80.0, 19.0]
+    assert profile['share'].tolist() == [0.8, 0.19]
+    assert profile['nrWarnings'].tolist() == [1, 0]
+    assert profile['runId'].tolist() == ['7', '7']
+
+
+def test_calculator_profile_measures_single_event_calculators_until_next_calculator():
+    start = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+    def event(seconds, calculator):
+        return {
+            'id': seconds, 'eventType': 'PROGRESS', 'calculator': calculator,
+            'timestamp': start + datetime.timedelta(seconds=seconds),
+        }
+
+    runs = [
+        {'id': 1, 'startedAt': start, 'completedAt': start + datetime.timedelta(seconds=30),
+         'events': [event(0, 'CBPE'), event(20, 'DLE')]},
+        {'id': 2, 'startedAt': start, 'completedAt': None, 'events': [event(0, 'CBPE'), event(5, 'CBPE')]},
+    ]
+
+    profile = run._calculator_profile(runs)
+
+    assert profile[['runId', 'calculator', 'duration']].values.tolist() == [
+        ['1', 'CBPE', 20.0], ['1', 'DLE', 10.0], ['2', 'CBPE', 5.0],
+    ]
+
+
+def test_run_get_latest_run_log_query_matches_api_schema(gql_client):
+    gql_client.validate(run._GET_LATEST_RUN_LOG)
+
+
+def test_run_get_run_logs_query_matches_api_schema(gql_client):
+    gql_client.validate(run._GET_RUN_LOGS)
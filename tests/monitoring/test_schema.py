@@ -1,4 +1,8 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pytest
+from nannyml_cloud_sdk.monitoring import schema as schema_module
 from nannyml_cloud_sdk.monitoring.schema import ModelSchema, Schema
 from nannyml_cloud_sdk.schema import INSPECT_SCHEMA
 
@@ -254,3 +258,164 @@ def test_schema_set_identifier_unsets_existing_identifier() -> None:
 
     assert new_schema is schema
     assert schema['columns'][1]['columnType'] == 'CONTINUOUS_FEATURE'
+
+
+def test_schema_from_df_infers_columns_locally() -> None:
+    df = pd.DataFrame({
+        'Timestamp': pd.date_range('2024-01-01', periods=4, freq='D'),
+        'customer_id': [1, 2, 3, 4],
+        'region': ['a', 'b', 'a', 'b'],
+        'age': [20.0, 30.0, 40.0, 50.0],
+        'y_pred_proba': [0.1, 0.9, 0.4, 0.6],
+        'y_pred': [0, 1, 0, 1],
+        'y_true': [0, 1, 1, 1],
+    })
+
+    schema = Schema.from_df('BINARY_CLASSIFICATION', df, ignore_column_names='region', inference='LOCAL')
+
+    assert [(column['name'], column['columnType']) for column in schema['columns']] == [
+        ('timestamp', 'TIMESTAMP'),
+        ('customer_id', 'IDENTIFIER'),
+        ('region', 'IGNORED'),
+        ('age', 'CONTINUOUS_FEATURE'),
+        ('y_pred_proba', 'PREDICTION_SCORE'),
+        ('y_pred', 'PREDICTION'),
+        ('y_true', 'TARGET'),
+    ]
+    assert pd.api.types.is_datetime64_dtype(pd.api.types.pandas_dtype(schema['columns'][0]['dataType']))
+
+
+def test_schema_from_df_infers_multiclass_prediction_scores_locally() -> None:
+    df = pd.DataFrame({
+        'y_pred_proba_cat': [0.2, 0.7], 'y_pred_proba_dog': [0.8, 0.3], 'color': ['red', 'blue'], 'code_id': [1, 1],
+    })
+
+    schema = Schema.from_df('MULTICLASS_CLASSIFICATION', df, inference='LOCAL')
+
+    assert [(column['columnType'], column['className']) for column in schema['columns']] == [
+        ('PREDICTION_SCORE', 'cat'),
+        ('PREDICTION_SCORE', 'dog'),
+        ('CATEGORICAL_FEATURE', None),
+        ('CONTINUOUS_FEATURE', None),
+    ]
+
+
+def test_schema_from_parquet_infers_columns_from_metadata(tmp_path) -> None:
+    table = pa.table({
+        'timestamp': pa.array(pd.date_range('2024-01-01', periods=4, freq='D'), type=pa.timestamp('ns')),
+        'customer_id': [1, 2, 3, 4],
+        'region': pa.array(['a', 'b', 'a', 'b']).dictionary_encode(),
+        'age': pa.array([20, None, 40, 50], type=pa.int64()),
+        'y_pred_proba': [0.1, 0.9, 0.4, 0.6],
+        'y_true': [0, 1, 1, 1],
+    })
+    path = tmp_path / 'reference.parquet'
+    pq.write_table(table, path)
+
+    schema = Schema.from_parquet('BINARY_CLASSIFICATION', path, prediction_column_name='y_true')
+
+    assert [(column['name'], column['columnType'], column['dataType']) for column in schema['columns']] == [
+        ('timestamp', 'TIMESTAMP', 'datetime64[ns]'),
+        ('customer_id', 'IDENTIFIER', 'int64'),
+        ('region', 'CATEGORICAL_FEATURE', 'category'),
+        ('age', 'CONTINUOUS_FEATURE', 'float64'),
+        ('y_pred_proba', 'PREDICTION_SCORE', 'float64'),
+        ('y_true', 'PREDICTION', 'int64'),
+    ]
+
+
+def test_schema_from_parquet_keeps_timestamp_unit_and_time_zone(tmp_path) -> None:
+    path = tmp_path / 'reference.parquet'
+    pq.write_table(pa.table({
+        'timestamp': pa.array([0, 1000], type=pa.timestamp('ms')),
+        'event_time': pa.array([0, 1000], type=pa.timestamp('us', tz='Europe/Brussels')),
+    }), path)
+
+    schema = Schema.from_parquet('REGRESSION', path)
+
+    assert [column['dataType'] for column in schema['columns']] == [
+        str(dtype) for dtype in pd.read_parquet(path).dtypes
+    ] == ['datetime64[ms]', 'datetime64[us, Europe/Brussels]']
+
+
+def test_schema_from_parquet_rejects_duplicate_identifiers(tmp_path) -> None:
+    path = tmp_path / 'reference.parquet'
+    pq.write_table(pa.table({'customer_id': [1, 1, 2], 'age': [1.0, 2.0, 3.0]}), path)
+
+    schema = Schema.from_parquet('REGRESSION', path)
+
+    assert schema['columns'][0]['columnType'] == 'CONTINUOUS_FEATURE'
+
+
+def test_schema_from_arrow_schema_infers_columns_without_data() -> None:
+    arrow_schema = pa.schema([
+        ('event_time', pa.timestamp('us', tz='UTC')), ('order_id', pa.string()), ('flag', pa.bool_()),
+        ('y_pred_proba', pa.float32()),
+    ])
+
+    schema = Schema.from_arrow_schema('BINARY_CLASSIFICATION', arrow_schema, target_column_name='flag')
+
+    assert [(column['name'], column['columnType'], column['dataType']) for column in schema['columns']] == [
+        ('event_time', 'TIMESTAMP', 'datetime64[us, UTC]'),
+        ('order_id', 'IDENTIFIER', 'object'),
+        ('flag', 'TARGET', 'bool'),
+        ('y_pred_proba', 'PREDICTION_SCORE', 'float32'),
+    ]
+
+
+def test_schema_from_df_applies_overrides_to_wide_schema(monkeypatch) -> None:
+    nr_features = 3000
+    columns = [
+        {'name': f'f{i}', 'columnType': 'CONTINUOUS_FEATURE', 'dataType': 'float64', 'className': None,
+         'columnFlags': []}
+        for i in range(nr_features)
+    ] + [{'name': 'y', 'columnType': 'TARGET', 'dataType': 'int64', 'className': None, 'columnFlags': []}]
+    monkeypatch.setattr(schema_module, '_inspect_columns', lambda *args: columns)
+
+    schema = Schema.from_df(
+        'BINARY_CLASSIFICATION', pd.DataFrame(),
+        target_column_name='F0',
+        feature_columns={f'F{i}': 'CATEGORY' for i in range(1, nr_features)},
+        segment_column_names='f1',
+    )
+
+    assert schema['columns'] is columns
+    assert columns[0]['columnType'] == 'TARGET'
+    assert columns[-1]['columnType'] == 'CONTINUOUS_FEATURE'
+    assert all(column['columnType'] == 'CATEGORICAL_FEATURE' for column in columns[1:nr_features])
+    assert columns[1]['columnFlags'] == ['SEGMENT']
+    assert columns[2]['columnFlags'] == []
+
+
+def _column(name, column_type, data_type='float64', class_name=None):
+    return {'name': name, 'columnType': column_type, 'dataType': data_type, 'className': class_name, 'columnFlags': []}
+
+
+def test_schema_diff_classifies_changes() -> None:
+    old: ModelSchema = {'problemType': 'BINARY_CLASSIFICATION', 'columns': [
+        _column('id', 'IDENTIFIER', 'int64'),
+        _column('age', 'CONTINUOUS_FEATURE', 'int64'),
+        _column('region', 'CATEGORICAL_FEATURE', 'object'),
+        _column('score', 'PREDICTION_SCORE'),
+        _column('legacy', 'IGNORED'),
+    ]}
+    new: ModelSchema = {'problemType': 'BINARY_CLASSIFICATION', 'columns': [
+        _column('id', 'IDENTIFIER', 'int64'),
+        _column('age', 'CONTINUOUS_FEATURE', 'float64'),
+        _column('region', 'IGNORED', 'object'),
+        _column('score', 'TARGET'),
+        _column('income', 'CONTINUOUS_FEATURE'),
+        _column('y', 'TARGET', 'int64'),
+    ]}
+
+    changes = Schema.diff(old, new)
+
+    assert [(change['name'], change['changeType'], change['compatible']) for change in changes] == [
+        ('age', 'DATA_TYPE_CHANGED', True),
+        ('region', 'COLUMN_TYPE_CHANGED', True),
+        ('score', 'COLUMN_TYPE_CHANGED', False),
+        ('income', 'ADDED', True),
+        ('y', 'ADDED', False),
+        ('legacy', 'REMOVED', False),
+    ]
+    assert changes[3]['old'] is None and changes[3]['new'] is new['columns'][4]
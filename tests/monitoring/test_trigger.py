@@ -0,0 +1,113 @@
+import time
+
+import pytest
+
+from nannyml_cloud_sdk.errors import ApiError
+from nannyml_cloud_sdk.monitoring import trigger
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _fake_execute_batched(latest_run_states, requests):
+    def execute_batched(operation, selection, variable_types, items, fragments, batch_size, return_errors):
+        model_ids = [str(item['modelId']) for item in items]
+        requests.append((operation, model_ids))
+        if operation == 'query':
+            return [
+                ApiError('Model not found') if latest_run_states.get(model_id) == 'MISSING'
+                else {'latestRun': {'id': '1', 'state': latest_run_states[model_id]}
+                      if model_id in latest_run_states else None}
+                for model_id in model_ids
+            ]
+        return [{'id': f'run-{model_id}', 'state': 'SCHEDULED'} for model_id in model_ids]
+    return execute_batched
+
+
+def test_debounced_run_trigger_waits_for_quiet_period(monkeypatch):
+    requests = []
+    monkeypatch.setattr(trigger, 'execute_batched', _fake_execute_batched({}, requests))
+    timer = FakeTimer()
+    debounced = trigger.DebouncedRunTrigger(quiet_period=60, max_delay=300, timer=timer)
+
+    debounced.notify('1')
+    timer.now = 40
+    debounced.notify('1')
+    timer.now = 70
+    debounced.notify('2')
+    timer.now = 80
+    assert debounced.flush() == []
+
+    timer.now = 100
+    assert [result['run']['id'] for result in debounced.flush()] == ['run-1']
+    timer.now = 130
+    assert [result['run']['id'] for result in debounced.flush()] == ['run-2']
+
+    # Data keeps arriving for model 1, so it is only triggered after the maximum delay
+    while timer.now < 430:
+        debounced.notify('1')
+        assert debounced.flush() == []
+        timer.now += 30
+    debounced.notify('1')
+    assert [result['modelId'] for result in debounced.flush()] == ['1']
+    assert debounced.pending() == []
+    assert [model_ids for operation, model_ids in requests if operation == 'mutation'] == [['1'], ['2'], ['1']]
+
+
+def test_debounced_run_trigger_keeps_models_with_active_runs_pending(monkeypatch):
+    states = {'1': 'RUNNING', '2': 'COMPLETED', '3': 'MISSING'}
+    requests = []
+    monkeypatch.setattr(trigger, 'execute_batched', _fake_execute_batched(states, requests))
+    debounced = trigger.DebouncedRunTrigger(timer=FakeTimer())
+    for model_id in ['1', '2', '3', '4']:
+        debounced.notify(model_id)
+
+    results = debounced.flush(force=True)
+
+    assert [(result['modelId'], result['error']) for result in results] == [
+        ('3', 'Model not found'), ('2', None), ('4', None)
+    ]
+    assert requests[1] == ('mutation', ['2', '4'])
+    assert debounced.pending() == ['1']
+
+    states['1'] = 'COMPLETED'
+    assert [result['modelId'] for result in debounced.flush(force=True)] == ['1']
+    assert debounced.pending() == []
+
+
+def test_debounced_run_trigger_stop_reports_models_with_active_runs(monkeypatch):
+    states = {'1': 'SCHEDULED'}
+    monkeypatch.setattr(trigger, 'execute_batched', _fake_execute_batched(states, []))
+    debounced = trigger.DebouncedRunTrigger(timer=FakeTimer())
+    debounced.notify('1')
+    debounced.notify('2')
+
+    results = debounced.stop(flush=True)
+
+    assert [(result['modelId'], result['run']['id']) for result in results] == [('2', 'run-2'), ('1', '1')]
+    assert results[0]['error'] is None
+    assert "Run '1' is still active" in results[1]['error']
+    assert debounced.pending() == ['1']
+
+
+def test_debounced_run_trigger_logs_and_reraises_background_errors(monkeypatch, caplog):
+    def execute_batched(*args, **kwargs):
+        raise ApiError('Unauthorized')
+
+    monkeypatch.setattr(trigger, 'execute_batched', execute_batched)
+    debounced = trigger.DebouncedRunTrigger(quiet_period=0, timer=FakeTimer())
+    debounced.notify('1')
+
+    debounced.start(check_interval=0.01)
+    deadline = time.monotonic() + 5
+    while debounced._error is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    with pytest.raises(ApiError, match='Unauthorized'):
+        debounced.stop(flush=False)
+    assert 'no longer triggered in the background' in caplog.text
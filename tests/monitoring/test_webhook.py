@@ -0,0 +1,119 @@
+import asyncio
+
+from nannyml_cloud_sdk.errors import ApiError
+from nannyml_cloud_sdk.monitoring import webhook
+
+
+async def _post(port, path='/', headers=''):
+    return await _send(port, f'POST {path} HTTP/1.1\r\nHost: localhost\r\n{headers}Content-Length: 2\r\n\r\n{{}}')
+
+
+async def _send(port, request):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(request.encode())
+    await writer.drain()
+    status_line = await reader.readline()
+    writer.close()
+    return int(status_line.split()[1])
+
+
+def _fake_get_tracked_runs(states, checks):
+    def get_tracked_runs(run_ids, batch_size):
+        checks.append(dict(run_ids))
+        return {
+            model_id: ApiError('Model not found') if states[model_id] == 'MISSING'
+            else {'id': run_id, 'state': states[model_id]}
+            for model_id, run_id in run_ids.items()
+        }
+    return get_tracked_runs
+
+
+def test_run_completion_receiver_checks_runs_on_webhook_call(gql_client, monkeypatch):
+    states = {'1': 'RUNNING', '2': 'RUNNING', '3': 'MISSING'}
+    checks = []
+    monkeypatch.setattr(webhook, '_get_tracked_runs', _fake_get_tracked_runs(states, checks))
+
+    async def scenario():
+        async with webhook.RunCompletionReceiver(
+            host='127.0.0.1', port=0, path='/hook', headers={'X-Secret': 'abc'}, fallback_interval=60
+        ) as receiver:
+            first, second, missing = receiver.track('1', '10'), receiver.track('2', '20'), receiver.track('3', '30')
+
+            assert await _post(receiver.port, '/other', 'X-Secret: abc\r\n') == 404
+            assert await _post(receiver.port, '/hook', 'X-Secret: wrong\r\n') == 401
+            await asyncio.sleep(0.1)
+            assert checks == []
+
+            states['1'] = 'COMPLETED'
+            assert await _post(receiver.port, '/hook', 'x-secret: abc\r\n') == 204
+            assert (await asyncio.wait_for(first, 1))['id'] == '10'
+            assert isinstance(missing.exception(), ApiError)
+            assert not second.done()
+        assert second.cancelled()
+
+    asyncio.run(scenario())
+    assert checks[0] == {'1': '10', '2': '20', '3': '30'}
+
+
+def test_run_completion_receiver_falls_back_to_polling(gql_client, monkeypatch):
+    states = {'1': 'COMPLETED'}
+    checks = []
+    monkeypatch.setattr(webhook, '_get_tracked_runs', _fake_get_tracked_runs(states, checks))
+
+    async def scenario():
+        async with webhook.RunCompletionReceiver(host='127.0.0.1', port=0, fallback_interval=0.05) as receiver:
+            return await asyncio.wait_for(receiver.track('1', '10'), 1)
+
+    assert asyncio.run(scenario())['id'] == '10'
+
+
+def test_run_completion_receiver_rejects_invalid_requests(gql_client, monkeypatch):
+    checks = []
+    monkeypatch.setattr(webhook, '_get_tracked_runs', _fake_get_tracked_runs({}, checks))
+
+    async def scenario():
+        async with webhook.RunCompletionReceiver(port=0, fallback_interval=60, request_timeout=0.1) as receiver:
+            return [
+                await _send(receiver.port, 'garbage\r\n\r\n'),
+                await _send(receiver.port, 'POST / HTTP/1.1\r\nContent-Length: abc\r\n\r\n'),
+                await _send(receiver.port, f'POST / HTTP/1.1\r\nContent-Length: {2 ** 30}\r\n\r\n'),
+                await _send(receiver.port, f'POST / HTTP/1.1\r\nX-Padding: {"a" * 2 ** 16}\r\n\r\n'),
+                await _send(receiver.port, 'POST / HTTP/1.1\r\n'),
+            ]
+
+    assert asyncio.run(scenario()) == [400, 400, 400, 400, 408]
+    assert checks == []
+
+
+def test_run_completion_receiver_rejects_non_ascii_headers(gql_client, monkeypatch):
+    monkeypatch.setattr(webhook, '_get_tracked_runs', _fake_get_tracked_runs({}, []))
+
+    async def scenario():
+        async with webhook.RunCompletionReceiver(port=0, headers={'X-Secret': 'abc'}, fallback_interval=60) as receiver:
+            return [
+                await _post(receiver.port, '/', 'X-Secret: abé\r\n'),
+                await _send(receiver.port, 'POST / HTTP/1.1\r\nX-Secret: éé\r\n\r\n'),
+            ]
+
+    assert asyncio.run(scenario()) == [401, 401]
+
+
+def test_run_completion_receiver_logs_failed_checks_and_keeps_checking(gql_client, monkeypatch, caplog):
+    checks = []
+    get_tracked_runs = _fake_get_tracked_runs({'1': 'COMPLETED'}, checks)
+
+    def flaky_get_tracked_runs(run_ids, batch_size):
+        if not checks:
+            checks.append(None)
+            raise ApiError('API unreachable')
+        return get_tracked_runs(run_ids, batch_size)
+
+    monkeypatch.setattr(webhook, '_get_tracked_runs', flaky_get_tracked_runs)
+
+    async def scenario():
+        async with webhook.RunCompletionReceiver(port=0, fallback_interval=0.05) as receiver:
+            return await asyncio.wait_for(receiver.track('1', '10'), 1)
+
+    assert asyncio.run(scenario())['id'] == '10'
+    assert 'Checking tracked runs failed' in caplog.text
+    assert 'API unreachable' in caplog.text
@@ -0,0 +1,55 @@
+from nannyml_cloud_sdk.cache import MetadataCache
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_cache_loads_value_once():
+    cache = MetadataCache()
+    loads = []
+
+    assert cache.get(('MONITORING', '1'), lambda: loads.append(1) or 'value') == 'value'
+    assert cache.get(('MONITORING', '1'), lambda: loads.append(1) or 'other') == 'value'
+    assert loads == [1]
+    assert cache.statistics()['hits'] == 1
+    assert cache.statistics()['misses'] == 1
+
+
+def test_cache_expires_entries_after_ttl():
+    timer = FakeTimer()
+    cache = MetadataCache(ttl=10, timer=timer)
+    cache.set(('MONITORING', '1'), 'old')
+
+    timer.now = 11
+    assert cache.get(('MONITORING', '1'), lambda: 'new') == 'new'
+    assert cache.statistics()['expirations'] == 1
+
+
+def test_cache_evicts_least_recently_used_entry():
+    cache = MetadataCache(maxsize=2)
+    cache.set(('MONITORING', '1'), 1)
+    cache.set(('MONITORING', '2'), 2)
+    cache.get(('MONITORING', '1'), lambda: None)
+    cache.set(('MONITORING', '3'), 3)
+
+    assert cache.get(('MONITORING', '2'), lambda: 'reloaded') == 'reloaded'
+    assert cache.statistics()['evictions'] == 2
+
+
+def test_cache_invalidates_all_entries_of_a_model():
+    cache = MetadataCache()
+    cache.set(('MONITORING', '1', 'analysis'), 'analysis')
+    cache.set(('MONITORING', '1', 'target'), 'target')
+    cache.set(('MONITORING', '2', 'analysis'), 'other model')
+    cache.set(('EVALUATION', '1'), 'other product')
+
+    cache.invalidate('MONITORING', 1)
+
+    assert cache.statistics()['size'] == 2
+    assert cache.get(('MONITORING', '1', 'analysis'), lambda: 'reloaded') == 'reloaded'
+    assert cache.get(('MONITORING', '2', 'analysis'), lambda: 'reloaded') == 'other model'
@@ -0,0 +1,50 @@
+from gql.transport.exceptions import TransportQueryError
+from graphql import print_ast
+
+from nannyml_cloud_sdk import client
+from nannyml_cloud_sdk.errors import ApiError
+
+
+def test_batched_document_renames_variables_per_alias(gql_client):
+    document = client._batched_document(
+        'query', 'monitoring_model(id: $id) { id name }', (('id', 'Int!'),), 2
+    )
+    gql_client.validate(document)
+
+    source = print_ast(document)
+    assert '_0: monitoring_model(id: $id_0)' in source
+    assert '_1: monitoring_model(id: $id_1)' in source
+
+
+def test_execute_batched_splits_items_into_batches(monkeypatch):
+    requests = []
+
+    def execute(document, variable_values):
+        requests.append(variable_values)
+        return {f'_{i}': value for i, value in enumerate(variable_values.values())}
+
+    monkeypatch.setattr(client, 'execute', execute)
+    results = client.execute_batched(
+        'query', 'monitoring_model(id: $id) { id }', {'id': 'Int!'}, [{'id': i} for i in range(5)], batch_size=2
+    )
+
+    assert results == [0, 1, 2, 3, 4]
+    assert requests == [{'id_0': 0, 'id_1': 1}, {'id_0': 2, 'id_1': 3}, {'id_0': 4}]
+
+
+def test_execute_batched_returns_errors_of_failed_items(monkeypatch):
+    def execute(document, variable_values):
+        error = TransportQueryError(
+            'failed', errors=[{'message': 'Data source not found', 'path': ['_1']}], data={'_0': {'id': 1}, '_1': None}
+        )
+        raise ApiError('Data source not found') from error
+
+    monkeypatch.setattr(client, 'execute', execute)
+    results = client.execute_batched(
+        'mutation', 'add_data_to_data_source(input: $input) { id }', {'input': 'DataSourceDataInput!'},
+        [{'input': 1}, {'input': 2}], return_errors=True,
+    )
+
+    assert results[0] == {'id': 1}
+    assert isinstance(results[1], ApiError)
+    assert str(results[1]) == 'Data source not found'
@@ -1,4 +1,8 @@
-from nannyml_cloud_sdk import data
+import pandas as pd
+import pytest
+
+from nannyml_cloud_sdk import client, data
+from nannyml_cloud_sdk.errors import ApiError, InvalidOperationError
 
 
 def test_upload_dataset_query_matches_api_schema(gql_client):
@@ -11,3 +15,182 @@ def test_add_data_to_data_source_query_matches_api_schema(gql_client):
 
 def test_upsert_data_in_data_source_query_matches_api_schema(gql_client):
     gql_client.validate(data._UPSERT_DATA_IN_DATA_SOURCE)
+
+
+def test_batched_add_data_to_data_source_query_matches_api_schema(gql_client):
+    gql_client.validate(client._batched_document(
+        'mutation', data._ADD_DATA_TO_DATA_SOURCE_SELECTION, (('input', 'DataSourceDataInput!'),), 2
+    ))
+
+
+def test_split_by_model_groups_rows_and_drops_model_id_column():
+    df = pd.DataFrame({'model': ['1', '2', '1'], 'x': [1, 2, 3]})
+
+    frames = data._split_by_model(df, 'model')
+
+    assert list(frames) == ['1', '2']
+    assert frames['1']['x'].tolist() == [1, 3]
+    assert list(frames['2'].columns) == ['x']
+
+
+def test_split_by_model_keeps_rows_without_model_id():
+    df = pd.DataFrame({'model': ['1', None, '1', float('nan')], 'x': [1, 2, 3, 4]})
+
+    frames = data._split_by_model(df, 'model')
+
+    assert list(frames) == ['1', None]
+    assert frames[None]['x'].tolist() == [2, 4]
+
+
+def test_add_data_in_bulk_reports_outcome_per_model(monkeypatch):
+    def upload(df):
+        if len(df) == 4:
+            raise ApiError('Storage unavailable')
+        return {'cache': {'id': f'upload-{len(df)}'}}
+
+    monkeypatch.setattr(data.Data, 'upload', staticmethod(upload))
+    requests = []
+
+    def execute_batched(operation, selection, variable_types, items, **kwargs):
+        requests.extend(items)
+        return [{'id': '10'}, ApiError('Data source not found')]
+
+    monkeypatch.setattr(data, 'execute_batched', execute_batched)
+    frames = {
+        '1': pd.DataFrame({'x': [1]}),
+        '2': pd.DataFrame({'x': [1, 2]}),
+        '3': pd.DataFrame({'x': [1, 2, 3]}),
+        '4': pd.DataFrame({'x': [1, 2, 3, 4]}),
+        None: pd.DataFrame({'x': [1, 2, 3, 4, 5]}),
+    }
+
+    results = data._add_data_in_bulk(
+        {'1': '10', '2': '20', '3': None, '4': '40'}, frames, max_workers=2, batch_size=10
+    )
+
+    assert requests == [
+        {'input': {'id': 10, 'storageInfo': {'cache': {'id': 'upload-1'}}}},
+        {'input': {'id': 20, 'storageInfo': {'cache': {'id': 'upload-2'}}}},
+    ]
+    assert results == [
+        {'modelId': '1', 'nrRows': 1, 'error': None},
+        {'modelId': '2', 'nrRows': 2, 'error': 'Data source not found'},
+        {'modelId': '3', 'nrRows': 3, 'error': "Model '3' has no data source to add data to"},
+        {'modelId': '4', 'nrRows': 4, 'error': 'Upload failed: Storage unavailable'},
+        {'modelId': None, 'nrRows': 5, 'error': "Rows without a model ID can't be added"},
+    ]
+
+
+@pytest.fixture
+def deleted_chunks(monkeypatch):
+    chunks = []
+    monkeypatch.setattr(data.Data, 'upload', staticmethod(lambda df: chunks.append(df) or {'cache': {'id': 'ids'}}))
+    monkeypatch.setattr(data, 'execute', lambda document, variable_values: None)
+    return chunks
+
+
+def test_delete_data_in_chunks_deduplicates_and_sorts_chunks(deleted_chunks):
+    processed = []
+
+    data._delete_data_in_chunks('1', iter([5, 3, 5, 1, 2, 2, 9]), lambda: 'id', 3, processed.append, None)
+
+    assert [chunk['id'].tolist() for chunk in deleted_chunks] == [[3, 5], [1, 2], [9]]
+    assert processed == [3, 6, 7]
+
+
+def test_delete_data_in_chunks_resumes_from_checkpoint(deleted_chunks, monkeypatch, tmp_path):
+    checkpoint = tmp_path / 'deletion.json'
+
+    def execute(document, variable_values):
+        if len(deleted_chunks) == 2:
+            raise ApiError('Connection lost')
+
+    monkeypatch.setattr(data, 'execute', execute)
+    with pytest.raises(ApiError):
+        data._delete_data_in_chunks('1', [1, 2, 3, 4, 5], lambda: 'id', 2, None, checkpoint)
+    assert checkpoint.exists()
+
+    monkeypatch.setattr(data, 'execute', lambda document, variable_values: None)
+    data._delete_data_in_chunks('1', [1, 2, 3, 4, 5], lambda: 'id', 2, None, checkpoint)
+
+    assert [chunk['id'].tolist() for chunk in deleted_chunks] == [[1, 2], [3, 4], [3, 4], [5]]
+    assert not checkpoint.exists()
+
+
+def test_delete_data_in_chunks_rejects_checkpoint_of_other_data_source(deleted_chunks, tmp_path):
+    checkpoint = tmp_path / 'deletion.json'
+    checkpoint.write_text('{"dataSourceId": "2", "nrProcessed": 10}')
+
+    with pytest.raises(InvalidOperationError):
+        data._delete_data_in_chunks('1', [1, 2], lambda: 'id', 2, None, checkpoint)
+
+
+def test_delete_data_in_chunks_only_drops_duplicates_within_chunks(deleted_chunks):
+    data._delete_data_in_chunks('1', iter([1, 2, 1, 3, 2, 4, 3]), lambda: 'id', 3, None, None)
+
+    assert [chunk['id'].tolist() for chunk in deleted_chunks] == [[1, 2], [2, 3, 4], [3]]
+
+
+def test_delete_data_in_chunks_refuses_to_resume_with_other_identifiers(deleted_chunks, monkeypatch, tmp_path):
+    checkpoint = tmp_path / 'deletion.json'
+
+    def execute(document, variable_values):
+        if len(deleted_chunks) == 2:
+            raise ApiError('Connection lost')
+
+    monkeypatch.setattr(data, 'execute', execute)
+    with pytest.raises(ApiError):
+        data._delete_data_in_chunks('1', [1, 2, 3, 4, 5], lambda: 'id', 2, None, checkpoint)
+
+    monkeypatch.setattr(data, 'execute', lambda document, variable_values: None)
+    with pytest.raises(InvalidOperationError, match='other identifiers'):
+        data._delete_data_in_chunks('1', [7, 8, 9, 10], lambda: 'id', 2, None, checkpoint)
+    with pytest.raises(InvalidOperationError, match='only 1 were provided'):
+        data._delete_data_in_chunks('1', [1], lambda: 'id', 2, None, checkpoint)
+    assert len(deleted_chunks) == 2
+
+
+def test_delete_data_in_chunks_streams_identifier_column_from_parquet(deleted_chunks, monkeypatch, tmp_path):
+    path = tmp_path / 'ids.parquet'
+    pd.DataFrame({'id': [1, 2, 3, 4, 5], 'other': list('abcde')}).to_parquet(path, row_group_size=2)
+    checkpoint = tmp_path / 'deletion.json'
+
+    def execute(document, variable_values):
+        if len(deleted_chunks) == 2:
+            raise ApiError('Connection lost')
+
+    monkeypatch.setattr(data, 'execute', execute)
+    with pytest.raises(ApiError):
+        data._delete_data_in_chunks('1', str(path), lambda: 'id', 3, None, checkpoint)
+
+    monkeypatch.setattr(data, 'execute', lambda document, variable_values: None)
+    data._delete_data_in_chunks('1', str(path), lambda: 'id', 10, None, checkpoint)
+
+    assert [chunk.to_dict('list') for chunk in deleted_chunks] == [{'id': [1, 2, 3]}, {'id': [4, 5]}, {'id': [4, 5]}]
+
+
+def test_head_to_frame_applies_data_types_of_data_source():
+    head = '[{"ts": "2024-01-01T00:00:00", "x": 1, "y": "a"}, {"ts": "2024-01-02T00:00:00", "x": 2, "y": "b"}]'
+    columns = [
+        {'name': 'ts', 'columnType': 'TIMESTAMP', 'dataType': 'datetime64[ns]', 'className': None, 'columnFlags': []},
+        {'name': 'x', 'columnType': 'CONTINUOUS_FEATURE', 'dataType': 'float64', 'className': None, 'columnFlags': []},
+        {'name': 'y', 'columnType': 'CATEGORICAL_FEATURE', 'dataType': 'int64', 'className': None, 'columnFlags': []},
+    ]
+
+    with pytest.warns(UserWarning, match="Column 'y' can't be converted to 'int64'"):
+        df = data._head_to_frame(head, columns)
+
+    assert pd.api.types.is_datetime64_dtype(df['ts'])
+    assert pd.api.types.is_float_dtype(df['x'])
+    assert df['y'].tolist() == ['a', 'b']
+
+
+def test_history_to_frame_combines_data_sources_sorted_by_timestamp():
+    df = data._history_to_frame({
+        'reference': [{'id': '1', 'eventType': 'CREATED', 'timestamp': '2024-01-02T00:00:00+00:00', 'nrRows': 10}],
+        'analysis': [{'id': '2', 'eventType': 'CREATED', 'timestamp': '2024-01-01T00:00:00+00:00', 'nrRows': None}],
+    })
+
+    assert df['dataSource'].tolist() == ['analysis', 'reference']
+    assert isinstance(df['timestamp'].dtype, pd.DatetimeTZDtype) and str(df['timestamp'].dt.tz) == 'UTC'
+    assert df['nrRows'].tolist() == [pd.NA, 10]
@@ -0,0 +1,168 @@
+import pytest
+
+import nannyml_cloud_sdk
+
+from nannyml_cloud_sdk import run
+from nannyml_cloud_sdk.errors import ApiError, RunTimeoutError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    def timer(self):
+        return self.now
+
+
+def _states(*states):
+    return iter([{'id': '1', 'state': state, 'ranSuccessfully': state == 'COMPLETED'} for state in states])
+
+
+def test_wait_for_run_backs_off_while_state_is_unchanged():
+    clock = FakeClock()
+    states = _states('SCHEDULED', 'SCHEDULED', 'SCHEDULED', 'RUNNING', 'RUNNING', 'COMPLETED')
+
+    result = run._wait_for_run(lambda: next(states), list, None, None, 1, 2, clock.sleep, clock.timer)
+
+    assert result['state'] == 'COMPLETED'
+    assert clock.sleeps == [1, 1.5, 2, 1, 1.5]
+
+
+def test_wait_for_run_keeps_waiting_while_cancelling():
+    clock = FakeClock()
+    states = iter([
+        {'id': '1', 'state': 'CANCELLING', 'ranSuccessfully': None},
+        {'id': '1', 'state': 'COMPLETED', 'ranSuccessfully': False},
+    ])
+
+    result = run._wait_for_run(lambda: next(states), list, '1', None, 1, 2, clock.sleep, clock.timer)
+
+    assert result == {'id': '1', 'state': 'COMPLETED', 'ranSuccessfully': False}
+
+
+def test_wait_for_run_looks_up_superseded_run():
+    clock = FakeClock()
+    runs = [{'id': '2', 'state': 'RUNNING'}, {'id': '1', 'state': 'COMPLETED'}]
+
+    result = run._wait_for_run(lambda: runs[0], lambda: runs, '1', None, 1, 2, clock.sleep, clock.timer)
+
+    assert result == {'id': '1', 'state': 'COMPLETED'}
+    assert clock.sleeps == []
+
+
+def test_wait_for_run_raises_on_timeout():
+    clock = FakeClock()
+
+    with pytest.raises(RunTimeoutError):
+        run._wait_for_run(lambda: {'id': '1', 'state': 'RUNNING'}, list, None, 5, 2, 10, clock.sleep, clock.timer)
+    assert sum(clock.sleeps) == 5
+
+
+def test_iter_run_events_yields_new_events_until_run_completes():
+    clock = FakeClock()
+    polls = iter([
+        {'id': '1', 'state': 'RUNNING', 'events': [{'id': 2}, {'id': 1}]},
+        {'id': '1', 'state': 'RUNNING', 'events': [{'id': 1}, {'id': 2}, {'id': 3}]},
+        {'id': '1', 'state': 'COMPLETED', 'events': [{'id': 1}, {'id': 2}, {'id': 3}, {'id': 4}]},
+    ])
+
+    events = list(run._iter_run_events(lambda: next(polls), list, None, 1, clock.sleep))
+
+    assert [event['id'] for event in events] == [1, 2, 3, 4]
+    assert clock.sleeps == [1, 1]
+
+
+def test_iter_run_events_follows_run_after_newer_run_starts():
+    clock = FakeClock()
+    polls = iter([
+        {'id': '1', 'state': 'RUNNING', 'events': [{'id': 1}]},
+        {'id': '2', 'state': 'SCHEDULED', 'events': [{'id': 9}]},
+    ])
+    runs = [{'id': '1', 'state': 'COMPLETED', 'events': [{'id': 1}, {'id': 2}]}]
+
+    events = list(run._iter_run_events(lambda: next(polls), lambda: runs, None, 1, clock.sleep))
+
+    assert [event['id'] for event in events] == [1, 2]
+
+
+def test_cancel_active_runs_only_cancels_scheduled_and_running_runs(monkeypatch):
+    requests = []
+
+    def execute_batched(operation, selection, variable_types, items, fragments, batch_size, return_errors):
+        requests.extend(items)
+        return [{'id': '11', 'state': 'CANCELLING'}, ApiError('Run already completed')]
+
+    monkeypatch.setattr(run, 'execute_batched', execute_batched)
+    models = [
+        {'id': 1, 'latestRun': {'id': '11', 'state': 'RUNNING'}},
+        {'id': 2, 'latestRun': {'id': '12', 'state': 'COMPLETED'}},
+        {'id': 3, 'latestRun': None},
+        {'id': 4, 'latestRun': {'id': '14', 'state': 'SCHEDULED'}},
+        {'id': 5, 'latestRun': {'id': '15', 'state': 'RUNNING'}},
+    ]
+
+    results = run._cancel_active_runs(
+        models, ['1', '2', '3', '4'], 'modelId', 'selection', {'runId': 'Int!'},
+        lambda model_id, active_run: {'runId': int(active_run['id'])}, '', 50,
+    )
+
+    assert requests == [{'runId': 11}, {'runId': 14}]
+    assert results == [
+        {'modelId': '1', 'run': {'id': '11', 'state': 'CANCELLING'}, 'error': None},
+        {'modelId': '4', 'run': None, 'error': 'Run already completed'},
+    ]
+
+
+@pytest.fixture
+def log_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(nannyml_cloud_sdk, 'log_cache_dir', str(tmp_path))
+    monkeypatch.setattr(nannyml_cloud_sdk, 'url', 'https://nannyml.example.com')
+    return tmp_path
+
+
+def test_get_run_log_returns_tail_from_offset(log_cache_dir):
+    latest_run = {'id': '1', 'state': 'RUNNING', 'log': 'first line\nsecond line\n'}
+
+    result = run._get_run_log('MONITORING', lambda: latest_run, list, None, len('first line\n'))
+
+    assert result == {'runId': '1', 'state': 'RUNNING', 'log': 'second line\n', 'offset': 23}
+    assert not any(log_cache_dir.rglob('*.log.gz'))
+
+
+def test_get_run_log_caches_logs_of_completed_runs(log_cache_dir):
+    runs = [{'id': '1', 'state': 'COMPLETED', 'log': 'old run'}, {'id': '2', 'state': 'RUNNING', 'log': 'new'}]
+    requests = []
+
+    def get_runs():
+        requests.append('runs')
+        return runs
+
+    assert run._get_run_log('MONITORING', lambda: runs[1], get_runs, '1', 0)['log'] == 'old run'
+    assert run._get_run_log('MONITORING', lambda: runs[1], get_runs, '1', 4)['log'] == 'run'
+    assert requests == ['runs']
+    assert [path.name for path in log_cache_dir.rglob('*.log.gz')] == ['monitoring-1.log.gz']
+
+    # Run IDs are only unique per product type
+    assert run._get_run_log('EXPERIMENT', lambda: runs[1], get_runs, '1', 0)['log'] == 'old run'
+    assert requests == ['runs', 'runs']
+
+
+def test_tail_run_log_yields_added_text_until_run_completes():
+    logs = iter([('RUNNING', 'a'), ('RUNNING', 'a'), ('RUNNING', 'ab'), ('COMPLETED', 'abc')])
+    offsets = []
+
+    def get_log(run_id, offset):
+        offsets.append(offset)
+        state, log = next(logs)
+        return {'runId': '1', 'state': state, 'log': log[offset:], 'offset': len(log)}
+
+    clock = FakeClock()
+
+    assert list(run._tail_run_log(get_log, None, 5, clock.sleep)) == ['a', 'b', 'c']
+    assert offsets == [0, 1, 1, 2]
+    assert clock.sleeps == [5, 5, 5]
@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from nannyml_cloud_sdk import schema
+from nannyml_cloud_sdk.cache import MetadataCache
+from nannyml_cloud_sdk.errors import SchemaValidationError
+
+
+def test_sample_rows_random_keeps_row_order():
+    df = pd.DataFrame({'a': np.arange(1000)})
+
+    sample = schema._sample_rows(df, 10, 'RANDOM')
+
+    assert len(sample) == 10
+    assert sample['a'].is_monotonic_increasing
+    assert sample['a'].iloc[-1] > 100
+
+
+def test_sample_rows_stratified_spreads_rows_over_time():
+    # Data is sorted by another column, so the first rows all come from the last day
+    df = pd.DataFrame({
+        'key': np.arange(1000),
+        'Timestamp': pd.date_range('2024-01-01', periods=1000, freq='h')[::-1],
+    })
+
+    sample = schema._sample_rows(df, 10, 'STRATIFIED', 'timestamp')
+
+    assert sample['Timestamp'].min() == df['Timestamp'].min()
+    assert sample['Timestamp'].max() == df['Timestamp'].max()
+    assert sample['Timestamp'].dt.date.nunique() >= 9
+
+
+def test_sample_rows_null_aware_adds_rows_with_values():
+    df = pd.DataFrame({'a': np.arange(1000.0), 'b': np.nan, 'c': np.nan})
+    df.loc[500, 'b'] = 1.0
+
+    sample = schema._sample_rows(df, 10, 'NULL_AWARE')
+
+    assert sample.index.tolist() == list(range(10)) + [500]
+
+
+def test_inspect_columns_reuses_inspection_of_identical_layout(monkeypatch):
+    requests = []
+
+    def execute(query, variable_values):
+        requests.append(variable_values)
+        return {'inspect_dataset': {'columns': [
+            {'name': 'a', 'columnType': 'CONTINUOUS_FEATURE', 'dataType': 'int64', 'className': None,
+             'columnFlags': []},
+        ]}}
+
+    monkeypatch.setattr(schema, 'execute', execute)
+    monkeypatch.setattr(schema.Data, 'upload', lambda df: {})
+    monkeypatch.setattr(schema, 'inspection_cache', MetadataCache())
+
+    first = schema._inspect_columns(pd.DataFrame({'a': [1, 2]}), 'MONITORING', 'REGRESSION', 'SERVER', ())
+    first[0]['columnFlags'].append('SEGMENT')
+    second = schema._inspect_columns(pd.DataFrame({'a': [3, 4]}), 'MONITORING', 'REGRESSION', 'SERVER', ())
+    schema._inspect_columns(pd.DataFrame({'a': [1.0]}), 'MONITORING', 'REGRESSION', 'SERVER', ())
+    schema._inspect_columns(pd.DataFrame({'a': [1]}), 'MONITORING', 'BINARY_CLASSIFICATION', 'SERVER', ())
+
+    assert second[0]['columnFlags'] == []
+    assert len(requests) == 3
+
+
+def _column(name, column_type, data_type, class_name=None):
+    return {'name': name, 'columnType': column_type, 'dataType': data_type, 'className': class_name, 'columnFlags': []}
+
+
+def test_validate_data_accepts_matching_data():
+    columns = [
+        _column('timestamp', 'TIMESTAMP', 'datetime64[ns]'),
+        _column('count', 'CONTINUOUS_FEATURE', 'int64'),
+        _column('color', 'CATEGORICAL_FEATURE', 'object'),
+    ]
+    df = pd.DataFrame({
+        'Timestamp': pd.date_range('2024-01-01', periods=2),
+        # Integers with missing values are read as floats
+        'count': [1.0, None],
+        'color': pd.Categorical(['red', 'blue']),
+    })
+
+    schema._validate_data(df, columns, 'analysis')
+
+
+def test_validate_data_reports_all_problems():
+    columns = [
+        _column('timestamp', 'TIMESTAMP', 'datetime64[ns]'),
+        _column('age', 'CONTINUOUS_FEATURE', 'float64'),
+        _column('y_pred_proba_cat', 'PREDICTION_SCORE', 'float64', 'cat'),
+        _column('region', 'CATEGORICAL_FEATURE', 'object'),
+    ]
+    df = pd.DataFrame({
+        'timestamp': pd.to_datetime(['2024-01-01', None]),
+        'age': ['young', 'old'],
+        'y_pred_proba_cat': [0.5, 1.5],
+        'extra': [1, 2],
+    })
+
+    with pytest.raises(SchemaValidationError) as error, pytest.warns(UserWarning, match="unknown columns 'extra'"):
+        schema._validate_data(df, columns, 'analysis')
+
+    assert str(error.value) == (
+        "Data doesn't match the analysis data source: missing columns 'region'; "
+        "timestamp column 'timestamp' has 1 missing values; "
+        f"column 'age' has data type '{df['age'].dtype}' instead of 'float64'; "
+        "prediction score column 'y_pred_proba_cat' has 1 values outside of [0, 1]"
+    )
+
+
+def test_validate_data_warns_about_unknown_columns():
+    df = pd.DataFrame({'id': [1, 2], 'extra': [1, 2]})
+
+    with pytest.warns(UserWarning, match="unknown columns 'extra'"):
+        schema._validate_data(df, [_column('id', 'IDENTIFIER', 'int64')], 'analysis')
+
+
+def test_validate_data_rejects_columns_that_differ_in_case_only():
+    df = pd.DataFrame([[1, 2]], columns=['id', 'ID'])
+
+    with pytest.raises(SchemaValidationError, match="duplicate columns 'ID'"):
+        schema._validate_data(df, [_column('id', 'IDENTIFIER', 'int64')], 'analysis')